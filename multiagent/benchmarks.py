@@ -0,0 +1,192 @@
+"""Micro-benchmarks for the game engine behind the multi-agent project.
+
+Each benchmark prints one line per configuration so that the cost of an
+engine change can be read off directly.
+
+Usage:
+    python benchmarks.py             # run every benchmark
+    python benchmarks.py layout      # run only the named benchmark(s)
+
+Original Licensing Information:
+You are free to use or extend these projects for educational purposes provided that
+(1) you do not distribute or publish solutions
+(2) you retain this notice
+(3) you provide clear attribution to UC Berkeley, including a link to http://ai.berkeley.edu
+
+Original Attribution:
+The Pacman AI projects were developed at UC Berkeley.
+Core projects and autograders created by John DeNero (denero@cs.berkeley.edu)
+and Dan Klein (klein@cs.berkeley.edu).
+Student side autograding added by Brad Miller, Nick Hay, and Pieter Abbeel (pabbeel@cs.berkeley.edu).
+"""
+
+import random
+import sys
+import time
+from typing import Callable
+
+import layout
+import textDisplay
+from game import Agent
+from ghostAgents import RandomGhost
+from pacman import ClassicGameRules, GameState
+from pacmanAgents import LeftTurnAgent
+
+
+def timeGames(layoutName: str, numGames: int, seed: int = 0) -> tuple[float, int]:
+    """Play quiet LeftTurnAgent games against random ghosts.
+
+    Args:
+        layoutName: Name of a layout in the layouts directory
+        numGames: Number of games to play
+        seed: Random seed, so that every configuration plays the same games
+
+    Returns:
+        Tuple of (elapsed seconds, total number of moves)
+    """
+    lay = layout.getLayout(layoutName)
+    rules = ClassicGameRules()
+    random.seed(seed)
+    moves = 0
+    startTime = time.perf_counter()
+    for _ in range(numGames):
+        ghosts = [RandomGhost(i + 1) for i in range(lay.getNumGhosts())]
+        game = rules.newGame(lay, LeftTurnAgent(), ghosts, textDisplay.NullGraphics(), quiet=True)
+        game.run()
+        moves += len(game.moveHistory)
+    return time.perf_counter() - startTime, moves
+
+
+def benchmarkLayout(layouts: tuple[str, ...] = ('mediumClassic', 'originalClassic'),
+                    numGames: int = 5) -> None:
+    """Compare per-move game time with shared layouts and with re-parsed copies.
+
+    The "reparse" configuration temporarily restores the old behaviour of
+    Layout.deepCopy, which rebuilt the layout from its text on every state copy.
+
+    Args:
+        layouts: Layout names to run on
+        numGames: Number of games per configuration
+    """
+    print('layout: game time per move')
+    shared = layout.Layout.deepCopy
+    reparse: Callable[[layout.Layout], layout.Layout] = lambda self: layout.Layout(self.layoutText[:])
+    for name in layouts:
+        for label, deepCopy in [('reparse', reparse), ('shared', shared)]:
+            layout.Layout.deepCopy = deepCopy
+            try:
+                elapsed, moves = timeGames(name, numGames)
+            finally:
+                layout.Layout.deepCopy = shared
+            print(f'  {name:<16} {label:<8} {moves:>6} moves '
+                  f'{elapsed:7.2f}s {1e6 * elapsed / moves:9.1f} us/move')
+
+
+def benchmarkObservation(layouts: tuple[str, ...] = ('mediumClassic', 'originalClassic'),
+                         numGames: int = 5) -> None:
+    """Compare per-move game time with shared and with deep-copied observations.
+
+    Args:
+        layouts: Layout names to run on
+        numGames: Number of games per configuration
+    """
+    print('observation: game time per move')
+    for name in layouts:
+        for label, copyObservations in [('copied', True), ('shared', False)]:
+            Agent.copyObservations = copyObservations
+            try:
+                elapsed, moves = timeGames(name, numGames)
+            finally:
+                Agent.copyObservations = False
+            print(f'  {name:<16} {label:<8} {moves:>6} moves '
+                  f'{elapsed:7.2f}s {1e6 * elapsed / moves:9.1f} us/move')
+
+
+def expandTree(state: GameState, depth: int, agentIndex: int = 0) -> int:
+    """Generate every successor of a state down to a fixed number of plies.
+
+    Args:
+        state: State to expand
+        depth: Number of plies (single agent moves) to expand
+        agentIndex: Index of the agent to move first
+
+    Returns:
+        Number of successors generated
+    """
+    if depth == 0 or state.isWin() or state.isLose():
+        return 0
+    nextAgent = (agentIndex + 1) % state.getNumAgents()
+    generated = 0
+    for action in state.getLegalActions(agentIndex):
+        successor = state.generateSuccessor(agentIndex, action)
+        generated += 1 + expandTree(successor, depth - 1, nextAgent)
+    return generated
+
+
+def expandTreeInPlace(state: GameState, depth: int, agentIndex: int = 0) -> int:
+    """Walk the same tree as expandTree with makeMove/unmakeMove on one state.
+
+    Args:
+        state: State to expand; it is restored before returning
+        depth: Number of plies (single agent moves) to expand
+        agentIndex: Index of the agent to move first
+
+    Returns:
+        Number of moves made
+    """
+    if depth == 0 or state.isWin() or state.isLose():
+        return 0
+    nextAgent = (agentIndex + 1) % state.getNumAgents()
+    generated = 0
+    for action in state.getLegalActions(agentIndex):
+        undo = state.makeMove(agentIndex, action)
+        generated += 1 + expandTreeInPlace(state, depth - 1, nextAgent)
+        state.unmakeMove(undo)
+    return generated
+
+
+def benchmarkSuccessor(layouts: tuple[str, ...] = ('smallClassic', 'mediumClassic'),
+                       depth: int = 10) -> None:
+    """Compare generateSuccessor and makeMove throughput on a full game tree.
+
+    Args:
+        layouts: Layout names to run on
+        depth: Number of plies to expand from the initial state
+    """
+    print('successor: successor states per second')
+    for name in layouts:
+        lay = layout.getLayout(name)
+        state = GameState()
+        state.initialize(lay, lay.getNumGhosts())
+        for label, expand in [('generate', expandTree), ('makeMove', expandTreeInPlace)]:
+            GameState.getAndResetExplored()
+            startTime = time.perf_counter()
+            generated = expand(state, depth)
+            elapsed = time.perf_counter() - startTime
+            explored = len(GameState.getAndResetExplored())
+            print(f'  {name:<16} {label:<8} depth {depth} {generated:>8} states '
+                  f'{explored:>8} explored {elapsed:7.2f}s {generated / elapsed:10.0f} states/s')
+
+
+BENCHMARKS: dict[str, Callable[[], None]] = {
+    'layout': benchmarkLayout,
+    'observation': benchmarkObservation,
+    'successor': benchmarkSuccessor,
+}
+
+
+def main(argv: list[str]) -> None:
+    """Run the benchmarks named on the command line, or all of them.
+
+    Args:
+        argv: Benchmark names
+    """
+    names = argv or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            raise SystemExit(f'Unknown benchmark {name}; choose from {", ".join(BENCHMARKS)}')
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
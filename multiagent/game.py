@@ -30,6 +30,7 @@ Pieter Abbeel (pabbeel@cs.berkeley.edu).
 
 import abc
 from util import *
+import hashlib
 import time
 import os
 import traceback
@@ -51,6 +52,9 @@ class Agent(metaclass=abc.ABCMeta):
         index: Integer identifying which agent this is in the game
     """
 
+    # Agents that modify the states they are given set this to receive deep copies
+    copyObservations = False
+
     def __init__(self, index: int = 0) -> None:
         self.index = index
 
@@ -267,15 +271,7 @@ class Grid:
         return self.data == other.data
 
     def __hash__(self) -> int:
-        # return hash(str(self))
-        base = 1
-        h = 0
-        for l in self.data:
-            for i in l:
-                if i:
-                    h += base
-                base *= 2
-        return hash(h)
+        return hash(self._cellBits())
 
     def copy(self) -> 'Grid':
         """Return a deep copy of this grid."""
@@ -307,24 +303,41 @@ class Grid:
         return list
 
     def packBits(self) -> tuple[int, ...]:
+        """Pack grid data into an efficient integer representation.
+
+        Returns:
+            Tuple of (width, height, packed_bits...) where packed_bits
+            are integers encoding the boolean grid values
+        """
+        return (self.width, self.height) + self._packCells(self._cellBits())
+
+    def _cellBits(self) -> int:
+        """Encode the grid as one integer whose bit x * height + y is cell (x,y).
+
+        Returns:
+            Integer bitset of the cells that are True
         """
-        Returns an efficient int list representation.
+        digits = ''.join(['1' if cell else '0' for column in reversed(self.data) for cell in reversed(column)])
+        return int(digits, 2) if digits else 0
+
+    def _packCells(self, cells: int) -> tuple[int, ...]:
+        """Split a cell bitset into the CELLS_PER_INT sized chunks used by packBits.
+
+        Within a chunk the first cell is stored in the most significant bit.
+
+        Args:
+            cells: Integer bitset as returned by _cellBits
 
         Returns:
-            Tuple of (width, height, bitPackedInts...)
-        """
-        bits = [self.width, self.height]
-        currentInt = 0
-        for i in range(self.height * self.width):
-            bit = self.CELLS_PER_INT - (i % self.CELLS_PER_INT) - 1
-            x, y = self._cellIndexToPosition(i)
-            if self[x][y]:
-                currentInt += 2 ** bit
-            if (i + 1) % self.CELLS_PER_INT == 0:
-                bits.append(currentInt)
-                currentInt = 0
-        bits.append(currentInt)
-        return tuple(bits)
+            Tuple of packed integers
+        """
+        size = self.CELLS_PER_INT
+        mask = (1 << size) - 1
+        chunks = []
+        for start in range(0, self.width * self.height + 1, size):
+            chunk = (cells >> start) & mask
+            chunks.append(int(format(chunk, f'0{size}b')[::-1], 2))
+        return tuple(chunks)
 
     def _cellIndexToPosition(self, index: int) -> tuple[int, int]:
         """Convert cell index to (x,y) position."""
@@ -333,46 +346,280 @@ class Grid:
         return x, y
 
     def _unpackBits(self, bits: tuple[int, ...]) -> None:
-        """
-        Fills in data from a bit-level representation.
-        
+        """Fill grid data from bit-level representation.
+
         Args:
-            bits: Tuple of integers containing packed bit data
+            bits: Tuple of integers encoding the grid data
         """
-        cell = 0
-        for packed in bits:
-            for bit in self._unpackInt(packed, self.CELLS_PER_INT):
-                if cell == self.width * self.height:
-                    break
-                x, y = self._cellIndexToPosition(cell)
-                self[x][y] = bit
-                cell += 1
+        cells = self._unpackCells(bits)
+        height = self.height
+        for x in range(self.width):
+            column = cells >> (x * height)
+            self.data[x] = [(column >> y) & 1 != 0 for y in range(height)]
+
+    def _unpackCells(self, bits: tuple[int, ...]) -> int:
+        """Reassemble packBits chunks into a single cell bitset.
 
-    def _unpackInt(self, packed: int, size: int) -> list[bool]:
-        """
-        Unpack an integer into a list of booleans.
-        
         Args:
-            packed: Integer to unpack
-            size: Number of bits to unpack
-            
+            bits: Tuple of packed integers (without the width and height)
+
         Returns:
-            List of booleans representing the bits
-            
+            Integer bitset whose bit x * height + y is cell (x,y)
+
         Raises:
-            ValueError: If packed integer is negative
-        """
-        bools = []
-        if packed < 0:
-            raise ValueError("must be a positive integer")
-        for i in range(size):
-            n = 2 ** (self.CELLS_PER_INT - i - 1)
-            if packed >= n:
-                bools.append(True)
-                packed -= n
+            ValueError if a packed integer is negative
+        """
+        size = self.CELLS_PER_INT
+        cells = 0
+        for i, packed in enumerate(bits):
+            if packed < 0: raise ValueError("must be a positive integer")
+            cells |= int(format(packed, f'0{size}b')[::-1], 2) << (i * size)
+        return cells & ((1 << (self.width * self.height)) - 1)
+
+
+class _BitColumn:
+    """A writable view of one column of a BitGrid, so grid[x][y] keeps working.
+
+    Reads behave like a column list of Grid.data and writes go straight through to
+    the grid's bits. The column length is fixed, so list methods that resize it
+    (append, insert, pop, ...) are not provided.
+    """
+    __slots__ = ('grid', 'offset')
+
+    def __init__(self, grid: 'BitGrid', x: int) -> None:
+        self.grid = grid
+        self.offset = x * grid.height
+
+    def __len__(self) -> int:
+        return self.grid.height
+
+    def _index(self, y: int) -> int:
+        height = self.grid.height
+        if -height <= y < 0:
+            y += height
+        if not 0 <= y < height:
+            raise IndexError('grid column index out of range')
+        return y
+
+    def __getitem__(self, y: int | slice) -> bool | list[bool]:
+        if type(y) is int and 0 <= y < self.grid.height:
+            return (self.grid.bits >> (self.offset + y)) & 1 != 0
+        if isinstance(y, slice):
+            return list(self)[y]
+        return (self.grid.bits >> (self.offset + self._index(y))) & 1 != 0
+
+    def __iter__(self) -> Iterator[bool]:
+        column = self.grid.bits >> self.offset
+        return iter([(column >> y) & 1 != 0 for y in range(self.grid.height)])
+
+    def __reversed__(self) -> Iterator[bool]:
+        return reversed(list(self))
+
+    def __contains__(self, value: Any) -> bool:
+        return value in list(self)
+
+    def __setitem__(self, y: int | slice, value: Any) -> None:
+        if isinstance(y, slice):
+            rows = range(*y.indices(self.grid.height))
+            values = list(value)
+            if len(values) != len(rows):
+                raise ValueError('cannot resize a grid column')
+            for row, cell in zip(rows, values):
+                self[row] = cell
+            return
+        y = self._index(y)
+        if value:
+            self.grid.bits |= 1 << (self.offset + y)
+        else:
+            self.grid.bits &= ~(1 << (self.offset + y))
+
+    def count(self, value: Any) -> int:
+        return list(self).count(value)
+
+    def index(self, value: Any, *bounds: int) -> int:
+        return list(self).index(value, *bounds)
+
+    def copy(self) -> list[bool]:
+        return list(self)
+
+    def __eq__(self, other: Any) -> bool:
+        return list(self) == other
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class _BitColumns:
+    """A write-through view of a BitGrid's columns that stands in for Grid.data."""
+    __slots__ = ('grid',)
+
+    def __init__(self, grid: 'BitGrid') -> None:
+        self.grid = grid
+
+    def __len__(self) -> int:
+        return self.grid.width
+
+    def __getitem__(self, x: int | slice) -> _BitColumn | list[_BitColumn]:
+        if isinstance(x, slice):
+            return [self.grid[i] for i in range(*x.indices(self.grid.width))]
+        return self.grid[x]
+
+    def __setitem__(self, x: int, column: list[bool]) -> None:
+        self.grid[x] = column
+
+    def __iter__(self) -> Iterator[_BitColumn]:
+        return iter([self.grid[x] for x in range(self.grid.width)])
+
+    def __eq__(self, other: Any) -> bool:
+        return [list(column) for column in self] == other
+
+    def __repr__(self) -> str:
+        return repr([list(column) for column in self])
+
+
+class BitGrid(Grid):
+    """
+    A boolean Grid backed by the bits of a single Python int.
+
+    Cell (x,y) is bit x * height + y, the same ordering Grid uses for hashing and
+    packBits, so a BitGrid hashes and compares equal to a list-backed Grid holding
+    the same cells. Because ints are immutable, copy() is O(1), and __hash__,
+    __eq__, count and asList work a machine word at a time instead of visiting
+    every cell from Python. Layouts store their food in a BitGrid, which makes the
+    food grids that search problems and game states copy and hash on every
+    successor cheap.
+
+    grid[x][y] and grid.data[x][y] reads and writes work as with Grid; grid[x]
+    and grid.data are views onto the bits rather than lists.
+
+    Args:
+        width: Width of the grid in cells
+        height: Height of the grid in cells
+        initialValue: Initial boolean value to fill grid with (default False)
+        bitRepresentation: Optional bit-packed representation to initialize from
+    """
+    def __init__(self, width: int, height: int, initialValue: bool = False,
+                 bitRepresentation: tuple[int, ...] | None = None) -> None:
+        if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        self.bits = (1 << (width * height)) - 1 if initialValue else 0
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+
+    @classmethod
+    def fromGrid(cls, grid: Grid) -> 'BitGrid':
+        """Build a BitGrid holding the same cells as a list-backed Grid.
+
+        Args:
+            grid: Boolean Grid to convert
+
+        Returns:
+            New BitGrid with the same width, height and cells
+        """
+        g = cls(grid.width, grid.height)
+        g.bits = grid._cellBits()
+        return g
+
+    @property
+    def data(self) -> _BitColumns:
+        """A write-through view of the columns, for code written against Grid.data.
+
+        grid.data[x][y] = value updates the grid just like grid[x][y] = value.
+        """
+        return _BitColumns(self)
+
+    def __getitem__(self, i: int) -> _BitColumn:
+        if not 0 <= i < self.width:
+            if -self.width <= i < 0:
+                i += self.width
             else:
-                bools.append(False)
-        return bools
+                raise IndexError('grid index out of range')
+        return _BitColumn(self, i)
+
+    def __setitem__(self, key: int, item: list[bool]) -> None:
+        column = self[key]
+        if len(item) != self.height:
+            raise ValueError('grid columns must have %d cells' % self.height)
+        for y, value in enumerate(item):
+            column[y] = value
+
+    def __str__(self) -> str:
+        out = [''.join(['T' if (self.bits >> (x * self.height + y)) & 1 else 'F'
+                        for x in range(self.width)]) for y in range(self.height)]
+        out.reverse()
+        return '\n'.join(out)
+
+    def __eq__(self, other: Any) -> bool:
+        if other == None: return False
+        if isinstance(other, BitGrid):
+            return self.bits == other.bits and self.width == other.width and self.height == other.height
+        return Grid.__eq__(self, other)
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def copy(self) -> 'BitGrid':
+        """Create an independent copy of this grid in O(1).
+
+        Returns:
+            New BitGrid with the same cells
+        """
+        g = BitGrid.__new__(BitGrid)
+        g.CELLS_PER_INT = self.CELLS_PER_INT
+        g.width = self.width
+        g.height = self.height
+        g.bits = self.bits
+        return g
+
+    def shallowCopy(self) -> 'BitGrid':
+        """Same as copy(); the backing int is immutable so nothing is shared.
+
+        Returns:
+            New BitGrid with the same cells
+        """
+        return self.copy()
+
+    def count(self, item: bool = True) -> int:
+        """Count cells matching the given value.
+
+        Args:
+            item: Value to count (default True)
+
+        Returns:
+            Number of cells matching the value
+        """
+        if item not in [False, True]: return 0
+        trueCells = self.bits.bit_count()
+        return trueCells if item else self.width * self.height - trueCells
+
+    def asList(self, key: bool = True) -> list[tuple[int, int]]:
+        """Return coordinates of cells matching the given value.
+
+        Args:
+            key: Value to match (default True)
+
+        Returns:
+            List of (x,y) coordinates where value matches key, ordered as in Grid.asList
+        """
+        if key not in [False, True]: return []
+        bits = self.bits if key else ~self.bits & ((1 << (self.width * self.height)) - 1)
+        height = self.height
+        cells = []
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            cells.append((index // height, index % height))
+            bits ^= low
+        return cells
+
+    def _cellBits(self) -> int:
+        return self.bits
+
+    def _unpackBits(self, bits: tuple[int, ...]) -> None:
+        self.bits = self._unpackCells(bits)
 
 
 def reconstituteGrid(bitRep: tuple[int, ...]) -> 'Grid':
@@ -549,6 +796,127 @@ class Actions:
     getSuccessor = staticmethod(getSuccessor)
 
 
+class MoveTable:
+    """
+    The legal moves from every cell of a wall grid, computed once.
+
+    Cell (x,y) has id x * height + y, as in BitGrid. Each table holds, per
+    cell id, what Actions.getPossibleActions and Actions.getLegalNeighbors
+    would derive from the walls, so looking up a move is a single index.
+    Layout.getMoveTable builds one per layout on first use.
+
+    Attributes:
+        height: Height of the wall grid
+        actions: Legal actions (Stop included) per cell, in Actions order
+        neighbors: Legal neighbor positions (the cell itself included) per cell
+        successors: (action, position) pairs of the moves out of each cell,
+            in the North, South, East, West order used by search problems
+    """
+
+    SEARCH_ORDER = (Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST)
+
+    def __init__(self, walls: 'Grid') -> None:
+        """
+        Build the tables for a wall grid.
+
+        Args:
+            walls: Grid of wall positions; cells outside it count as walls
+        """
+        width, height = walls.width, walls.height
+        self.height = height
+        self.actions: list[tuple[str, ...]] = []
+        self.neighbors: list[tuple[tuple[int, int], ...]] = []
+        self.successors: list[tuple[tuple[str, tuple[int, int]], ...]] = []
+
+        def isOpen(x: int, y: int) -> bool:
+            return 0 <= x < width and 0 <= y < height and not walls[x][y]
+
+        for x in range(width):
+            for y in range(height):
+                moves = {direction: (x + dx, y + dy) for direction, (dx, dy) in Actions._directionsAsList
+                         if isOpen(x + dx, y + dy)}
+                self.actions.append(tuple(moves))
+                self.neighbors.append(tuple(moves.values()))
+                self.successors.append(tuple((direction, moves[direction])
+                                             for direction in self.SEARCH_ORDER if direction in moves))
+
+    def getPossibleActions(self, config: 'Configuration') -> list[str]:
+        """
+        Get list of possible movement actions from current configuration.
+
+        Same as Actions.getPossibleActions with the walls this table was built from.
+
+        Args:
+            config: Current Configuration object
+
+        Returns:
+            New list of legal direction strings
+        """
+        x, y = config.pos
+        x_int, y_int = int(x + 0.5), int(y + 0.5)
+
+        # In between grid points, all agents must continue straight
+        if (abs(x - x_int) + abs(y - y_int) > Actions.TOLERANCE):
+            return [config.getDirection()]
+        return list(self.actions[x_int * self.height + y_int])
+
+    def getLegalNeighbors(self, position: tuple[float, float]) -> tuple[tuple[int, int], ...]:
+        """
+        Get the legal neighboring positions, as Actions.getLegalNeighbors does.
+
+        Args:
+            position: Current (x,y) position
+
+        Returns:
+            Tuple of legal (x,y) neighbor positions
+        """
+        x, y = position
+        return self.neighbors[int(x + 0.5) * self.height + int(y + 0.5)]
+
+    def getSuccessors(self, position: tuple[int, int]) -> tuple[tuple[str, tuple[int, int]], ...]:
+        """
+        Get the moves out of a grid position, excluding Stop.
+
+        Args:
+            position: Current (x,y) grid position
+
+        Returns:
+            Tuple of (action, next position) pairs in SEARCH_ORDER
+        """
+        x, y = position
+        return self.successors[x * self.height + y]
+
+
+# Odd 64-bit multiplier that spreads scores over the hash. hash(score) would
+# not do: hash(-1) == hash(-2) in CPython.
+_SCORE_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_HASH_MASK = (1 << 64) - 1
+# Fixed seed mixed into every feature's key. Keys are derived from the feature
+# itself rather than drawn at random and remembered, so no table of keys grows
+# with the positions and scared timers seen over a long run, and the global
+# random sequence is never touched.
+_ZOBRIST_SEED = 0x2545F4914F6CDD1D
+
+
+def zobristKey(feature: tuple) -> int:
+    """
+    Get the pseudo-random 64-bit key for one feature of a game state.
+
+    The key is hash(feature) mixed with a fixed seed by the splitmix64
+    finalizer, so nearby positions get unrelated keys.
+    
+    Args:
+        feature: Hashable description of the feature, such as ('food', x, y)
+        
+    Returns:
+        Key that is always the same for equal features
+    """
+    key = (hash(feature) ^ _ZOBRIST_SEED) & _HASH_MASK
+    key = (key ^ (key >> 30)) * 0xBF58476D1CE4E5B9 & _HASH_MASK
+    key = (key ^ (key >> 27)) * 0x94D049BB133111EB & _HASH_MASK
+    return key ^ (key >> 31)
+
+
 class GameStateData:
     """
     Data structure containing the complete game state.
@@ -569,22 +937,42 @@ class GameStateData:
         _agentMoved: Index of agent that moved in last move
         _lose: Whether game is lost
         _win: Whether game is won
+
+    A state built from a previous state is copy-on-write: it shares the food
+    grid, the capsule list and every AgentState with its parent. Code that
+    changes a successor must go through getWritableAgentState, removeFood
+    and removeCapsule so that the parent is never modified.
+
+    The hash is a Zobrist hash: the XOR of one pseudo-random key per agent state,
+    food pellet and capsule. Successors inherit it and update it in O(1):
+    getWritableAgentState removes the agent's key and marks it stale until the
+    next __hash__ adds the new one, while removeFood and removeCapsule XOR out
+    the key of what they remove.
     """
 
     def __init__(self, prevState = None):
         """
-        Initialize game state, optionally copying from previous state.
+        Initialize game state, optionally sharing components with a previous state.
         
         Args:
-            prevState: Previous GameStateData to copy from, or None for new state
+            prevState: Previous GameStateData to build on, or None for new state
         """
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates(prevState.agentStates)
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates[:]
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+            self._ownedAgentStates = 0
+            self._ownsCapsules = False
+            self._zobrist = prevState._zobrist
+            self._staleAgentHashes = prevState._staleAgentHashes
+        else:
+            self._ownedAgentStates = -1
+            self._ownsCapsules = True
+            self._zobrist = None
+            self._staleAgentHashes = 0
 
         self._foodEaten = None
         self._foodAdded = None
@@ -598,6 +986,10 @@ class GameStateData:
         """Create a deep copy of the game state."""
         state = GameStateData(self)
         state.food = self.food.deepCopy()
+        state.capsules = self.capsules[:]
+        state.agentStates = self.copyAgentStates(self.agentStates)
+        state._ownedAgentStates = -1
+        state._ownsCapsules = True
         state.layout = self.layout.deepCopy()
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
@@ -605,6 +997,79 @@ class GameStateData:
         state._capsuleEaten = self._capsuleEaten
         return state
 
+    def getWritableAgentState(self, agentIndex: int) -> 'AgentState':
+        """
+        Get an agent state that belongs to this state alone, copying it on first write.
+        
+        Args:
+            agentIndex: Index of the agent about to be modified
+            
+        Returns:
+            AgentState that can be modified without affecting other states
+        """
+        if not (self._ownedAgentStates >> agentIndex) & 1:
+            self.agentStates[agentIndex] = self.agentStates[agentIndex].copy()
+            self._ownedAgentStates |= 1 << agentIndex
+        if self._zobrist is not None and not (self._staleAgentHashes >> agentIndex) & 1:
+            self._zobrist ^= zobristKey(self._agentFeature(agentIndex))
+            self._staleAgentHashes |= 1 << agentIndex
+        return self.agentStates[agentIndex]
+
+    def getWritableCapsules(self) -> list[tuple[int, int]]:
+        """
+        Get a capsule list that belongs to this state alone, copying it on first write.
+        
+        Returns:
+            List of capsule positions that can be modified without affecting other states
+        """
+        if not self._ownsCapsules:
+            self.capsules = self.capsules[:]
+            self._ownsCapsules = True
+        return self.capsules
+
+    def removeFood(self, x: int, y: int) -> None:
+        """
+        Remove the food pellet at a position, keeping the parent's grid intact.
+        
+        Args:
+            x: Column of the pellet
+            y: Row of the pellet
+        """
+        self.food = self.food.copy()
+        self.food[x][y] = False
+        if self._zobrist is not None:
+            self._zobrist ^= zobristKey(('food', x, y))
+
+    def removeCapsule(self, position: tuple[int, int]) -> None:
+        """
+        Remove the capsule at a position, keeping the parent's list intact.
+        
+        Args:
+            position: (x,y) position of the capsule
+        """
+        self.getWritableCapsules().remove(position)
+        if self._zobrist is not None:
+            self._zobrist ^= zobristKey(('capsule', position))
+
+    def _agentFeature(self, agentIndex: int) -> tuple:
+        """Describe the hashed part of an agent state as a Zobrist feature."""
+        agentState = self.agentStates[agentIndex]
+        configuration = agentState.configuration
+        if configuration == None:
+            return ('agent', agentIndex, None, None, agentState.scaredTimer)
+        return ('agent', agentIndex, configuration.pos, configuration.direction, agentState.scaredTimer)
+
+    def _computeZobrist(self) -> int:
+        """Compute the Zobrist hash of agents, food and capsules from scratch."""
+        h = 0
+        for agentIndex in range(len(self.agentStates)):
+            h ^= zobristKey(self._agentFeature(agentIndex))
+        for x, y in self.food.asList():
+            h ^= zobristKey(('food', x, y))
+        for position in self.capsules:
+            h ^= zobristKey(('capsule', position))
+        return h
+
     def copyAgentStates(self, agentStates: list['AgentState']) -> list['AgentState']:
         """
         Create copies of all agent states.
@@ -644,14 +1109,16 @@ class GameStateData:
         return True
 
     def __hash__(self) -> int:
-        """Generate hash value for game state."""
-        for i, state in enumerate(self.agentStates):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                # hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113 * hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575)
+        """Generate hash value for game state from its incremental Zobrist hash."""
+        if self._zobrist is None:
+            self._zobrist = self._computeZobrist()
+            self._staleAgentHashes = 0
+        elif self._staleAgentHashes:
+            for agentIndex in range(len(self.agentStates)):
+                if (self._staleAgentHashes >> agentIndex) & 1:
+                    self._zobrist ^= zobristKey(self._agentFeature(agentIndex))
+            self._staleAgentHashes = 0
+        return self._zobrist ^ (int(self.score) * _SCORE_HASH_MULTIPLIER & _HASH_MASK)
 
     def __str__(self) -> str:
         """Generate string representation of game state."""
@@ -762,6 +1229,8 @@ class GameStateData:
             self.agentStates.append(AgentState(
                 Configuration(pos, Directions.STOP), isPacman))
         self._eaten = [False for a in self.agentStates]
+        self._zobrist = self._computeZobrist()
+        self._staleAgentHashes = 0
 
 
 try:
@@ -770,6 +1239,134 @@ try:
 except:
     _BOINC_ENABLED = False
 
+# Game records are versioned, line-delimited text files written one move at a
+# time (see GameRecorder). Each move is a fixed-width line holding the agent
+# index in base 36 and a one-letter action code.
+RECORD_HEADER = 'pacman-record'
+RECORD_VERSION = 1
+_AGENT_CODES = '0123456789abcdefghijklmnopqrstuvwxyz'
+_ACTION_CODES = {Directions.NORTH: 'N', Directions.SOUTH: 'S', Directions.EAST: 'E',
+                 Directions.WEST: 'W', Directions.STOP: 'X'}
+_CODE_ACTIONS = {code: action for action, code in _ACTION_CODES.items()}
+
+
+def layoutHash(layoutText: list[str]) -> str:
+    """
+    Get the content hash that identifies a layout in game records.
+
+    Args:
+        layoutText: Rows of the layout
+
+    Returns:
+        Hex SHA-1 digest of the layout text
+    """
+    return hashlib.sha1('\n'.join(layoutText).encode()).hexdigest()
+
+
+class GameRecorder:
+    """
+    Writes the record of a game to a file while the game is played.
+
+    A record consists of the lines
+
+        pacman-record <version>
+        layout <layoutHash of the layout> <number of rows>
+        <the rows of the layout>
+        seed <random seed the game was played with, or ->
+        moves
+        <one line per move>
+
+    Every move is flushed as soon as it is made, so the record of a game that
+    crashes or is interrupted is complete up to its last move. Read records
+    with readGameRecord. Can be used as a context manager.
+    """
+
+    def __init__(self, fileName: str, layoutText: list[str], seed: int | None = None) -> None:
+        """
+        Create the record file and write its header.
+
+        Args:
+            fileName: Name of the record file
+            layoutText: Rows of the layout the game is played on
+            seed: Random seed the game was played with, if known
+        """
+        self.file = open(fileName, 'w', encoding='ascii', newline='\n')
+        self.file.write(f'{RECORD_HEADER} {RECORD_VERSION}\n')
+        self.file.write(f'layout {layoutHash(layoutText)} {len(layoutText)}\n')
+        self.file.writelines(row + '\n' for row in layoutText)
+        self.file.write(f'seed {"-" if seed is None else seed}\nmoves\n')
+        self.file.flush()
+
+    def recordMove(self, agentIndex: int, action: str) -> None:
+        """
+        Append a move to the record.
+
+        Args:
+            agentIndex: Index of the agent that moved, below 36
+            action: Direction the agent moved in
+        """
+        self.file.write(f'{_AGENT_CODES[agentIndex]}{_ACTION_CODES[action]}\n')
+        self.file.flush()
+
+    def close(self) -> None:
+        """Close the record file."""
+        self.file.close()
+
+    def __enter__(self) -> 'GameRecorder':
+        return self
+
+    def __exit__(self, *excInfo: Any) -> None:
+        self.close()
+
+
+def readGameRecord(fileName: str) -> tuple[list[str], int | None, Iterator[tuple[int, str]]]:
+    """
+    Read a game record written by GameRecorder.
+
+    The header is read at once and the moves only as the returned iterator is
+    consumed, so a replay can start before the whole file is read. A last move
+    cut short by a crash is skipped.
+
+    Args:
+        fileName: Name of the record file
+
+    Returns:
+        Tuple of (layout rows, seed or None, iterator over (agentIndex, action) moves)
+
+    Raises:
+        Exception: If the file is not a game record of a supported version,
+            or its layout does not match the layout hash
+    """
+    f = open(fileName, encoding='ascii', newline='\n')
+    try:
+        header = f.readline().split()
+        if len(header) != 2 or header[0] != RECORD_HEADER:
+            raise Exception(f'{fileName} is not a recorded game')
+        if header[1] != str(RECORD_VERSION):
+            raise Exception(f'{fileName} is a version {header[1]} game record; only version {RECORD_VERSION} is supported')
+        _, digest, numRows = f.readline().split()
+        layoutText = [f.readline().rstrip('\n') for _ in range(int(numRows))]
+        if layoutHash(layoutText) != digest:
+            raise Exception(f'The layout in {fileName} does not match its hash')
+        _, seed = f.readline().split()
+        if f.readline() != 'moves\n':
+            raise Exception(f'{fileName} has no moves section')
+    except ValueError:
+        f.close()
+        raise Exception(f'{fileName} is not a valid game record')
+    except Exception:
+        f.close()
+        raise
+
+    def moves() -> Iterator[tuple[int, str]]:
+        with f:
+            for line in f:
+                if len(line) == 3:
+                    yield int(line[0], 36), _CODE_ACTIONS[line[1]]
+
+    return layoutText, None if seed == '-' else int(seed), moves()
+
+
 class Game:
     """
     The Game manages the control flow, soliciting actions from agents.
@@ -793,6 +1390,7 @@ class Game:
         totalAgentTimeWarnings: List tracking timeout warnings per agent
         agentTimeout: Whether any agent has timed out
         agentOutput: List of StringIO buffers for agent output
+        recorder: GameRecorder the moves are written to as they are made, if any
     """
 
     def __init__(self, agents: list['Agent'], display: 'Display', rules: 'Rules', 
@@ -810,6 +1408,8 @@ class Game:
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
         self.agentTimeout = False
+        self.moveTimer = MoveTimer()
+        self.recorder: GameRecorder | None = None
         import io
         self.agentOutput = [io.StringIO() for agent in agents]
 
@@ -862,6 +1462,27 @@ class Game:
         sys.stdout = OLD_STDOUT
         sys.stderr = OLD_STDERR
 
+    def _observationFor(self, agent: Any) -> Any:
+        """
+        Get the state to hand to an agent.
+
+        The game never changes a state once it has moved on from it, so agents
+        share the data of the game's current state unless they set
+        copyObservations to receive a deep copy that they are free to modify.
+        The shared state is a separate object that copies the data before its
+        first makeMove, so an agent searching in place never changes the
+        game's state, even if it is stopped before undoing its moves.
+
+        Args:
+            agent: Agent that will observe the state
+
+        Returns:
+            A state sharing the current state's data, or a deep copy of it
+        """
+        if getattr(agent, 'copyObservations', False):
+            return self.state.deepCopy()
+        return self.state.sharedCopy()
+
     def run(self) -> None:
         """
         Main control loop for game play.
@@ -873,7 +1494,18 @@ class Game:
         - Win/loss conditions
         - Agent timing and crashes
         - Final cleanup
+
+        When exceptions are caught, agent calls are timed by a MoveTimer that is
+        set up once for the whole game, so move timeouts may be fractional.
         """
+        if self.catchExceptions:
+            with self.moveTimer:
+                self._runGame()
+        else:
+            self._runGame()
+
+    def _runGame(self) -> None:
+        """Play the game until it is over; see run."""
         self.display.initialize(self.state.data)
         self.numMoves = 0
 
@@ -893,11 +1525,11 @@ class Game:
                 self.mute(i)
                 if self.catchExceptions:
                     try:
-                        timed_func = TimeoutFunction(
-                            agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
+                        timed_func = self.moveTimer.timed(
+                            agent.registerInitialState, self.rules.getMaxStartupTime(i))
                         try:
                             start_time = time.time()
-                            timed_func(self.state.deepCopy())
+                            timed_func(self._observationFor(agent))
                             time_taken = time.time() - start_time
                             self.totalAgentTimes[i] += time_taken
                         except TimeoutFunctionException:
@@ -911,7 +1543,7 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    agent.registerInitialState(self.state.deepCopy())
+                    agent.registerInitialState(self._observationFor(agent))
                 # TODO: could this exceed the total time
                 self.unmute()
 
@@ -928,11 +1560,11 @@ class Game:
                 self.mute(agentIndex)
                 if self.catchExceptions:
                     try:
-                        timed_func = TimeoutFunction(agent.observationFunction, int(
-                            self.rules.getMoveTimeout(agentIndex)))
+                        timed_func = self.moveTimer.timed(
+                            agent.observationFunction, self.rules.getMoveTimeout(agentIndex))
                         try:
                             start_time = time.time()
-                            observation = timed_func(self.state.deepCopy())
+                            observation = timed_func(self._observationFor(agent))
                         except TimeoutFunctionException:
                             skip_action = True
                         move_time += time.time() - start_time
@@ -942,19 +1574,18 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    observation = agent.observationFunction(
-                        self.state.deepCopy())
+                    observation = agent.observationFunction(self._observationFor(agent))
                 self.unmute()
             else:
-                observation = self.state.deepCopy()
+                observation = self._observationFor(agent)
 
             # Solicit an action
             action = None
             self.mute(agentIndex)
             if self.catchExceptions:
                 try:
-                    timed_func = TimeoutFunction(agent.getAction, int(
-                        self.rules.getMoveTimeout(agentIndex)) - int(move_time))
+                    timed_func = self.moveTimer.timed(
+                        agent.getAction, self.rules.getMoveTimeout(agentIndex) - move_time)
                     try:
                         start_time = time.time()
                         if skip_action:
@@ -998,6 +1629,8 @@ class Game:
 
             # Execute the action
             self.moveHistory.append((agentIndex, action))
+            if self.recorder is not None:
+                self.recorder.recordMove(agentIndex, action)
             if self.catchExceptions:
                 try:
                     self.state = self.state.generateSuccessor(
@@ -40,13 +40,14 @@ Pieter Abbeel (pabbeel@cs.berkeley.edu).
 
 
 from util import manhattanDistance
-from game import Grid, Directions
+from game import Grid, BitGrid, Directions, MoveTable
 import os
 import random
 from functools import reduce
 from typing import List, Tuple, Set, Dict, Optional, Union
 
 VISIBILITY_MATRIX_CACHE: Dict[str, Grid] = {}
+LAYOUT_CACHE: Dict[Tuple[str, ...], 'Layout'] = {}
 
 
 class Layout:
@@ -60,32 +61,40 @@ class Layout:
         width (int): Width of the game board
         height (int): Height of the game board
         walls (Grid): Grid marking wall locations
-        food (Grid): Grid marking food pellet locations 
+        food (BitGrid): Bit-packed grid marking food pellet locations 
         capsules (List[Tuple[int, int]]): List of capsule coordinates
         agentPositions (List[Tuple[bool, Tuple[int, int]]]): List of agent positions
         numGhosts (int): Number of ghosts in the layout
         layoutText (List[str]): Original layout text representation
         totalFood (int): Total number of food pellets
         visibility (Grid): Visibility information for each position (optional)
+        moveTable (MoveTable): Legal moves per cell, built by getMoveTable
     """
 
     def __init__(self, layoutText: List[str]) -> None:
         self.width = len(layoutText[0])
         self.height = len(layoutText)
         self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        self.food = BitGrid(self.width, self.height, False)
         self.capsules: List[Tuple[int, int]] = []
         self.agentPositions: List[Tuple[bool, Tuple[int, int]]] = []
         self.numGhosts = 0
         self.processLayoutText(layoutText)
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
+        self.moveTable: Optional[MoveTable] = None
         # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self) -> int:
         """Return the number of ghosts in the layout."""
         return self.numGhosts
 
+    def getMoveTable(self) -> MoveTable:
+        """Return the table of legal moves from every cell, building it on first use."""
+        if self.moveTable is None:
+            self.moveTable = MoveTable(self.walls)
+        return self.moveTable
+
     def initializeVisibilityMatrix(self) -> None:
         """Initialize the visibility matrix for line-of-sight calculations.
         
@@ -174,8 +183,12 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self) -> 'Layout':
-        """Return a new copy of this layout."""
-        return Layout(self.layoutText[:])
+        """Return this layout.
+
+        Layouts are never modified after they are built, so game states and
+        their copies share one instance instead of re-parsing the layout text.
+        """
+        return self
 
     def processLayoutText(self, layoutText: List[str]) -> None:
         """Process the layout text to initialize the game state.
@@ -264,6 +277,25 @@ def tryToLoad(fullname: str) -> Optional[Layout]:
         return None
     f = open(fullname)
     try:
-        return Layout([line.strip() for line in f])
+        return internLayout([line.strip() for line in f])
     finally:
         f.close()
+
+
+def internLayout(layoutText: List[str]) -> Layout:
+    """
+    Return the shared Layout for the given text, parsing it only the first time.
+
+    Layouts are immutable, so every game played on the same maze can use a
+    single instance.
+
+    Args:
+        layoutText: List of strings representing the maze layout
+
+    Returns:
+        The interned Layout for this text
+    """
+    key = tuple(layoutText)
+    if key not in LAYOUT_CACHE:
+        LAYOUT_CACHE[key] = Layout(list(layoutText))
+    return LAYOUT_CACHE[key]
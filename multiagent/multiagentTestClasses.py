@@ -109,6 +109,31 @@ class MultiagentTreeState:
         self.problem.generatedStates.add(successor)
         return MultiagentTreeState(self.problem, successor)
 
+    def makeMove(self, agentIndex: int, action: str) -> str:
+        """Move this state to its successor in place, like GameState.makeMove.
+
+        Args:
+            agentIndex: Index of the agent taking the action
+            action: The action being taken
+
+        Returns:
+            Undo token to pass to unmakeMove
+        """
+        if VERBOSE:
+            print(f"makeMove({self.state}, {agentIndex}, {action}) -> {self.problem.stateToSuccessorMap[self.state][action]}")
+        undo = self.state
+        self.state = self.problem.stateToSuccessorMap[self.state][action]
+        self.problem.generatedStates.add(self.state)
+        return undo
+
+    def unmakeMove(self, undo: str) -> None:
+        """Restore the state from before the makeMove call that returned undo.
+
+        Args:
+            undo: Token returned by makeMove
+        """
+        self.state = undo
+
     def getScore(self) -> float:
         """Get the score/evaluation of this state.
         
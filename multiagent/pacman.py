@@ -43,6 +43,7 @@ Student side autograding added by Brad Miller, Nick Hay, and Pieter Abbeel (pabb
 """
 from game import GameStateData
 from game import Game
+from game import GameRecorder, readGameRecord
 from game import Directions
 from game import Actions
 from util import nearestPoint
@@ -54,7 +55,7 @@ import types
 import time
 import random
 import os
-from typing import List, Set, Optional, Tuple, Any, Dict
+from typing import List, Set, Optional, Tuple, Any, Dict, Iterable, Iterator
 
 ###################################################
 # YOUR INTERFACE TO THE PACMAN WORLD: A GameState #
@@ -82,6 +83,10 @@ class GameState:
 
     # Static variable keeps track of which states have had getLegalActions called
     explored: Set['GameState'] = set()
+    # The explored set this state was last recorded in by makeMove
+    _recordedIn: Optional[Set['GameState']] = None
+    # Whether data belongs to another state too, and must be copied before makeMove
+    _sharesData: bool = False
 
     @staticmethod
     def getAndResetExplored() -> Set['GameState']:
@@ -130,29 +135,148 @@ class GameState:
 
         # Copy current state
         state = GameState(self)
+        state._applyMove(agentIndex, action)
+        if self._recordedIn is None:
+            GameState.explored.add(self)
+        else:
+            # This state is walked in place by makeMove, so only a snapshot
+            # of it may be kept
+            self._recordExplored()
+        GameState.explored.add(state)
+        return state
+
+    def makeMove(self, agentIndex: int, action: str) -> tuple:
+        """Apply an action to this state in place instead of building a successor.
+
+        Together with unmakeMove this lets a depth-first search (minimax,
+        alpha-beta, expectimax) walk the game tree on a single GameState:
+
+            undo = state.makeMove(agentIndex, action)
+            value = search(state, ...)
+            state.unmakeMove(undo)
+
+        After makeMove the state is equal to generateSuccessor(agentIndex,
+        action), and GameState.explored records the same states, so expansion
+        counts do not depend on which interface an agent uses. Moves must be
+        undone in reverse order. The state itself is never left in
+        GameState.explored while it changes: the first makeMove replaces it
+        there with a snapshot.
+
+        Args:
+            agentIndex: Index of the agent taking the action
+            action: The action being taken
+
+        Returns:
+            Undo token to pass to unmakeMove
+
+        Raises:
+            Exception: If trying to move from a terminal state
+        """
+        if self.isWin() or self.isLose():
+            raise Exception('Can\'t generate a successor of a terminal state.')
+        if self._sharesData:
+            self._ownData()
+        if self._recordedIn is not GameState.explored:
+            # generateSuccessor or the game may have put this very object in
+            # the set, where changing it would leave a stale hash behind
+            GameState.explored.discard(self)
+            GameState.explored.add(GameState(self))
+            self._recordedIn = GameState.explored
+
+        data = self.data
+        undo = (self._recordedIn, data.agentStates[:], data.food, data.capsules, data._eaten,
+                data.score, data.scoreChange, data._zobrist, data._staleAgentHashes,
+                data._foodEaten, data._foodAdded, data._capsuleEaten, data._agentMoved)
+        # Components of this state may be shared with recorded or copied
+        # states, so the rules must copy anything they change
+        data._ownedAgentStates = 0
+        data._ownsCapsules = False
+        data._foodEaten = None
+        data._foodAdded = None
+        data._capsuleEaten = None
+        data.scoreChange = 0
+
+        self._applyMove(agentIndex, action)
+        self._recordExplored()
+        return undo
+
+    def unmakeMove(self, undo: tuple) -> None:
+        """Restore the state from before the makeMove call that returned undo.
 
+        Args:
+            undo: Token returned by makeMove
+        """
+        data = self.data
+        (self._recordedIn, agentStates, data.food, data.capsules, data._eaten,
+         data.score, data.scoreChange, data._zobrist, data._staleAgentHashes,
+         data._foodEaten, data._foodAdded, data._capsuleEaten, data._agentMoved) = undo
+        data.agentStates[:] = agentStates
+        data._lose = False
+        data._win = False
+
+    def sharedCopy(self) -> 'GameState':
+        """Get a state that shares this state's data until makeMove is called on it.
+
+        Taking the copy is O(1). Its first makeMove gives it data of its own,
+        so moves made on it in place never change this state.
+
+        Returns:
+            A GameState equal to this one
+        """
+        state = GameState.__new__(GameState)
+        state.data = self.data
+        state._sharesData = True
+        return state
+
+    def _ownData(self) -> None:
+        """Replace data shared with another state by a copy-on-write copy of it."""
+        shared = self.data
+        data = self.data = GameStateData(shared)
+        data._foodEaten = shared._foodEaten
+        data._foodAdded = shared._foodAdded
+        data._capsuleEaten = shared._capsuleEaten
+        data._agentMoved = shared._agentMoved
+        data.scoreChange = shared.scoreChange
+        self._sharesData = False
+
+    def _applyMove(self, agentIndex: int, action: str) -> None:
+        """Apply the rules for an action to this state.
+
+        Args:
+            agentIndex: Index of the agent taking the action
+            action: The action being taken
+        """
         # Let agent's logic deal with its action's effects on the board
         if agentIndex == 0:  # Pacman is moving
-            state.data._eaten = [False for i in range(state.getNumAgents())]
-            PacmanRules.applyAction(state, action)
+            self.data._eaten = [False for i in range(self.getNumAgents())]
+            PacmanRules.applyAction(self, action)
         else:                # A ghost is moving
-            GhostRules.applyAction(state, action, agentIndex)
+            GhostRules.applyAction(self, action, agentIndex)
 
         # Time passes
         if agentIndex == 0:
-            state.data.scoreChange += -TIME_PENALTY  # Penalty for waiting around
+            self.data.scoreChange += -TIME_PENALTY  # Penalty for waiting around
         else:
-            GhostRules.decrementTimer(state.data.agentStates[agentIndex])
+            GhostRules.decrementTimer(self.data.getWritableAgentState(agentIndex))
 
         # Resolve multi-agent effects
-        GhostRules.checkDeath(state, agentIndex)
+        GhostRules.checkDeath(self, agentIndex)
 
         # Book keeping
-        state.data._agentMoved = agentIndex
-        state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
-        return state
+        self.data._agentMoved = agentIndex
+        self.data.score += self.data.scoreChange
+
+    def _recordExplored(self) -> None:
+        """Add this state to GameState.explored, storing a snapshot if it is new.
+
+        A state changed by makeMove cannot itself be kept in a set, so a
+        copy-on-write snapshot is stored the first time it is seen. This
+        state must not already be in the set as itself; makeMove removes it
+        before the first change.
+        """
+        if self not in GameState.explored:
+            GameState.explored.add(GameState(self))
+        self._recordedIn = GameState.explored
 
     def getLegalPacmanActions(self) -> List[str]:
         """Get legal actions for Pacman (agent 0).
@@ -390,7 +514,7 @@ class ClassicGameRules:
         quiet: Whether to suppress output messages
     """
 
-    def __init__(self, timeout: int = 30) -> None:
+    def __init__(self, timeout: float = 30) -> None:
         """Initialize game rules with a timeout value.
         
         Args:
@@ -478,7 +602,7 @@ class ClassicGameRules:
         else:
             print("A ghost crashed")
 
-    def getMaxTotalTime(self, agentIndex: int) -> int:
+    def getMaxTotalTime(self, agentIndex: int) -> float:
         """Get maximum total time allowed for an agent.
         
         Args:
@@ -489,7 +613,7 @@ class ClassicGameRules:
         """
         return self.timeout
 
-    def getMaxStartupTime(self, agentIndex: int) -> int:
+    def getMaxStartupTime(self, agentIndex: int) -> float:
         """Get maximum startup time allowed for an agent.
         
         Args:
@@ -500,7 +624,7 @@ class ClassicGameRules:
         """
         return self.timeout
 
-    def getMoveWarningTime(self, agentIndex: int) -> int:
+    def getMoveWarningTime(self, agentIndex: int) -> float:
         """Get warning time threshold for agent moves.
         
         Args:
@@ -511,7 +635,7 @@ class ClassicGameRules:
         """
         return self.timeout
 
-    def getMoveTimeout(self, agentIndex: int) -> int:
+    def getMoveTimeout(self, agentIndex: int) -> float:
         """Get timeout limit for individual agent moves.
         
         Args:
@@ -544,7 +668,7 @@ class PacmanRules:
         """
         Returns a list of possible actions.
         """
-        return Actions.getPossibleActions(state.getPacmanState().configuration, state.data.layout.walls)
+        return state.data.layout.getMoveTable().getPossibleActions(state.getPacmanState().configuration)
     getLegalActions = staticmethod(getLegalActions)
 
     def applyAction(state, action):
@@ -555,7 +679,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[0]
+        pacmanState = state.data.getWritableAgentState(0)
 
         # Update Configuration
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
@@ -575,8 +699,7 @@ class PacmanRules:
         # Eat food
         if state.data.food[x][y]:
             state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
-            state.data.food[x][y] = False
+            state.data.removeFood(x, y)
             state.data._foodEaten = position
             # TODO: cache numFood?
             numFood = state.getNumFood()
@@ -585,11 +708,11 @@ class PacmanRules:
                 state.data._win = True
         # Eat capsule
         if(position in state.getCapsules()):
-            state.data.capsules.remove(position)
+            state.data.removeCapsule(position)
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.getWritableAgentState(index).scaredTimer = SCARED_TIME
     consume = staticmethod(consume)
 
 
@@ -618,8 +741,7 @@ class GhostRules:
             List of legal direction actions the ghost can take
         """
         conf = state.getGhostState(ghostIndex).configuration
-        possibleActions = Actions.getPossibleActions(
-            conf, state.data.layout.walls)
+        possibleActions = state.data.layout.getMoveTable().getPossibleActions(conf)
         reverse = Actions.reverseDirection(conf.direction)
         if Directions.STOP in possibleActions:
             possibleActions.remove(Directions.STOP)
@@ -643,7 +765,7 @@ class GhostRules:
         if action not in legal:
             raise Exception(f"Illegal ghost action {action}")
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.getWritableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0:
             speed /= 2.0
@@ -696,9 +818,11 @@ class GhostRules:
         """
         if ghostState.scaredTimer > 0:
             state.data.scoreChange += 200
+            ghostState = state.data.getWritableAgentState(agentIndex)
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
-            # Added for first-person
+            # Added for first-person; the list may be shared with the parent state
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agentIndex] = True
         else:
             if not state.data._win:
@@ -819,7 +943,7 @@ def readCommand(argv: List[str]) -> Dict[str, Any]:
     parser.add_option('-r', '--recordActions', action='store_true', dest='record',
                       help='Writes game histories to a file (named by the time they were played)', default=False)
     parser.add_option('--replay', dest='gameToReplay',
-                      help='A recorded game file (pickle) to replay', default=None)
+                      help='A recorded game file to replay', default=None)
     parser.add_option('-a', '--agentArgs', dest='agentArgs',
                       help='Comma separated values sent to agent. e.g. "opt1=val1,opt2,opt3=val3"')
     parser.add_option('-x', '--numTraining', dest='numTraining', type='int',
@@ -828,12 +952,16 @@ def readCommand(argv: List[str]) -> Dict[str, Any]:
                       help=default('Time to delay between frames; <0 means keyboard'), default=0.1)
     parser.add_option('-c', '--catchExceptions', action='store_true', dest='catchExceptions',
                       help='Turns on exception handling and timeouts during games', default=False)
-    parser.add_option('--timeout', dest='timeout', type='int',
+    parser.add_option('--timeout', dest='timeout', type='float',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('-j', '--jobs', dest='jobs', type='int',
+                      help=default('Number of worker processes playing games in parallel (requires -q)'), default=1)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
         raise Exception(f'Command line input not understood: {otherjunk}')
+    if options.jobs > 1 and not options.quietGraphics:
+        raise Exception('Parallel games (--jobs) can only be played with quiet graphics (-q)')
     args = dict()
 
     # Fix the random seed
@@ -882,18 +1010,13 @@ def readCommand(argv: List[str]) -> Dict[str, Any]:
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['jobs'] = options.jobs
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
         print(f'Replaying recorded game {options.gameToReplay}.')
-        import pickle
-        f = open(options.gameToReplay)
-        try:
-            recorded = pickle.load(f)
-        finally:
-            f.close()
-        recorded['display'] = args['display']
-        replayGame(**recorded)
+        layoutText, seed, moves = readGameRecord(options.gameToReplay)
+        replayGame(layout.internLayout(layoutText), moves, args['display'])
         sys.exit(0)
 
     return args
@@ -938,12 +1061,13 @@ def loadAgent(pacman: str, nographics: bool) -> Any:
     raise Exception(f'The agent {pacman} is not specified in any *Agents.py.')
 
 
-def replayGame(layout: Any, actions: List[Tuple[int, str]], display: Any) -> None:
+def replayGame(layout: Any, actions: Iterable[Tuple[int, str]], display: Any) -> None:
     """Replay a recorded game.
     
     Args:
         layout: The game layout
-        actions: List of (agent_index, action) pairs representing game moves
+        actions: (agent_index, action) pairs representing game moves, which
+            may be read lazily from a game record
         display: The game display interface
     """
     import pacmanAgents
@@ -966,9 +1090,109 @@ def replayGame(layout: Any, actions: List[Tuple[int, str]], display: Any) -> Non
     display.finish()
 
 
+def runGame(game: Game, layout: Any, record: bool, gameIndex: int, seed: Optional[int]) -> None:
+    """Play a game, writing its record while it is played if asked to.
+    
+    The record is named by the game index and the time the game started.
+    Recording never touches the random sequence, so it does not change the
+    game.
+    
+    Args:
+        game: The game to play
+        layout: The game layout
+        record: Whether to record the game
+        gameIndex: Index of the game in the run, starting from 0
+        seed: Random seed a worker process started the game with, stored in its
+            record, or None for a game played on from the current random sequence
+    """
+    if not record:
+        game.run()
+        return
+    fname = f'recorded-game-{gameIndex + 1}-{"-".join([str(t) for t in time.localtime()[1:6]])}'
+    with GameRecorder(fname, layout.layoutText, seed) as recorder:
+        game.recorder = recorder
+        game.run()
+
+
+# Game set-up for the worker processes of runGamesInParallel
+_workerSetup: Optional[Tuple[Any, Any, List[Any], 'ClassicGameRules', bool, bool]] = None
+
+
+def _initGameWorker(layout: Any, pacman: Any, ghosts: List[Any],
+                    rules: 'ClassicGameRules', catchExceptions: bool, record: bool) -> None:
+    """Store the game set-up in a worker process of runGamesInParallel."""
+    global _workerSetup
+    _workerSetup = (layout, pacman, ghosts, rules, catchExceptions, record)
+
+
+def _playGameInWorker(job: Tuple[int, int]) -> Tuple[int, GameState, List[Tuple[int, str]], bool, bool]:
+    """Play one quiet game in a worker process.
+    
+    Args:
+        job: Tuple of (game index, random seed for the game)
+        
+    Returns:
+        Tuple of (game index, final state, move history, agent timed out, agent crashed)
+    """
+    import textDisplay
+    gameIndex, seed = job
+    layout, pacman, ghosts, rules, catchExceptions, record = _workerSetup
+    random.seed(seed)
+    game = rules.newGame(layout, pacman, ghosts, textDisplay.NullGraphics(), True, catchExceptions)
+    try:
+        runGame(game, layout, record, gameIndex, seed)
+    except SystemExit as e:
+        # A worker that exits is replaced without its task ever finishing, which
+        # would leave the pool waiting forever (util.raiseNotDefined exits)
+        raise Exception(f'Game {gameIndex + 1} exited with status {e.code}')
+    sys.stdout.flush()
+    return gameIndex, game.state, game.moveHistory, game.agentTimeout, game.agentCrashed
+
+
+def runGamesInParallel(layout: Any, pacman: Any, ghosts: List[Any], rules: 'ClassicGameRules',
+                       jobList: List[Tuple[int, int]], catchExceptions: bool, record: bool,
+                       jobs: int) -> Iterator[Tuple[int, Game]]:
+    """Play quiet games in a pool of worker processes.
+    
+    Each worker plays on its own copy of the agents, as they were when the
+    pool started.
+    
+    Args:
+        layout: The game layout
+        pacman: The Pacman agent
+        ghosts: List of ghost agents
+        rules: Rules used to build the games and report their outcome
+        jobList: Tuples of (game index, random seed for the game) to play
+        catchExceptions: Whether to catch agent exceptions
+        record: Whether the workers record the games they play
+        jobs: Number of worker processes
+        
+    Yields:
+        Tuples of (game index, finished game) in the order the games finish
+    """
+    import multiprocessing
+    import textDisplay
+    # Forked workers inherit the agents, so they need not be picklable
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    sys.stdout.flush()
+    with context.Pool(jobs, _initGameWorker, (layout, pacman, ghosts, rules, catchExceptions, record)) as pool:
+        for i, state, moveHistory, agentTimeout, agentCrashed in pool.imap_unordered(_playGameInWorker, jobList):
+            game = rules.newGame(layout, pacman, ghosts, textDisplay.NullGraphics(), False, catchExceptions)
+            game.state = state
+            game.moveHistory = moveHistory
+            game.agentTimeout = agentTimeout
+            game.agentCrashed = agentCrashed
+            game.gameOver = True
+            rules.process(state, game)
+            yield i, game
+
+
 def runGames(layout: Any, pacman: Any, ghosts: List[Any], display: Any, 
             numGames: int, record: bool, numTraining: int = 0, 
-            catchExceptions: bool = False, timeout: int = 30) -> List[Any]:
+            catchExceptions: bool = False, timeout: float = 30, jobs: int = 1) -> List[Any]:
     """Run multiple games of Pacman.
     
     Args:
@@ -981,6 +1205,8 @@ def runGames(layout: Any, pacman: Any, ghosts: List[Any], display: Any,
         numTraining: Number of training games (no output)
         catchExceptions: Whether to catch agent exceptions
         timeout: Maximum time per agent move in seconds
+        jobs: Number of worker processes for the games after training;
+            training games are always played one after another here
         
     Returns:
         List of completed game instances
@@ -991,7 +1217,8 @@ def runGames(layout: Any, pacman: Any, ghosts: List[Any], display: Any,
     rules = ClassicGameRules(timeout)
     games = []
 
-    for i in range(numGames):
+    numSerial = numGames if jobs <= 1 else min(numTraining, numGames)
+    for i in range(numSerial):
         beQuiet = i < numTraining
         if beQuiet:
             # Suppress output and graphics
@@ -1003,18 +1230,21 @@ def runGames(layout: Any, pacman: Any, ghosts: List[Any], display: Any,
             rules.quiet = False
         game = rules.newGame(layout, pacman, ghosts,
                            gameDisplay, beQuiet, catchExceptions)
-        game.run()
+        runGame(game, layout, record, i, None)
         if not beQuiet:
             games.append(game)
 
-        if record:
-            import time
-            import pickle
-            fname = f'recorded-game-{i + 1}-{"-".join([str(t) for t in time.localtime()[1:6]])}'
-            f = file(fname, 'w')
-            components = {'layout': layout, 'actions': game.moveHistory}
-            pickle.dump(components, f)
-            f.close()
+    if numSerial < numGames:
+        # Serial games play on from the random sequence as it stands. Each game
+        # handed to a worker is played from its own seed instead, drawn here
+        # before any of them starts, so a fixed seed (-f) plays the same
+        # parallel games whatever the number of jobs
+        jobList = [(i, random.randrange(2 ** 32)) for i in range(numSerial, numGames)]
+        finished = {}
+        for i, game in runGamesInParallel(layout, pacman, ghosts, rules,
+                                          jobList, catchExceptions, record, jobs):
+            finished[i] = game
+        games.extend(finished[i] for i in sorted(finished))
 
     if (numGames-numTraining) > 0:
         scores = [game.state.getScore() for game in games]
@@ -0,0 +1,105 @@
+"""Tests for the text game records written by GameRecorder.
+
+Run with:
+    python -m unittest test_gameRecord
+
+Original Licensing Information:
+You are free to use or extend these projects for educational purposes provided that
+(1) you do not distribute or publish solutions
+(2) you retain this notice
+(3) you provide clear attribution to UC Berkeley, including a link to http://ai.berkeley.edu
+
+Original Attribution:
+The Pacman AI projects were developed at UC Berkeley.
+Core projects and autograders created by John DeNero (denero@cs.berkeley.edu)
+and Dan Klein (klein@cs.berkeley.edu).
+Student side autograding added by Brad Miller, Nick Hay, and Pieter Abbeel (pabbeel@cs.berkeley.edu).
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+import layout
+import textDisplay
+from game import Directions, GameRecorder, readGameRecord
+from ghostAgents import RandomGhost
+from pacman import ClassicGameRules, runGame
+from pacmanAgents import GreedyAgent
+
+ACTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST, Directions.STOP]
+
+
+class GameRecordTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.fileName = os.path.join(self.directory.name, 'record')
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def testRoundTrip(self) -> None:
+        rng = random.Random(0)
+        layoutText = layout.getLayout('smallClassic').layoutText
+        moves = [(rng.randrange(36), rng.choice(ACTIONS)) for _ in range(500)]
+        for seed in [None, 0, 2 ** 32 - 1]:
+            with self.subTest(seed=seed):
+                with GameRecorder(self.fileName, layoutText, seed) as recorder:
+                    for agentIndex, action in moves:
+                        recorder.recordMove(agentIndex, action)
+                readLayout, readSeed, readMoves = readGameRecord(self.fileName)
+                self.assertEqual(readLayout, layoutText)
+                self.assertEqual(readSeed, seed)
+                self.assertEqual(list(readMoves), moves)
+
+    def testRecordedGameReplays(self) -> None:
+        lay = layout.getLayout('smallClassic')
+        rules = ClassicGameRules()
+        ghosts = [RandomGhost(i + 1) for i in range(lay.getNumGhosts())]
+        random.seed(0)
+        game = rules.newGame(lay, GreedyAgent(), ghosts, textDisplay.NullGraphics(), quiet=True)
+        workingDirectory = os.getcwd()
+        os.chdir(self.directory.name)
+        try:
+            runGame(game, lay, True, 0, None)
+            [fileName] = os.listdir('.')
+            layoutText, seed, moves = readGameRecord(fileName)
+            moves = list(moves)
+        finally:
+            os.chdir(workingDirectory)
+        self.assertEqual(layoutText, lay.layoutText)
+        self.assertIsNone(seed)
+        self.assertEqual(moves, game.moveHistory)
+        state = rules.newGame(layout.internLayout(layoutText), GreedyAgent(), ghosts,
+                              textDisplay.NullGraphics(), quiet=True).state
+        for agentIndex, action in moves:
+            state = state.generateSuccessor(agentIndex, action)
+        self.assertEqual(state.getScore(), game.state.getScore())
+
+    def testCutShortMoveIsSkipped(self) -> None:
+        with GameRecorder(self.fileName, ['%%%', '%P%', '%%%']) as recorder:
+            recorder.recordMove(0, Directions.STOP)
+        with open(self.fileName, 'a') as f:
+            f.write('1')
+        self.assertEqual(list(readGameRecord(self.fileName)[2]), [(0, Directions.STOP)])
+
+    def testRejectsOtherFiles(self) -> None:
+        with GameRecorder(self.fileName, ['%%%', '%P%', '%%%'], 7):
+            pass
+        with open(self.fileName) as f:
+            record = f.read()
+        for broken in [record.replace('pacman-record 1', 'pacman-record 2'),
+                       record.replace('%P%', '%.%'),
+                       record.replace('seed 7', 'seed'),
+                       'not a record\n']:
+            with self.subTest(record=broken):
+                with open(self.fileName, 'w') as f:
+                    f.write(broken)
+                with self.assertRaises(Exception):
+                    readGameRecord(self.fileName)
+
+
+if __name__ == '__main__':
+    unittest.main()
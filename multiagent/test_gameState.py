@@ -0,0 +1,139 @@
+"""Tests for the in-place move interface of GameState.
+
+Run with:
+    python -m unittest test_gameState
+
+Original Licensing Information:
+You are free to use or extend these projects for educational purposes provided that
+(1) you do not distribute or publish solutions
+(2) you retain this notice
+(3) you provide clear attribution to UC Berkeley, including a link to http://ai.berkeley.edu
+
+Original Attribution:
+The Pacman AI projects were developed at UC Berkeley.
+Core projects and autograders created by John DeNero (denero@cs.berkeley.edu)
+and Dan Klein (klein@cs.berkeley.edu).
+Student side autograding added by Brad Miller, Nick Hay, and Pieter Abbeel (pabbeel@cs.berkeley.edu).
+"""
+
+import random
+import unittest
+
+import layout
+import textDisplay
+from game import Agent
+from ghostAgents import RandomGhost
+from pacman import ClassicGameRules, GameState
+
+
+class MinimaxCountingAgent(Agent):
+    """Depth-limited minimax Pacman that records GameState.explored after each move.
+
+    Attributes:
+        depth: Number of plies (moves by every agent) to search
+        inPlace: Whether to search with makeMove/unmakeMove instead of generateSuccessor
+        exploredCounts: Number of states explored for each action chosen
+    """
+
+    def __init__(self, depth: int, inPlace: bool) -> None:
+        super().__init__(0)
+        self.depth = depth
+        self.inPlace = inPlace
+        self.exploredCounts: list[int] = []
+
+    def getAction(self, state: GameState) -> str:
+        GameState.getAndResetExplored()
+        values = []
+        for action in state.getLegalActions(0):
+            values.append((self.child(state, 0, action, self.depth * state.getNumAgents() - 1), action))
+        self.exploredCounts.append(len(GameState.getAndResetExplored()))
+        return max(values)[1]
+
+    def child(self, state: GameState, agentIndex: int, action: str, plies: int) -> float:
+        """Get the minimax value of the state after an agent takes an action."""
+        nextAgent = (agentIndex + 1) % state.getNumAgents()
+        if not self.inPlace:
+            return self.value(state.generateSuccessor(agentIndex, action), nextAgent, plies)
+        undo = state.makeMove(agentIndex, action)
+        try:
+            return self.value(state, nextAgent, plies)
+        finally:
+            state.unmakeMove(undo)
+
+    def value(self, state: GameState, agentIndex: int, plies: int) -> float:
+        """Get the minimax value of a state with agentIndex to move."""
+        if plies == 0 or state.isWin() or state.isLose():
+            return state.getScore()
+        values = [self.child(state, agentIndex, action, plies - 1)
+                  for action in state.getLegalActions(agentIndex)]
+        return max(values) if agentIndex == 0 else min(values)
+
+
+def playGame(layoutName: str, inPlace: bool, numMoves: int = 12, depth: int = 2,
+             seed: int = 0) -> MinimaxCountingAgent:
+    """Play the first moves of a game with a MinimaxCountingAgent against random ghosts.
+
+    Like Game.run, the agent is handed the game's own state and the game moves
+    on with generateSuccessor.
+    """
+    lay = layout.getLayout(layoutName)
+    state = GameState()
+    state.initialize(lay, lay.getNumGhosts())
+    agents = [MinimaxCountingAgent(depth, inPlace)] + [RandomGhost(i + 1) for i in range(lay.getNumGhosts())]
+    random.seed(seed)
+    for move in range(numMoves * len(agents)):
+        if state.isWin() or state.isLose():
+            break
+        agentIndex = move % len(agents)
+        state = state.generateSuccessor(agentIndex, agents[agentIndex].getAction(state))
+    return agents[0]
+
+
+class MakeMoveTest(unittest.TestCase):
+
+    def testExploredCountsMatchGenerateSuccessor(self) -> None:
+        for layoutName in ['trappedClassic', 'openClassic']:
+            with self.subTest(layout=layoutName):
+                generated = playGame(layoutName, inPlace=False)
+                inPlace = playGame(layoutName, inPlace=True)
+                self.assertEqual(generated.exploredCounts, inPlace.exploredCounts)
+
+    def testUnmakeMoveRestoresState(self) -> None:
+        lay = layout.getLayout('smallClassic')
+        state = GameState()
+        state.initialize(lay, lay.getNumGhosts())
+        before = state.deepCopy()
+        for action in state.getLegalActions(0):
+            successor = state.generateSuccessor(0, action)
+            undo = state.makeMove(0, action)
+            self.assertEqual(state, successor)
+            self.assertEqual(hash(state), hash(successor))
+            state.unmakeMove(undo)
+            self.assertEqual(state, before)
+            self.assertEqual(hash(state), hash(before))
+
+    def testObservationMovesLeaveGameStateAlone(self) -> None:
+        lay = layout.getLayout('smallClassic')
+        agent = MinimaxCountingAgent(1, inPlace=True)
+        ghosts = [RandomGhost(i + 1) for i in range(lay.getNumGhosts())]
+        game = ClassicGameRules().newGame(lay, agent, ghosts, textDisplay.NullGraphics(), quiet=True)
+        before = game.state.deepCopy()
+        observation = game._observationFor(agent)
+        self.assertEqual(observation, game.state)
+        # An agent stopped mid-search never undoes its moves
+        observation.makeMove(0, observation.getLegalActions(0)[0])
+        observation.makeMove(1, observation.getLegalActions(1)[0])
+        self.assertEqual(game.state, before)
+        self.assertEqual(hash(game.state), hash(before))
+
+    def testScoresHashApart(self) -> None:
+        lay = layout.getLayout('smallClassic')
+        state = GameState()
+        state.initialize(lay, lay.getNumGhosts())
+        other = GameState(state)
+        state.data.score, other.data.score = -1, -2
+        self.assertNotEqual(hash(state), hash(other))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -30,6 +30,7 @@ import heapq
 import random
 import io
 import signal
+import threading
 import time
 
 T = TypeVar('T')  # Generic type for items in containers
@@ -206,21 +207,32 @@ class Queue(Generic[T]):
         """
         return len(self.list) == 0
 
+# Item of the heap entries that update has superseded
+_REMOVED = object()
+
 class PriorityQueue(Generic[T]):
     """Implements a priority queue data structure.
     
     Each inserted item has a priority associated with it and the client is usually interested
     in quick retrieval of the lowest-priority item in the queue. This data structure allows 
-    O(1) access to the lowest-priority item.
+    O(1) access to the lowest-priority item, and O(log n) push, pop and update.
+
+    The first call to update indexes the heap entries by item, and push and pop maintain the
+    index from then on. Lowering the priority of an item marks its entry as removed and pushes
+    a new entry with the same count; pop discards removed entries when they reach the top.
     
     Attributes:
-        heap: List of (priority, count, item) tuples representing the heap
+        heap: List of [priority, count, item] entries representing the heap
         count: Counter used to break ties between items with equal priority
+        removed: Number of entries in the heap that update has superseded
+        entries: Live entries of each item, or None until update is first called
     """
 
     def __init__(self) -> None:
-        self.heap: List[Tuple[float, int, T]] = []
+        self.heap: List[List[Any]] = []
         self.count: int = 0
+        self.removed: int = 0
+        self.entries: Optional[Dict[T, List[List[Any]]]] = None
 
     def push(self, item: T, priority: float) -> None:
         """Add an item to the queue with given priority.
@@ -229,9 +241,11 @@ class PriorityQueue(Generic[T]):
             item: The item to add
             priority: Priority value (lower values = higher priority)
         """
-        entry = (priority, self.count, item)
+        entry = [priority, self.count, item]
         heapq.heappush(self.heap, entry)
         self.count += 1
+        if self.entries is not None:
+            self._index(entry)
 
     def pop(self) -> T:
         """Remove and return the lowest-priority item.
@@ -239,8 +253,13 @@ class PriorityQueue(Generic[T]):
         Returns:
             The item with lowest priority value
         """
-        (_, _, item) = heapq.heappop(self.heap)
-        return item
+        entry = heapq.heappop(self.heap)
+        while entry[2] is _REMOVED:
+            self.removed -= 1
+            entry = heapq.heappop(self.heap)
+        if self.entries is not None:
+            self._unindex(entry)
+        return entry[2]
 
     def isEmpty(self) -> bool:
         """Check if the priority queue is empty.
@@ -248,29 +267,58 @@ class PriorityQueue(Generic[T]):
         Returns:
             True if the queue contains no items, False otherwise
         """
-        return len(self.heap) == 0
+        return len(self.heap) == self.removed
 
     def update(self, item: T, priority: float) -> None:
         """Update the priority of an item or add it if not present.
         
-        If item already in priority queue with higher priority, update its priority and rebuild the heap.
+        If item already in priority queue with higher priority, update its priority.
         If item already in priority queue with equal or lower priority, do nothing.
         If item not in priority queue, do the same thing as self.push.
+        An item that was pushed more than once is judged by its lowest priority.
         
         Args:
             item: The item to update
             priority: New priority value
         """
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
-                break
-        else:
+        if self.entries is None:
+            self.entries = {}
+            for entry in self.heap:
+                if entry[2] is not _REMOVED:
+                    self._index(entry)
+        try:
+            entries = self.entries.get(item)
+        except TypeError:
+            # Unhashable items are not indexed
+            entries = [entry for entry in self.heap if entry[2] == item]
+        if not entries:
             self.push(item, priority)
+            return
+        entry = min(entries)
+        if entry[0] <= priority:
+            return
+        self._unindex(entry)
+        entry[2] = _REMOVED
+        self.removed += 1
+        newEntry = [priority, entry[1], item]
+        heapq.heappush(self.heap, newEntry)
+        self._index(newEntry)
+
+    def _index(self, entry: List[Any]) -> None:
+        try:
+            self.entries.setdefault(entry[2], []).append(entry)
+        except TypeError:
+            pass
+
+    def _unindex(self, entry: List[Any]) -> None:
+        try:
+            entries = self.entries.get(entry[2])
+        except TypeError:
+            return
+        if entries is not None:
+            entries.remove(entry)
+            if not entries:
+                del self.entries[entry[2]]
 
 class PriorityQueueWithFunction(PriorityQueue[T]):
     """Priority queue where priority is determined by a function.
@@ -709,34 +757,88 @@ class TimeoutFunctionException(Exception):
     """Exception to raise on a timeout."""
     pass
 
-class TimeoutFunction:
-    """Function wrapper that raises an exception on timeout."""
-    
-    def __init__(self, function: Callable, timeout: int) -> None:
-        self.timeout = timeout
-        self.function = function
+class MoveTimer:
+    """Time limits with sub-second precision for many calls, such as the moves of a game.
+
+    start() installs the SIGALRM handler once and each timed call only arms an
+    interval timer (setitimer). Outside the main thread, or where SIGALRM does
+    not exist, a call is instead checked against a monotonic deadline when it
+    returns. A timer that was already running when start() was called (such
+    as an autograder's per-question limit) is suspended and resumed by stop().
+    Can be used as a context manager.
+    """
+
+    def __init__(self) -> None:
+        self.useAlarm = False
+        self._oldHandler: Any = None
+        self._outerDeadline: Optional[float] = None
 
     def handle_timeout(self, signum: int, frame: Any) -> None:
         """Signal handler for timeout."""
         raise TimeoutFunctionException()
 
+    def start(self) -> None:
+        """Install the SIGALRM handler if this thread can receive it."""
+        self.useAlarm = hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+        if self.useAlarm:
+            remaining, _ = signal.setitimer(signal.ITIMER_REAL, 0)
+            self._outerDeadline = time.monotonic() + remaining if remaining > 0 else None
+            self._oldHandler = signal.signal(signal.SIGALRM, self.handle_timeout)
+
+    def stop(self) -> None:
+        """Restore the previous SIGALRM handler and any suspended timer."""
+        if self.useAlarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._oldHandler)
+            if self._outerDeadline is not None:
+                # A suspended timer that ran out in the meantime fires at once
+                signal.setitimer(signal.ITIMER_REAL, max(self._outerDeadline - time.monotonic(), 1e-6))
+            self.useAlarm = False
+
+    def __enter__(self) -> 'MoveTimer':
+        self.start()
+        return self
+
+    def __exit__(self, *excInfo: Any) -> None:
+        self.stop()
+
+    def timed(self, function: Callable, timeout: float) -> Callable:
+        """Wrap function so that a call raises TimeoutFunctionException after timeout seconds.
+
+        A timeout of zero or less has already expired.
+        """
+        def call(*args: Any, **keyArgs: Any) -> Any:
+            if timeout <= 0:
+                raise TimeoutFunctionException()
+            if self.useAlarm:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+                try:
+                    return function(*args, **keyArgs)
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            startTime = time.monotonic()
+            result = function(*args, **keyArgs)
+            if time.monotonic() - startTime >= timeout:
+                raise TimeoutFunctionException()
+            return result
+        return call
+
+
+class TimeoutFunction:
+    """Function wrapper that raises an exception on timeout.
+
+    The timeout may be fractional. Every call sets up its own MoveTimer; use a
+    MoveTimer directly to time many calls.
+    """
+    
+    def __init__(self, function: Callable, timeout: float) -> None:
+        self.timeout = timeout
+        self.function = function
+
     def __call__(self, *args: Any, **keyArgs: Any) -> Any:
         """Call the wrapped function with timeout checking."""
-        if hasattr(signal, 'SIGALRM'):
-            old = signal.signal(signal.SIGALRM, self.handle_timeout)
-            signal.alarm(self.timeout)
-            try:
-                result = self.function(*args, **keyArgs)
-            finally:
-                signal.signal(signal.SIGALRM, old)
-            signal.alarm(0)
-        else:
-            startTime = time.time()
-            result = self.function(*args, **keyArgs)
-            timeElapsed = time.time() - startTime
-            if timeElapsed >= self.timeout:
-                self.handle_timeout(None, None)
-        return result
+        with MoveTimer() as timer:
+            return timer.timed(self.function, self.timeout)(*args, **keyArgs)
 
 _ORIGINAL_STDOUT = None
 _ORIGINAL_STDERR = None
@@ -43,6 +43,7 @@ Changes:
 """
 
 from game import Directions, Actions
+from layout import getWallsMoveTable
 import util
 from typing import Dict, List, Tuple, Any, Optional
 
@@ -108,6 +109,7 @@ def closestFood(pos: Tuple[int, int], food: List[List[bool]], walls: List[List[b
     Returns:
         Distance to closest food, or None if no food found
     """
+    moveTable = getWallsMoveTable(walls)
     fringe = [(pos[0], pos[1], 0)]
     expanded = set()
     while fringe:
@@ -119,7 +121,7 @@ def closestFood(pos: Tuple[int, int], food: List[List[bool]], walls: List[List[b
         if food[pos_x][pos_y]:
             return dist
         # otherwise spread out from the location to its neighbours
-        nbrs = Actions.getLegalNeighbors((pos_x, pos_y), walls)
+        nbrs = moveTable.getLegalNeighbors((pos_x, pos_y))
         for nbr_x, nbr_y in nbrs:
             fringe.append((nbr_x, nbr_y, dist+1))
     # no food found
@@ -150,6 +152,7 @@ class SimpleExtractor(FeatureExtractor):
         # extract the grid of food and wall locations and get the ghost locations
         food = state.getFood()
         walls = state.getWalls()
+        moveTable = state.data.layout.getMoveTable()
         ghosts = state.getGhostPositions()
 
         features = util.Counter()
@@ -162,7 +165,7 @@ class SimpleExtractor(FeatureExtractor):
         next_x, next_y = int(x + dx), int(y + dy)
 
         # count the number of ghosts 1-step away
-        features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in Actions.getLegalNeighbors(g, walls) for g in ghosts)
+        features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in moveTable.getLegalNeighbors(g) for g in ghosts)
 
         # if there is no danger of ghosts then add the food feature
         if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
@@ -43,13 +43,16 @@ Changes:
 """
 
 from util import manhattanDistance
-from game import Grid
+from game import Grid, BitGrid, MoveTable
 import os
 import random
 from functools import reduce
 from typing import List, Tuple, Dict, Set, Optional, Union
 
 VISIBILITY_MATRIX_CACHE: Dict[str, Grid] = {}
+LAYOUT_CACHE: Dict[Tuple[str, ...], 'Layout'] = {}
+# The wall grid getWallsMoveTable was last asked about, and its move table
+_lastWallsMoveTable: Tuple[Optional[Grid], Optional[MoveTable]] = (None, None)
 
 
 class Layout:
@@ -63,30 +66,37 @@ class Layout:
         width (int): Width of the game board in cells
         height (int): Height of the game board in cells
         walls (Grid): Grid marking wall locations
-        food (Grid): Grid marking food pellet locations 
+        food (BitGrid): Bit-packed grid marking food pellet locations 
         capsules (List[Tuple[int, int]]): List of capsule coordinates
         agentPositions (List[Tuple[bool, Tuple[int, int]]]): List of agent positions
         numGhosts (int): Number of ghosts in the layout
         totalFood (int): Total number of food pellets
         visibility (Grid): Visibility information for each cell
+        moveTable (MoveTable): Legal moves per cell, built by getMoveTable
     """
 
     def __init__(self, layoutText: List[str]) -> None:
         self.width = len(layoutText[0])
         self.height = len(layoutText)
         self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        self.food = BitGrid(self.width, self.height, False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
         self.processLayoutText(layoutText)
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
+        self.moveTable: Optional[MoveTable] = None
         # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self) -> int:
         return self.numGhosts
 
+    def getMoveTable(self) -> MoveTable:
+        if self.moveTable is None:
+            self.moveTable = MoveTable(self.walls)
+        return self.moveTable
+
     def initializeVisibilityMatrix(self) -> None:
         global VISIBILITY_MATRIX_CACHE
         if reduce(str.__add__, self.layoutText) not in VISIBILITY_MATRIX_CACHE:
@@ -142,7 +152,12 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self) -> 'Layout':
-        return Layout(self.layoutText[:])
+        """Return this layout.
+
+        Layouts are never modified after they are built, so game states and
+        their copies share one instance instead of re-parsing the layout text.
+        """
+        return self
 
     def processLayoutText(self, layoutText: List[str]) -> None:
         """
@@ -226,6 +241,48 @@ def tryToLoad(fullname: str) -> Optional[Layout]:
         return None
     f = open(fullname)
     try:
-        return Layout([line.strip() for line in f])
+        return internLayout([line.strip() for line in f])
     finally:
         f.close()
+
+
+def internLayout(layoutText: List[str]) -> Layout:
+    """
+    Return the shared Layout for the given text, parsing it only the first time.
+
+    Layouts are immutable, so every game played on the same maze can use a
+    single instance.
+
+    Args:
+        layoutText: List of strings representing the maze layout
+
+    Returns:
+        The interned Layout for this text
+    """
+    key = tuple(layoutText)
+    if key not in LAYOUT_CACHE:
+        LAYOUT_CACHE[key] = Layout(list(layoutText))
+    return LAYOUT_CACHE[key]
+
+
+def getWallsMoveTable(walls: Grid) -> MoveTable:
+    """
+    Return the move table of a wall grid.
+
+    The walls of an interned layout share that layout's table. A table for
+    any other grid is built when needed and kept until another grid is
+    looked up.
+
+    Args:
+        walls: Grid marking wall locations
+
+    Returns:
+        MoveTable of the legal moves between the open cells of walls
+    """
+    global _lastWallsMoveTable
+    lastWalls, moveTable = _lastWallsMoveTable
+    if walls is not lastWalls:
+        moveTable = next((layout.getMoveTable() for layout in LAYOUT_CACHE.values()
+                          if layout.walls is walls), None) or MoveTable(walls)
+        _lastWallsMoveTable = (walls, moveTable)
+    return moveTable
@@ -57,6 +57,7 @@ Changes:
 
 from game import GameStateData
 from game import Game
+from game import GameRecorder, readGameRecord
 from game import Directions
 from game import Actions
 from util import nearestPoint
@@ -367,7 +368,7 @@ class ClassicGameRules:
     and how the game starts and ends.
     """
 
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: float = 30):
         self.timeout = timeout
 
     def newGame(self, layout, pacmanAgent, ghostAgents, display, quiet: bool = False, catchExceptions: bool = False) -> Game:
@@ -412,16 +413,16 @@ class ClassicGameRules:
         else:
             print("A ghost crashed")
 
-    def getMaxTotalTime(self, agentIndex: int) -> int:
+    def getMaxTotalTime(self, agentIndex: int) -> float:
         return self.timeout
 
-    def getMaxStartupTime(self, agentIndex: int) -> int:
+    def getMaxStartupTime(self, agentIndex: int) -> float:
         return self.timeout
 
-    def getMoveWarningTime(self, agentIndex: int) -> int:
+    def getMoveWarningTime(self, agentIndex: int) -> float:
         return self.timeout
 
-    def getMoveTimeout(self, agentIndex: int) -> int:
+    def getMoveTimeout(self, agentIndex: int) -> float:
         return self.timeout
 
     def getMaxTimeWarnings(self, agentIndex: int) -> int:
@@ -446,7 +447,7 @@ class PacmanRules:
         Returns:
             list: Legal actions Pacman can take
         """
-        return Actions.getPossibleActions(state.getPacmanState().configuration, state.data.layout.walls)
+        return state.data.layout.getMoveTable().getPossibleActions(state.getPacmanState().configuration)
 
     @staticmethod
     def applyAction(state: GameState, action):
@@ -521,8 +522,7 @@ class GhostRules:
             list: Legal actions the ghost can take
         """
         conf = state.getGhostState(ghostIndex).configuration
-        possibleActions = Actions.getPossibleActions(
-            conf, state.data.layout.walls)
+        possibleActions = state.data.layout.getMoveTable().getPossibleActions(conf)
         reverse = Actions.reverseDirection(conf.direction)
         if Directions.STOP in possibleActions:
             possibleActions.remove(Directions.STOP)
@@ -673,7 +673,7 @@ def readCommand(argv: list) -> dict:
     parser.add_option('-r', '--recordActions', action='store_true', dest='record',
                       help='Writes game histories to a file (named by the time they were played)', default=False)
     parser.add_option('--replay', dest='gameToReplay',
-                      help='A recorded game file (pickle) to replay', default=None)
+                      help='A recorded game file to replay', default=None)
     parser.add_option('-a', '--agentArgs', dest='agentArgs',
                       help='Comma separated values sent to agent. e.g. "opt1=val1,opt2,opt3=val3"')
     parser.add_option('-x', '--numTraining', dest='numTraining', type='int',
@@ -682,12 +682,16 @@ def readCommand(argv: list) -> dict:
                       help=default('Time to delay between frames; <0 means keyboard'), default=0.1)
     parser.add_option('-c', '--catchExceptions', action='store_true', dest='catchExceptions',
                       help='Turns on exception handling and timeouts during games', default=False)
-    parser.add_option('--timeout', dest='timeout', type='int',
+    parser.add_option('--timeout', dest='timeout', type='float',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('-j', '--jobs', dest='jobs', type='int',
+                      help=default('Number of worker processes playing games in parallel (requires -q)'), default=1)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
         raise Exception(f'Command line input not understood: {otherjunk}')
+    if options.jobs > 1 and not options.quietGraphics:
+        raise Exception('Parallel games (--jobs) can only be played with quiet graphics (-q)')
     args = dict()
 
     # Fix the random seed
@@ -736,18 +740,13 @@ def readCommand(argv: list) -> dict:
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['jobs'] = options.jobs
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
         print(f'Replaying recorded game {options.gameToReplay}.')
-        import pickle
-        f = open(options.gameToReplay)
-        try:
-            recorded = pickle.load(f)
-        finally:
-            f.close()
-        recorded['display'] = args['display']
-        replayGame(**recorded)
+        layoutText, seed, moves = readGameRecord(options.gameToReplay)
+        replayGame(layout.internLayout(layoutText), moves, args['display'])
         sys.exit(0)
 
     return args
@@ -780,7 +779,7 @@ def loadAgent(pacman: str, nographics: bool):
     raise Exception(f'The agent {pacman} is not specified in any *Agents.py.')
 
 
-def replayGame(layout, actions: list, display):
+def replayGame(layout, actions, display):
     import pacmanAgents
     import ghostAgents
     rules = ClassicGameRules()
@@ -801,14 +800,94 @@ def replayGame(layout, actions: list, display):
     display.finish()
 
 
-def runGames(layout, pacman, ghosts: list, display, numGames: int, record: bool, numTraining: int = 0, catchExceptions: bool = False, timeout: int = 30) -> list:
+def runGame(game, layout, record: bool, gameIndex: int, seed: int | None):
+    """Play a game, writing its record while it is played if record is set.
+
+    The record is named by the game index and the time the game started, and
+    holds the seed a worker process started the game with (None for a game
+    played on from the current random sequence). Recording never touches the
+    random sequence, so it does not change the game.
+    """
+    if not record:
+        game.run()
+        return
+    fname = f'recorded-game-{gameIndex + 1}-' + \
+        '-'.join([str(t) for t in time.localtime()[1:6]])
+    with GameRecorder(fname, layout.layoutText, seed) as recorder:
+        game.recorder = recorder
+        game.run()
+
+
+# Game set-up for the worker processes of runGamesInParallel
+_workerSetup = None
+
+
+def _initGameWorker(layout, pacman, ghosts: list, rules, catchExceptions: bool, record: bool):
+    global _workerSetup
+    _workerSetup = (layout, pacman, ghosts, rules, catchExceptions, record)
+
+
+def _playGameInWorker(job: tuple) -> tuple:
+    """Play one quiet game in a worker process.
+
+    Returns (game index, final state, move history, agent timed out, agent crashed).
+    """
+    import textDisplay
+    gameIndex, seed = job
+    layout, pacman, ghosts, rules, catchExceptions, record = _workerSetup
+    random.seed(seed)
+    game = rules.newGame(layout, pacman, ghosts,
+                         textDisplay.NullGraphics(), True, catchExceptions)
+    try:
+        runGame(game, layout, record, gameIndex, seed)
+    except SystemExit as e:
+        # A worker that exits is replaced without its task ever finishing, which
+        # would leave the pool waiting forever (util.raiseNotDefined exits)
+        raise Exception(f'Game {gameIndex + 1} exited with status {e.code}')
+    sys.stdout.flush()
+    return gameIndex, game.state, game.moveHistory, game.agentTimeout, game.agentCrashed
+
+
+def runGamesInParallel(layout, pacman, ghosts: list, rules, jobList: list, catchExceptions: bool, record: bool, jobs: int):
+    """Play quiet games in a pool of worker processes.
+
+    jobList holds a (game index, random seed) tuple for each game to play.
+    Yields (game index, finished game) in the order the games finish.
+    Each worker plays on its own copy of the agents, as they were after
+    training, so agents keep learning only in the serial training games.
+    The workers record their games if record is set.
+    """
+    import multiprocessing
+    import textDisplay
+    # Forked workers inherit the agents, so they need not be picklable
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    sys.stdout.flush()
+    with context.Pool(jobs, _initGameWorker, (layout, pacman, ghosts, rules, catchExceptions, record)) as pool:
+        for i, state, moveHistory, agentTimeout, agentCrashed in pool.imap_unordered(_playGameInWorker, jobList):
+            game = rules.newGame(layout, pacman, ghosts,
+                                 textDisplay.NullGraphics(), False, catchExceptions)
+            game.state = state
+            game.moveHistory = moveHistory
+            game.agentTimeout = agentTimeout
+            game.agentCrashed = agentCrashed
+            game.gameOver = True
+            rules.process(state, game)
+            yield i, game
+
+
+def runGames(layout, pacman, ghosts: list, display, numGames: int, record: bool, numTraining: int = 0, catchExceptions: bool = False, timeout: float = 30, jobs: int = 1) -> list:
     import __main__
     __main__.__dict__['_display'] = display
 
     rules = ClassicGameRules(timeout)
     games = []
 
-    for i in range(numGames):
+    # Training games change the agents, so only the games after them are spread over jobs
+    numSerial = numGames if jobs <= 1 else min(numTraining, numGames)
+    for i in range(numSerial):
         beQuiet = i < numTraining
         if beQuiet:
                 # Suppress output and graphics
@@ -820,19 +899,21 @@ def runGames(layout, pacman, ghosts: list, display, numGames: int, record: bool,
             rules.quiet = False
         game = rules.newGame(layout, pacman, ghosts,
                              gameDisplay, beQuiet, catchExceptions)
-        game.run()
+        runGame(game, layout, record, i, None)
         if not beQuiet:
             games.append(game)
 
-        if record:
-            import time
-            import pickle
-            fname = f'recorded-game-{i + 1}-' + \
-                '-'.join([str(t) for t in time.localtime()[1:6]])
-            f = file(fname, 'w')
-            components = {'layout': layout, 'actions': game.moveHistory}
-            pickle.dump(components, f)
-            f.close()
+    if numSerial < numGames:
+        # Serial games play on from the random sequence as it stands. Each game
+        # handed to a worker is played from its own seed instead, drawn here
+        # before any of them starts, so a fixed seed (-f) plays the same
+        # parallel games whatever the number of jobs
+        jobList = [(i, random.randrange(2 ** 32)) for i in range(numSerial, numGames)]
+        finished = {}
+        for i, game in runGamesInParallel(layout, pacman, ghosts, rules,
+                                          jobList, catchExceptions, record, jobs):
+            finished[i] = game
+        games.extend(finished[i] for i in sorted(finished))
 
     if (numGames-numTraining) > 0:
         scores = [game.state.getScore() for game in games]
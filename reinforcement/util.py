@@ -202,44 +202,89 @@ class Queue:
         return len(self.list) == 0
 
 
+# Item of the heap entries that update has superseded
+_REMOVED = object()
+
+
 class PriorityQueue:
     """
     Implements a priority queue data structure. Each inserted item
     has a priority associated with it and the client is usually interested
     in quick retrieval of the lowest-priority item in the queue. This
-    data structure allows O(1) access to the lowest-priority item.
+    data structure allows O(1) access to the lowest-priority item, and
+    O(log n) push, pop and update: update finds items through an index
+    that it builds on first use, and pop skips the entries it superseded.
     """
 
     def __init__(self):
-        self.heap = []
+        self.heap = []  # [priority, count, item] entries
         self.count = 0
+        self.removed = 0  # entries superseded by update
+        self.entries = None  # item -> its live entries, built by the first update
 
     def push(self, item, priority):
-        entry = (priority, self.count, item)
+        entry = [priority, self.count, item]
         heapq.heappush(self.heap, entry)
         self.count += 1
+        if self.entries is not None:
+            self._index(entry)
 
     def pop(self):
-        (_, _, item) = heapq.heappop(self.heap)
-        return item
+        entry = heapq.heappop(self.heap)
+        while entry[2] is _REMOVED:
+            self.removed -= 1
+            entry = heapq.heappop(self.heap)
+        if self.entries is not None:
+            self._unindex(entry)
+        return entry[2]
 
     def isEmpty(self):
-        return len(self.heap) == 0
+        return len(self.heap) == self.removed
 
     def update(self, item, priority):
-        # If item already in priority queue with higher priority, update its priority and rebuild the heap.
+        # If item already in priority queue with higher priority, update its priority.
         # If item already in priority queue with equal or lower priority, do nothing.
         # If item not in priority queue, do the same thing as self.push.
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
-                break
-        else:
+        # An item pushed more than once is judged by its lowest priority.
+        if self.entries is None:
+            self.entries = {}
+            for entry in self.heap:
+                if entry[2] is not _REMOVED:
+                    self._index(entry)
+        try:
+            entries = self.entries.get(item)
+        except TypeError:
+            # unhashable items are not indexed
+            entries = [entry for entry in self.heap if entry[2] == item]
+        if not entries:
             self.push(item, priority)
+            return
+        entry = min(entries)
+        if entry[0] <= priority:
+            return
+        # Supersede the entry, keeping its count so ties pop in push order
+        self._unindex(entry)
+        entry[2] = _REMOVED
+        self.removed += 1
+        newEntry = [priority, entry[1], item]
+        heapq.heappush(self.heap, newEntry)
+        self._index(newEntry)
+
+    def _index(self, entry):
+        try:
+            self.entries.setdefault(entry[2], []).append(entry)
+        except TypeError:
+            pass
+
+    def _unindex(self, entry):
+        try:
+            entries = self.entries.get(entry[2])
+        except TypeError:
+            return
+        if entries is not None:
+            entries.remove(entry)
+            if not entries:
+                del self.entries[entry[2]]
 
 
 class PriorityQueueWithFunction(PriorityQueue):
@@ -668,13 +713,12 @@ def pause():
 
 # code to handle timeouts
 #
-# FIXME
-# NOTE: TimeoutFuncton is NOT reentrant.  Later timeouts will silently
-# disable earlier timeouts.  Could be solved by maintaining a global list
-# of active time outs.  Currently, questions which have test cases calling
-# this have all student code so wrapped.
+# A MoveTimer arms a single interval timer per timed call and suspends any
+# timer that was running when it started, resuming it when it stops, so
+# timeouts nest (e.g. an autograder question limit around a game's moves).
 #
 import signal
+import threading
 import time
 
 
@@ -683,33 +727,74 @@ class TimeoutFunctionException(Exception):
     pass
 
 
+class MoveTimer:
+    """
+    Sub-second time limits for many calls, such as the moves of a game.
+    start() installs the SIGALRM handler once; each timed call then only
+    arms setitimer.  Outside the main thread, or without SIGALRM, calls are
+    checked against a monotonic clock when they return.
+    """
+
+    def __init__(self):
+        self.useAlarm = False
+        self._oldHandler = None
+        self._outerDeadline = None
+
+    def handle_timeout(self, signum, frame):
+        raise TimeoutFunctionException()
+
+    def start(self):
+        self.useAlarm = hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+        if self.useAlarm:
+            remaining, _ = signal.setitimer(signal.ITIMER_REAL, 0)
+            self._outerDeadline = time.monotonic() + remaining if remaining > 0 else None
+            self._oldHandler = signal.signal(signal.SIGALRM, self.handle_timeout)
+
+    def stop(self):
+        if self.useAlarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._oldHandler)
+            if self._outerDeadline is not None:
+                # A suspended timer that ran out in the meantime fires at once
+                signal.setitimer(signal.ITIMER_REAL, max(self._outerDeadline - time.monotonic(), 1e-6))
+            self.useAlarm = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *excInfo):
+        self.stop()
+
+    def timed(self, function, timeout):
+        # A timeout of zero or less has already expired
+        def call(*args, **keyArgs):
+            if timeout <= 0:
+                raise TimeoutFunctionException()
+            if self.useAlarm:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+                try:
+                    return function(*args, **keyArgs)
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            startTime = time.monotonic()
+            result = function(*args, **keyArgs)
+            if time.monotonic() - startTime >= timeout:
+                raise TimeoutFunctionException()
+            return result
+        return call
+
+
 class TimeoutFunction:
     def __init__(self, function, timeout):
         self.timeout = timeout
         self.function = function
 
-    def handle_timeout(self, signum, frame):
-        raise TimeoutFunctionException()
-
     def __call__(self, *args, **keyArgs):
-        # If we have SIGALRM signal, use it to cause an exception if and
-        # when this function runs too long.  Otherwise check the time taken
-        # after the method has returned, and throw an exception then.
-        if hasattr(signal, 'SIGALRM'):
-            old = signal.signal(signal.SIGALRM, self.handle_timeout)
-            signal.alarm(self.timeout)
-            try:
-                result = self.function(*args, **keyArgs)
-            finally:
-                signal.signal(signal.SIGALRM, old)
-            signal.alarm(0)
-        else:
-            startTime = time.time()
-            result = self.function(*args, **keyArgs)
-            timeElapsed = time.time() - startTime
-            if timeElapsed >= self.timeout:
-                self.handle_timeout(None, None)
-        return result
+        # Every call sets up its own MoveTimer; use a MoveTimer directly to
+        # time many calls
+        with MoveTimer() as timer:
+            return timer.timed(self.function, self.timeout)(*args, **keyArgs)
 
 
 _ORIGINAL_STDOUT = None
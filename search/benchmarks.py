@@ -0,0 +1,1396 @@
+"""Micro-benchmarks for the data structures behind the search project.
+
+Each benchmark prints one line per configuration so that alternative
+implementations of the same structure can be compared side by side.
+
+The suite benchmark instead runs every search algorithm on every search
+layout, and can write its results to a file (-o) and flag regressions
+against the results of an earlier run (-b).
+
+Usage:
+    python benchmarks.py                                   # run every benchmark
+    python benchmarks.py grid                              # run only the named benchmark(s)
+    python benchmarks.py suite -l bigMaze,openMaze -a bfs,astar,bds
+    python benchmarks.py suite -o new.json -b old.json     # flag regressions against old.json
+
+Licensing Information:  You are free to use or extend these projects for
+educational purposes provided that (1) you do not distribute or publish
+solutions, (2) you retain this notice, and (3) you provide clear
+attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+
+Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+The core projects and autograders were primarily created by John DeNero
+(denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+Student side autograding was added by Brad Miller, Nick Hay, and
+Pieter Abbeel (pabbeel@cs.berkeley.edu).
+"""
+
+import contextlib
+import heapq
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import deque
+from optparse import OptionParser
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import eightpuzzle
+import game
+import layout
+import pacman
+import search
+import searchAgents
+import util
+from game import Actions, Directions, Grid, BitGrid, DistanceTable, DotDistanceField
+from searchAgents import (ClosestDotSearchAgent, CompactFoodSearchProblem, CorridorPositionSearchProblem,
+                          FoodSearchProblem, PositionSearchProblem, foodGridKey, manhattanHeuristic, mazeDistance,
+                          mazeDistances)
+
+
+def openGameState(size: int) -> pacman.GameState:
+    """Build the initial GameState for a square room without inner walls.
+
+    Args:
+        size: Width and height of the room, including its outer walls
+
+    Returns:
+        Initial GameState with Pacman in the bottom left corner
+    """
+    wall = '%' * size
+    room = '%' + ' ' * (size - 2) + '%'
+    start = '%P' + ' ' * (size - 3) + '%'
+    state = pacman.GameState()
+    state.initialize(layout.Layout([wall] + [room] * (size - 3) + [start, wall]), 0)
+    return state
+
+
+def loadGameState(layoutName: str) -> pacman.GameState:
+    """Build the initial GameState for a layout, without ghosts.
+
+    Args:
+        layoutName: Name of a layout in the layouts directory
+
+    Returns:
+        Initial GameState for the layout
+    """
+    lay = layout.getLayout(layoutName)
+    if lay is None:
+        raise Exception(f'The layout {layoutName} cannot be found')
+    state = pacman.GameState()
+    state.initialize(lay, 0)
+    return state
+
+
+def expandBreadthFirst(problem: Any, maxNodes: int) -> int:
+    """Expand up to maxNodes states of a problem breadth first.
+
+    This is a fixed workload (successor generation plus closed-set hashing),
+    not a solver; it stops early if the whole state space is exhausted.
+
+    Args:
+        problem: SearchProblem to expand
+        maxNodes: Maximum number of states to expand
+
+    Returns:
+        Number of states expanded
+    """
+    start = problem.getStartState()
+    closed = {start}
+    frontier = deque([start])
+    expanded = 0
+    while frontier and expanded < maxNodes:
+        state = frontier.popleft()
+        expanded += 1
+        for successor, _, _ in problem.getSuccessors(state):
+            if successor not in closed:
+                closed.add(successor)
+                frontier.append(successor)
+    return expanded
+
+
+def benchmarkGrid(layouts: Tuple[str, ...] = ('trickySearch', 'bigSearch'),
+                  maxNodes: int = 20000) -> None:
+    """Compare FoodSearchProblem node throughput with Grid and BitGrid food.
+
+    Args:
+        layouts: Layout names to run on
+        maxNodes: Number of states to expand per configuration
+    """
+    print('grid: FoodSearchProblem expansions per second')
+    for name in layouts:
+        state = loadGameState(name)
+        bitFood = state.getFood()
+        listFood = Grid(bitFood.width, bitFood.height)
+        for x, y in bitFood.asList():
+            listFood[x][y] = True
+        for label, food in [('Grid', listFood), ('BitGrid', BitGrid.fromGrid(listFood))]:
+            problem = FoodSearchProblem(state)
+            problem.start = (problem.start[0], food)
+            startTime = time.perf_counter()
+            expanded = expandBreadthFirst(problem, maxNodes)
+            elapsed = time.perf_counter() - startTime
+            print(f'  {name:<14} {label:<8} {expanded:>7} nodes '
+                  f'{elapsed:7.2f}s {expanded / elapsed:10.0f} nodes/s')
+
+
+class WallPositionSearchProblem(PositionSearchProblem):
+    """PositionSearchProblem that derives successors from the wall grid on every call."""
+
+    def getSuccessors(self, state: Tuple[int, int]) -> List[Tuple[Tuple[int, int], str, float]]:
+        successors = []
+        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+            x, y = state
+            dx, dy = Actions.directionToVector(action)
+            nextx, nexty = int(x + dx), int(y + dy)
+            if not self.walls[nextx][nexty]:
+                nextState = (nextx, nexty)
+                successors.append((nextState, action, self.costFn(nextState)))
+        self._expanded += 1
+        return successors
+
+
+def benchmarkMoves(layouts: Tuple[str, ...] = ('bigMaze', 'openSearch'),
+                   repeats: int = 50) -> None:
+    """Compare PositionSearchProblem successor generation from walls and from the move table.
+
+    Args:
+        layouts: Layout names to run on
+        repeats: Number of times the whole maze is expanded per configuration
+    """
+    print('moves: PositionSearchProblem expansions per second')
+    for name in layouts:
+        state = loadGameState(name)
+        walls = state.getWalls()
+        for label, problemClass in [('walls', WallPositionSearchProblem), ('table', PositionSearchProblem)]:
+            problem = problemClass(state, warn=False, visualize=False)
+            startTime = time.perf_counter()
+            expanded = sum(expandBreadthFirst(problem, walls.width * walls.height) for _ in range(repeats))
+            elapsed = time.perf_counter() - startTime
+            print(f'  {name:<14} {label:<8} {expanded:>7} nodes '
+                  f'{elapsed:7.2f}s {expanded / elapsed:10.0f} nodes/s')
+
+
+class ScanningPriorityQueue(util.PriorityQueue):
+    """PriorityQueue whose update scans the heap for the item and re-heapifies it."""
+
+    def push(self, item: Any, priority: float) -> None:
+        heapq.heappush(self._heap, (priority, self.count, item))
+        self.count += 1
+
+    def pop(self) -> Any:
+        return heapq.heappop(self._heap)[2]
+
+    def isEmpty(self) -> bool:
+        return len(self._heap) == 0
+
+    def update(self, item: Any, priority: float) -> None:
+        for index, (p, c, i) in enumerate(self._heap):
+            if i == item:
+                if p <= priority:
+                    break
+                del self._heap[index]
+                self._heap.append((priority, c, item))
+                heapq.heapify(self._heap)
+                break
+        else:
+            self.push(item, priority)
+
+
+def uniformCostExpand(problem: Any, frontier: util.PriorityQueue,
+                      moveCosts: Dict[Tuple[Tuple[int, int], str], int]) -> Tuple[int, int]:
+    """Expand every reachable state of a position problem in uniform cost order.
+
+    Every unexpanded successor is offered to frontier.update, which is the
+    operation this benchmark exercises.
+
+    Args:
+        problem: PositionSearchProblem to expand
+        frontier: Empty priority queue to use as the frontier
+        moveCosts: Cost of each (position, action) move
+
+    Returns:
+        Tuple of (states expanded, update calls)
+    """
+    start = problem.getStartState()
+    costs = {start: 0}
+    closed = set()
+    frontier.push(start, 0)
+    updates = 0
+    while not frontier.isEmpty():
+        state = frontier.pop()
+        if state in closed:
+            continue
+        closed.add(state)
+        for successor, action, _ in problem.getSuccessors(state):
+            if successor not in closed:
+                cost = costs[state] + moveCosts[state, action]
+                if cost < costs.get(successor, float('inf')):
+                    costs[successor] = cost
+                frontier.update(successor, cost)
+                updates += 1
+    return len(closed), updates
+
+
+def benchmarkFrontier(sizes: Tuple[int, ...] = (50, 100, 200), seed: int = 0) -> None:
+    """Compare uniform cost search with a scanning and an indexed PriorityQueue.update.
+
+    Every move in an open room gets a random cost, so that frontier costs
+    keep improving and update has to lower priorities.
+
+    Args:
+        sizes: Room sizes to run on
+        seed: Random seed for the move costs
+    """
+    print('frontier: uniform cost expansions per second')
+    actions = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+    for size in sizes:
+        state = openGameState(size)
+        rng = random.Random(seed)
+        moveCosts = {((x, y), action): rng.randint(1, 9)
+                     for x in range(size) for y in range(size) for action in actions}
+        for label, queueClass in [('scan', ScanningPriorityQueue), ('indexed', util.PriorityQueue)]:
+            problem = PositionSearchProblem(state, goal=(size - 2, size - 2), warn=False, visualize=False)
+            startTime = time.perf_counter()
+            expanded, updates = uniformCostExpand(problem, queueClass(), moveCosts)
+            elapsed = time.perf_counter() - startTime
+            print(f'  {size:>3}x{size:<10} {label:<8} {expanded:>7} nodes {updates:>7} updates '
+                  f'{elapsed:7.2f}s {expanded / elapsed:10.0f} nodes/s')
+
+
+class HeapPriorityQueue(util.PriorityQueue):
+    """PriorityQueue that keeps every entry in the binary heap, even for integral priorities."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.buckets = None
+
+
+def expandUniformCost(problem: Any, frontier: util.PriorityQueue, maxNodes: int) -> int:
+    """Expand up to maxNodes states of a problem in uniform cost order.
+
+    States are pushed once per path that reaches them and skipped when popped
+    again, so the frontier only sees push and pop.
+
+    Args:
+        problem: SearchProblem to expand
+        frontier: Empty priority queue to use as the frontier
+        maxNodes: Maximum number of states to expand
+
+    Returns:
+        Number of states expanded
+    """
+    closed = set()
+    frontier.push((problem.getStartState(), 0), 0)
+    while not frontier.isEmpty() and len(closed) < maxNodes:
+        state, cost = frontier.pop()
+        if state in closed:
+            continue
+        closed.add(state)
+        for successor, _, stepCost in problem.getSuccessors(state):
+            if successor not in closed:
+                frontier.push((successor, cost + stepCost), cost + stepCost)
+    return len(closed)
+
+
+def benchmarkBuckets(layouts: Tuple[str, ...] = ('bigMaze', 'openMaze', 'bigSearch'),
+                     maxNodes: int = 20000, repeats: int = 100) -> None:
+    """Compare uniform cost search with PriorityQueue in heap and in bucket mode.
+
+    The position problems are expanded repeats times over, the food problem
+    up to maxNodes states once.
+
+    Args:
+        layouts: Layout names to run on
+        maxNodes: Number of food states to expand
+        repeats: Number of times each maze is expanded
+    """
+    print('buckets: uniform cost expansions per second')
+    for name in layouts:
+        state = loadGameState(name)
+        for label, queueClass in [('heap', HeapPriorityQueue), ('buckets', util.PriorityQueue)]:
+            if state.getNumFood() > 1:
+                problem = FoodSearchProblem(state)
+                runs = 1
+            else:
+                problem = PositionSearchProblem(state, warn=False, visualize=False)
+                runs = repeats
+            startTime = time.perf_counter()
+            expanded = sum(expandUniformCost(problem, queueClass(), maxNodes) for _ in range(runs))
+            elapsed = time.perf_counter() - startTime
+            print(f'  {name:<14} {label:<8} {expanded:>7} nodes '
+                  f'{elapsed:7.2f}s {expanded / elapsed:10.0f} nodes/s')
+
+
+def breadthFirstDistance(state: pacman.GameState, point1: Tuple[int, int], point2: Tuple[int, int]) -> int:
+    """Find the maze distance between two points with a breadth first search.
+
+    This is how mazeDistance worked before it used the layout's DistanceTable.
+
+    Args:
+        state: GameState of the maze
+        point1: (x,y) start of the path
+        point2: (x,y) end of the path
+
+    Returns:
+        Length of the shortest path, or -1 if there is none
+    """
+    problem = PositionSearchProblem(state, start=point1, goal=point2, warn=False, visualize=False)
+    distances = {point1: 0}
+    frontier = deque([point1])
+    while frontier:
+        position = frontier.popleft()
+        if problem.isGoalState(position):
+            return distances[position]
+        for successor, _, _ in problem.getSuccessors(position):
+            if successor not in distances:
+                distances[successor] = distances[position] + 1
+                frontier.append(successor)
+    return -1
+
+
+def benchmarkDistance(layouts: Tuple[str, ...] = ('mediumCorners', 'bigMaze', 'openMaze'),
+                      numPairs: int = 200, seed: int = 0) -> None:
+    """Compare mazeDistance calls answered by breadth first search and by the distance table.
+
+    The table is also timed being computed and being read from a cache file.
+
+    Args:
+        layouts: Layout names to run on
+        numPairs: Number of random pairs of open cells to measure per layout
+        seed: Random seed for the pairs
+    """
+    print('distance: mazeDistance calls per second')
+    cacheDir = game.DISTANCE_CACHE_DIR
+    for name in layouts:
+        state = loadGameState(name)
+        walls = state.getWalls()
+        cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+        rng = random.Random(seed)
+        pairs = [(rng.choice(cells), rng.choice(cells)) for _ in range(numPairs)]
+
+        startTime = time.perf_counter()
+        for point1, point2 in pairs:
+            breadthFirstDistance(state, point1, point2)
+        elapsed = time.perf_counter() - startTime
+        print(f'  {name:<14} {"bfs":<8} {numPairs:>7} calls {elapsed:7.3f}s {numPairs / elapsed:10.0f} calls/s')
+
+        game.DISTANCE_CACHE_DIR = None
+        try:
+            startTime = time.perf_counter()
+            DistanceTable(walls, state.data.layout.getMoveTable())
+            elapsed = time.perf_counter() - startTime
+        finally:
+            game.DISTANCE_CACHE_DIR = cacheDir
+        print(f'  {name:<14} {"build":<8} {len(cells):>7} cells {elapsed:7.3f}s')
+        if cacheDir is not None:
+            DistanceTable.forWalls(walls, state.data.layout.getMoveTable())
+            startTime = time.perf_counter()
+            DistanceTable.forWalls(walls, state.data.layout.getMoveTable())
+            elapsed = time.perf_counter() - startTime
+            print(f'  {name:<14} {"load":<8} {len(cells):>7} cells {elapsed:7.3f}s')
+
+        calls = numPairs * 100
+        state.data.layout.getDistanceTable()
+        startTime = time.perf_counter()
+        for _ in range(100):
+            for point1, point2 in pairs:
+                mazeDistance(point1, point2, state)
+        elapsed = time.perf_counter() - startTime
+        print(f'  {name:<14} {"table":<8} {calls:>7} calls {elapsed:7.3f}s {calls / elapsed:10.0f} calls/s')
+
+
+def closedSetBreadthFirst(problem: Any, maxNodes: int) -> set:
+    """Return the closed set of a breadth first expansion of up to maxNodes states.
+
+    Args:
+        problem: SearchProblem to expand
+        maxNodes: Maximum number of states to expand
+
+    Returns:
+        Set of the states reached
+    """
+    start = problem.getStartState()
+    closed = {start}
+    frontier = deque([start])
+    while frontier and len(closed) < maxNodes:
+        for successor, _, _ in problem.getSuccessors(frontier.popleft()):
+            if successor not in closed:
+                closed.add(successor)
+                frontier.append(successor)
+    return closed
+
+
+def benchmarkStates(layouts: Tuple[str, ...] = ('trickySearch', 'bigSearch'),
+                    maxNodes: int = 50000) -> None:
+    """Compare (position, Grid) food states with CompactFoodSearchProblem's ints.
+
+    For each encoding this reports breadth first expansion speed, the memory
+    held by the closed set, and the time to hash every closed state into a
+    new set.
+
+    Args:
+        layouts: Layout names to run on
+        maxNodes: Number of states to reach per configuration
+    """
+    print('states: FoodSearchProblem state encodings')
+    for name in layouts:
+        state = loadGameState(name)
+        for label, problemClass in [('grid', FoodSearchProblem), ('compact', CompactFoodSearchProblem)]:
+            problem = problemClass(state)
+            startTime = time.perf_counter()
+            expanded = expandBreadthFirst(problem, maxNodes)
+            elapsed = time.perf_counter() - startTime
+            tracemalloc.start()
+            closed = closedSetBreadthFirst(problem, maxNodes)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            states = list(closed)
+            startTime = time.perf_counter()
+            set(states)
+            hashTime = time.perf_counter() - startTime
+            print(f'  {name:<14} {label:<8} {expanded:>7} nodes {expanded / elapsed:10.0f} nodes/s '
+                  f'{memory / len(closed):7.0f} bytes/state {1e9 * hashTime / len(closed):6.0f} ns/hash')
+            del closed, states
+
+
+def bestFirstSearch(problem: Any, heuristic: Optional[Callable[[Any, Any], float]] = None) -> List[Any]:
+    """Find a cheapest path with uniform cost search, or A* given a heuristic.
+
+    Args:
+        problem: SearchProblem to solve
+        heuristic: Optional heuristic taking (state, problem)
+
+    Returns:
+        Actions of the successors along the path found
+    """
+    start = problem.getStartState()
+    frontier = util.PriorityQueue()
+    frontier.push((start, [], 0), 0)
+    closed = set()
+    while not frontier.isEmpty():
+        state, path, cost = frontier.pop()
+        if state in closed:
+            continue
+        if problem.isGoalState(state):
+            return path
+        closed.add(state)
+        for successor, action, stepCost in problem.getSuccessors(state):
+            if successor not in closed:
+                nextCost = cost + stepCost
+                estimate = heuristic(successor, problem) if heuristic is not None else 0
+                frontier.push((successor, path + [action], nextCost), nextCost + estimate)
+    return []
+
+
+def benchmarkCorridors(layouts: Tuple[str, ...] = ('bigMaze', 'contoursMaze', 'openMaze'),
+                       repeats: int = 20) -> None:
+    """Compare searches over every cell with searches over the contracted corridor graph.
+
+    Args:
+        layouts: Layout names to run on
+        repeats: Number of times each search is run
+    """
+    print('corridors: uniform cost and A* (manhattan) searches')
+    for name in layouts:
+        state = loadGameState(name)
+        goal = state.getFood().asList()[0]
+        for searchName, heuristic in [('ucs', None), ('astar', manhattanHeuristic)]:
+            for label, problemClass in [('cells', PositionSearchProblem),
+                                        ('corridor', CorridorPositionSearchProblem)]:
+                startTime = time.perf_counter()
+                for _ in range(repeats):
+                    problem = problemClass(state, goal=goal, warn=False, visualize=False)
+                    path = bestFirstSearch(problem, heuristic)
+                elapsed = time.perf_counter() - startTime
+                if hasattr(problem, 'expandActions'):
+                    path = problem.expandActions(path)
+                print(f'  {name:<14} {searchName:<6} {label:<9} cost {problem.getCostOfActions(path):>4} '
+                      f'{problem._expanded:>6} expanded {1e3 * elapsed / repeats:8.2f} ms/search')
+
+
+def benchmarkBidirectional(layouts: Tuple[str, ...] = ('bigMaze', 'openMaze', 'bigCorners'),
+                           numQueries: int = 50, seed: int = 0) -> None:
+    """Compare uniform cost search with bidirectional search on point-to-point queries.
+
+    Each layout answers numQueries queries between random open cells; the
+    eight puzzle solves numQueries random puzzles.
+
+    Args:
+        layouts: Layout names to run on
+        numQueries: Number of queries per layout
+        seed: Random seed for the queries
+    """
+    print('bidirectional: expansions and time per query')
+    searches = [('ucs', bestFirstSearch), ('bidir', search.bidirectionalSearch)]
+    rng = random.Random(seed)
+    for name in layouts:
+        state = loadGameState(name)
+        walls = state.getWalls()
+        cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+        queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(numQueries)]
+        for label, searchFunction in searches:
+            expanded = cost = 0
+            startTime = time.perf_counter()
+            for start, goal in queries:
+                problem = PositionSearchProblem(state, goal=goal, start=start, warn=False, visualize=False)
+                cost += problem.getCostOfActions(searchFunction(problem))
+                expanded += problem._expanded
+            elapsed = time.perf_counter() - startTime
+            print(f'  {name:<14} {label:<8} cost {cost:>6} {expanded / numQueries:8.0f} expanded '
+                  f'{1e3 * elapsed / numQueries:8.2f} ms/query')
+    puzzles = [eightpuzzle.createRandomEightPuzzle(25) for _ in range(numQueries)]
+    for label, searchFunction in searches:
+        expanded = cost = 0
+        startTime = time.perf_counter()
+        for puzzle in puzzles:
+            problem = eightpuzzle.EightPuzzleSearchProblem(puzzle)
+            getSuccessors, getPredecessors = problem.getSuccessors, problem.getPredecessors
+
+            def countingSuccessors(state: Any) -> List[Tuple[Any, str, float]]:
+                nonlocal expanded
+                expanded += 1
+                return getSuccessors(state)
+
+            def countingPredecessors(state: Any) -> List[Tuple[Any, str, float]]:
+                nonlocal expanded
+                expanded += 1
+                return getPredecessors(state)
+
+            problem.getSuccessors, problem.getPredecessors = countingSuccessors, countingPredecessors
+            cost += problem.getCostOfActions(searchFunction(problem))
+        elapsed = time.perf_counter() - startTime
+        print(f'  {"eightPuzzle":<14} {label:<8} cost {cost:>6} {expanded / numQueries:8.0f} expanded '
+              f'{1e3 * elapsed / numQueries:8.2f} ms/query')
+
+
+def benchmarkJumpPoints(layouts: Tuple[str, ...] = ('openSearch', 'bigSafeSearch', 'openMaze'),
+                        numQueries: int = 50, seed: int = 0) -> None:
+    """Compare A* with manhattanHeuristic and Jump Point Search on point-to-point queries.
+
+    Args:
+        layouts: Layout names to run on
+        numQueries: Number of queries between random open cells per layout
+        seed: Random seed for the queries
+    """
+    print('jps: expansions and time per query')
+    rng = random.Random(seed)
+    searches = [('astar', lambda problem: bestFirstSearch(problem, manhattanHeuristic)),
+                ('jps', search.jumpPointSearch)]
+    for name in layouts:
+        state = loadGameState(name)
+        walls = state.getWalls()
+        cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+        queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(numQueries)]
+        for label, searchFunction in searches:
+            expanded = cost = 0
+            startTime = time.perf_counter()
+            for start, goal in queries:
+                problem = PositionSearchProblem(state, goal=goal, start=start, warn=False, visualize=False)
+                cost += problem.getCostOfActions(searchFunction(problem))
+                expanded += problem._expanded
+            elapsed = time.perf_counter() - startTime
+            print(f'  {name:<14} {label:<8} cost {cost:>6} {expanded / numQueries:8.0f} expanded '
+                  f'{1e3 * elapsed / numQueries:8.2f} ms/query')
+
+
+def eightPuzzleManhattan(state: eightpuzzle.EightPuzzleState, problem: Any = None) -> int:
+    """Sum of the manhattan distances of the puzzle's tiles from their goal cells."""
+    size = state.size
+    distance = 0
+    for row, numbers in enumerate(state.cells):
+        for col, tile in enumerate(numbers):
+            if tile:
+                distance += abs(row - tile // size) + abs(col - tile % size)
+    return distance
+
+
+def benchmarkMemoryBounded(layouts: Tuple[str, ...] = ('mediumMaze', 'openMaze'),
+                           numQueries: int = 10, maxNodes: int = 1000, seed: int = 0) -> None:
+    """Compare peak memory and expansions of A*, IDA* and memory-bounded A*.
+
+    Each layout answers numQueries queries between random open cells with the
+    manhattan heuristic; the eight puzzle solves numQueries puzzles scrambled
+    by 60 random moves with the tile manhattan heuristic. IDA* is only run on
+    the eight puzzle, as it has to try every path through a maze. Peak memory
+    is measured with tracemalloc, and "held" is the peak number of nodes the
+    iterative deepening searches report holding.
+
+    Args:
+        layouts: Layout names to run on
+        numQueries: Number of queries per layout
+        maxNodes: Number of states memoryBoundedAStarSearch may remember
+        seed: Random seed for the queries
+    """
+    print('memory: peak memory and expansions per query')
+    searches = [('astar', bestFirstSearch), ('idastar', search.idaStarSearch),
+                (f'mba{maxNodes}', lambda problem, heuristic:
+                    search.memoryBoundedAStarSearch(problem, heuristic, maxNodes))]
+    rng = random.Random(seed)
+    queries: List[Tuple[str, Callable[[], Any], Callable[[Any, Any], float]]] = []
+    for name in layouts:
+        state = loadGameState(name)
+        walls = state.getWalls()
+        cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+        points = [(rng.choice(cells), rng.choice(cells)) for _ in range(numQueries)]
+        queries.append((name, lambda state=state, points=points: [
+            PositionSearchProblem(state, goal=goal, start=start, warn=False, visualize=False)
+            for start, goal in points], manhattanHeuristic))
+    random.seed(seed)
+    puzzles = [eightpuzzle.createRandomEightPuzzle(60) for _ in range(numQueries)]
+    queries.append(('eightPuzzle', lambda: [eightpuzzle.EightPuzzleSearchProblem(puzzle) for puzzle in puzzles],
+                    eightPuzzleManhattan))
+    for name, makeProblems, heuristic in queries:
+        for label, searchFunction in searches:
+            if label == 'idastar' and name != 'eightPuzzle':
+                continue
+            cost = expanded = held = peakMemory = 0
+            startTime = time.perf_counter()
+            for problem in makeProblems():
+                getSuccessors = problem.getSuccessors
+
+                def countingSuccessors(state: Any) -> List[Tuple[Any, str, float]]:
+                    nonlocal expanded
+                    expanded += 1
+                    return getSuccessors(state)
+
+                problem.getSuccessors = countingSuccessors
+                tracemalloc.start()
+                actions = searchFunction(problem, heuristic)
+                peakMemory = max(peakMemory, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+                cost += problem.getCostOfActions(actions)
+                held = max(held, getattr(problem, '_peakNodes', 0))
+            elapsed = time.perf_counter() - startTime
+            print(f'  {name:<14} {label:<8} cost {cost:>6} {expanded / numQueries:9.0f} expanded '
+                  f'{held or "-":>6} held {peakMemory / 1024:8.0f} KiB peak '
+                  f'{1e3 * elapsed / numQueries:8.2f} ms/query')
+
+
+def benchmarkAnytime(layouts: Tuple[str, ...] = ('bigMaze', 'openMaze'), numQueries: int = 20,
+                     timeLimits: Tuple[float, ...] = (0.0, 0.001, 0.01), seed: int = 0) -> None:
+    """Compare A* with anytime repairing A* under a few time limits.
+
+    Each layout answers numQueries queries between random open cells with the
+    manhattan heuristic; the eight puzzle solves numQueries puzzles scrambled
+    by 80 random moves with the tile manhattan heuristic. "bound" is the mean
+    of the suboptimality bounds anytimeRepairingAStarSearch reports.
+
+    Args:
+        layouts: Layout names to run on
+        numQueries: Number of queries per layout
+        timeLimits: Time limits in seconds to give anytimeRepairingAStarSearch
+        seed: Random seed for the queries
+    """
+    print('anytime: path cost and time per query')
+    searches: List[Tuple[str, Callable[[Any, Callable], List[str]]]] = [('astar', bestFirstSearch)]
+    for timeLimit in timeLimits:
+        searches.append((f'ara{1e3 * timeLimit:g}ms', lambda problem, heuristic, timeLimit=timeLimit:
+                         search.anytimeRepairingAStarSearch(problem, heuristic, timeLimit)))
+    rng = random.Random(seed)
+    queries: List[Tuple[str, Callable[[], Any], Callable[[Any, Any], float]]] = []
+    for name in layouts:
+        state = loadGameState(name)
+        walls = state.getWalls()
+        cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+        points = [(rng.choice(cells), rng.choice(cells)) for _ in range(numQueries)]
+        queries.append((name, lambda state=state, points=points: [
+            PositionSearchProblem(state, goal=goal, start=start, warn=False, visualize=False)
+            for start, goal in points], manhattanHeuristic))
+    random.seed(seed)
+    puzzles = [eightpuzzle.createRandomEightPuzzle(80) for _ in range(numQueries)]
+    queries.append(('eightPuzzle', lambda: [eightpuzzle.EightPuzzleSearchProblem(puzzle) for puzzle in puzzles],
+                    eightPuzzleManhattan))
+    for name, makeProblems, heuristic in queries:
+        for label, searchFunction in searches:
+            cost = bound = 0
+            startTime = time.perf_counter()
+            for problem in makeProblems():
+                cost += problem.getCostOfActions(searchFunction(problem, heuristic))
+                bound += getattr(problem, '_suboptimality', 1)
+            elapsed = time.perf_counter() - startTime
+            print(f'  {name:<14} {label:<10} cost {cost:>6} bound {bound / numQueries:5.2f} '
+                  f'{1e3 * elapsed / numQueries:8.2f} ms/query')
+
+
+class ListPuzzleState:
+    """Eight puzzle state stored as a list of rows, as EightPuzzleState was before boards were packed into ints."""
+
+    def __init__(self, cells: List[List[int]]) -> None:
+        self.cells = cells
+        for row, numbers in enumerate(cells):
+            if 0 in numbers:
+                self.blankLocation = row, numbers.index(0)
+
+    def legalMoves(self) -> List[str]:
+        row, col = self.blankLocation
+        moves = []
+        if row != 0:
+            moves.append('up')
+        if row != len(self.cells) - 1:
+            moves.append('down')
+        if col != 0:
+            moves.append('left')
+        if col != len(self.cells) - 1:
+            moves.append('right')
+        return moves
+
+    def result(self, move: str) -> 'ListPuzzleState':
+        row, col = self.blankLocation
+        newRow, newCol = {'up': (row - 1, col), 'down': (row + 1, col),
+                          'left': (row, col - 1), 'right': (row, col + 1)}[move]
+        cells = [numbers[:] for numbers in self.cells]
+        cells[row][col], cells[newRow][newCol] = cells[newRow][newCol], 0
+        return ListPuzzleState(cells)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ListPuzzleState) and self.cells == other.cells
+
+    def __hash__(self) -> int:
+        return hash(str(self.cells))
+
+
+def expandPuzzle(start: Any, maxNodes: int) -> int:
+    """Expand puzzle states breadth first with legalMoves and result, and return how many were expanded."""
+    visited = {start}
+    frontier = deque([start])
+    expanded = 0
+    while frontier and expanded < maxNodes:
+        state = frontier.popleft()
+        expanded += 1
+        for move in state.legalMoves():
+            successor = state.result(move)
+            if successor not in visited:
+                visited.add(successor)
+                frontier.append(successor)
+    return expanded
+
+
+def benchmarkPuzzle(numPuzzles: int = 10, maxNodes: int = 50000, seed: int = 0) -> None:
+    """Compare puzzle board representations, and A* with the puzzle heuristics.
+
+    The "states" lines expand maxNodes eight puzzle states breadth first with
+    list based and packed int boards. The other lines solve numPuzzles eight
+    puzzles scrambled by 100 random moves and numPuzzles fifteen puzzles
+    scrambled by 100, with the null, manhattan and pattern database
+    heuristics; the null heuristic is not tried on the fifteen puzzle.
+    Building the pattern databases (or loading them from the cache) is timed
+    separately, as "build".
+
+    Args:
+        numPuzzles: Number of puzzles of each size
+        maxNodes: Number of states to expand for the representation comparison
+        seed: Random seed for the puzzles
+    """
+    print('puzzle: puzzle search throughput and time per puzzle')
+    start = eightpuzzle.loadEightPuzzle(1)
+    for label, state in [('lists', ListPuzzleState(start.cells)), ('ints', start)]:
+        startTime = time.perf_counter()
+        expanded = expandPuzzle(state, maxNodes)
+        elapsed = time.perf_counter() - startTime
+        print(f'  {"states":<8} {label:<10} {expanded:>8} expanded {elapsed:7.2f}s '
+              f'{expanded / elapsed:10.0f} states/s')
+    for size, moves in [(3, 100), (4, 100)]:
+        startTime = time.perf_counter()
+        eightpuzzle.PatternDatabase.forSize(size)
+        print(f'  {size * size - 1:<8} {"build":<10} {time.perf_counter() - startTime:7.2f}s')
+        random.seed(seed)
+        puzzles = [eightpuzzle.createRandomEightPuzzle(moves, size) for _ in range(numPuzzles)]
+        heuristics = [('manhattan', eightPuzzleManhattan), ('patterns', eightpuzzle.patternDatabaseHeuristic)]
+        if size == 3:
+            heuristics.insert(0, ('null', search.nullHeuristic))
+        for label, heuristic in heuristics:
+            cost = expanded = 0
+            startTime = time.perf_counter()
+            for puzzle in puzzles:
+                problem = eightpuzzle.EightPuzzleSearchProblem(puzzle)
+                getSuccessors = problem.getSuccessors
+
+                def countingSuccessors(state: Any) -> List[Tuple[Any, str, float]]:
+                    nonlocal expanded
+                    expanded += 1
+                    return getSuccessors(state)
+
+                problem.getSuccessors = countingSuccessors
+                cost += problem.getCostOfActions(bestFirstSearch(problem, heuristic))
+            elapsed = time.perf_counter() - startTime
+            print(f'  {size * size - 1:<8} {label:<10} cost {cost:>6} {expanded / numPuzzles:9.0f} expanded '
+                  f'{1e3 * elapsed / numPuzzles:9.2f} ms/puzzle')
+
+
+def farthestFoodHeuristic(state: Tuple[Tuple[int, int], Any], problem: FoodSearchProblem) -> int:
+    """Maze distance from Pacman to the farthest remaining food."""
+    return max(mazeDistances(state[0], state[1].asList(), problem.startingGameState), default=0)
+
+
+def benchmarkDistributed(layouts: Tuple[str, ...] = ('trickySearch',), numPuzzles: int = 5,
+                         workerCounts: Tuple[int, ...] = (1, 2, 4), seed: int = 0) -> None:
+    """Compare serial A* with hash distributed A* over a few worker counts.
+
+    Each layout's FoodSearchProblem is solved with farthestFoodHeuristic, and
+    numPuzzles fifteen puzzles scrambled by 60 random moves with the tile
+    manhattan heuristic. The total path cost must match across searches.
+
+    Args:
+        layouts: Layout names to run on
+        numPuzzles: Number of fifteen puzzles
+        workerCounts: Numbers of worker processes to give hashDistributedAStarSearch
+        seed: Random seed for the puzzles
+    """
+    print(f'distributed: path cost and time per problem ({os.cpu_count()} CPUs)')
+    searches: List[Tuple[str, Callable[[Any, Callable], List[str]]]] = [('astar', bestFirstSearch)]
+    for workers in workerCounts:
+        searches.append((f'hda{workers}', lambda problem, heuristic, workers=workers:
+                         search.hashDistributedAStarSearch(problem, heuristic, workers)))
+    queries: List[Tuple[str, Callable[[], List[Any]], Callable[[Any, Any], float]]] = []
+    for name in layouts:
+        state = loadGameState(name)
+        queries.append((name, lambda state=state: [FoodSearchProblem(state)], farthestFoodHeuristic))
+    random.seed(seed)
+    puzzles = [eightpuzzle.createRandomEightPuzzle(60, 4) for _ in range(numPuzzles)]
+    queries.append(('fifteenPuzzle', lambda: [eightpuzzle.EightPuzzleSearchProblem(puzzle) for puzzle in puzzles],
+                    eightPuzzleManhattan))
+    for name, makeProblems, heuristic in queries:
+        for label, searchFunction in searches:
+            cost = count = 0
+            startTime = time.perf_counter()
+            for problem in makeProblems():
+                cost += problem.getCostOfActions(searchFunction(problem, heuristic))
+                count += 1
+            elapsed = time.perf_counter() - startTime
+            print(f'  {name:<14} {label:<10} cost {cost:>6} {1e3 * elapsed / count:9.2f} ms/problem')
+
+
+def foodTreeCost(food: Grid, problem: FoodSearchProblem) -> int:
+    """Weight of a minimum spanning tree of the food cells under maze distance, by Prim's algorithm."""
+    foods = food.asList()
+    if not foods:
+        return 0
+    gameState = problem.startingGameState
+    distances = dict(zip(foods, mazeDistances(foods[0], foods, gameState)))
+    del distances[foods[0]]
+    total = 0
+    while distances:
+        nearest = min(distances, key=distances.get)
+        total += distances.pop(nearest)
+        for other, distance in zip(list(distances), mazeDistances(nearest, list(distances), gameState)):
+            if distance < distances[other]:
+                distances[other] = distance
+    return total
+
+
+def foodTreeHeuristic(treeCost: Callable[[Grid, FoodSearchProblem], int]) -> Callable[[Any, FoodSearchProblem], int]:
+    """Make a heuristic: the maze distance to the nearest food plus treeCost of the food."""
+    def heuristic(state: Tuple[Tuple[int, int], Grid], problem: FoodSearchProblem) -> int:
+        position, food = state
+        foods = food.asList()
+        if not foods:
+            return 0
+        return min(mazeDistances(position, foods, problem.startingGameState)) + treeCost(food, problem)
+    return heuristic
+
+
+def benchmarkHeuristicCache(layouts: Tuple[str, ...] = ('trickySearch', 'oddSearch'),
+                            smallSize: int = 200) -> None:
+    """Compare A* on food search with and without caching heuristic values.
+
+    The heuristic adds the maze distance to the nearest food to the weight
+    of a minimum spanning tree of the food. "state" caches the whole
+    heuristic per state; "food" caches only the tree, per food grid, so that
+    states differing only in Pacman's position share it; "food<N>" does so
+    in a cache of only smallSize values.
+
+    Args:
+        layouts: Layout names to run on
+        smallSize: Number of values the smallest cache keeps
+    """
+    print('heuristicCache: A* time and cache use on food search')
+    for name in layouts:
+        state = loadGameState(name)
+        variants = [
+            ('none', None, foodTreeHeuristic(foodTreeCost)),
+            ('state', None, util.HeuristicCache(foodTreeHeuristic(foodTreeCost))),
+        ]
+        for label, maxSize in [('food', 100000), (f'food{smallSize}', smallSize)]:
+            cache = util.HeuristicCache(foodTreeCost, maxSize, foodGridKey)
+            variants.append((label, cache, foodTreeHeuristic(cache)))
+        for label, cache, heuristic in variants:
+            cache = cache or (heuristic if isinstance(heuristic, util.HeuristicCache) else None)
+            problem = FoodSearchProblem(state)
+            startTime = time.perf_counter()
+            cost = problem.getCostOfActions(bestFirstSearch(problem, heuristic))
+            elapsed = time.perf_counter() - startTime
+            print(f'  {name:<14} {label:<10} cost {cost:>4} {problem._expanded:>7} expanded {elapsed:7.2f}s'
+                  + (f'  {cache}' if cache is not None else ''))
+
+
+class BreadthFirstClosestDotAgent(ClosestDotSearchAgent):
+    """ClosestDotSearchAgent with a breadth first search from scratch for every dot, as students write it."""
+
+    def findPathToClosestDot(self, gameState: pacman.GameState) -> List[str]:
+        food = gameState.getFood()
+        moveTable = gameState.data.layout.getMoveTable()
+        start = gameState.getPacmanPosition()
+        parents = {start: None}
+        frontier = deque([start])
+        while frontier:
+            position = frontier.popleft()
+            if food[position[0]][position[1]]:
+                path = []
+                while position != start:
+                    position, action = parents[position]
+                    path.append(action)
+                return path[::-1]
+            for action, successor in moveTable.getSuccessors(position):
+                if successor not in parents:
+                    parents[successor] = (position, action)
+                    frontier.append(successor)
+        return []
+
+
+def dottedGameState(layoutName: str) -> pacman.GameState:
+    """Build the initial GameState for a layout with food in every open cell.
+
+    Args:
+        layoutName: Name of a layout in the layouts directory
+
+    Returns:
+        Initial GameState for the dotted layout, without ghosts
+    """
+    lay = layout.getLayout(layoutName)
+    state = pacman.GameState()
+    state.initialize(layout.Layout([row.replace(' ', '.') for row in lay.layoutText]), 0)
+    return state
+
+
+def sprinkledGameState(size: int, numFood: int, seed: int = 0) -> pacman.GameState:
+    """Build the initial GameState for a square room with food in random cells.
+
+    Args:
+        size: Width and height of the room, including its outer walls
+        numFood: Number of food dots
+        seed: Random seed for the food cells
+
+    Returns:
+        Initial GameState with Pacman in the bottom left corner
+    """
+    rows = [['%'] * size] + [['%'] + [' '] * (size - 2) + ['%'] for _ in range(size - 2)] + [['%'] * size]
+    rows[size - 2][1] = 'P'
+    cells = [(row, col) for row in range(1, size - 1) for col in range(1, size - 1) if rows[row][col] == ' ']
+    for row, col in random.Random(seed).sample(cells, numFood):
+        rows[row][col] = '.'
+    state = pacman.GameState()
+    state.initialize(layout.Layout([''.join(row) for row in rows]), 0)
+    return state
+
+
+class TimedDotDistanceField(DotDistanceField):
+    """DotDistanceField that adds the time spent repairing and reading it to elapsed."""
+    elapsed = 0.0
+
+    def update(self, food: Grid) -> None:
+        startTime = time.perf_counter()
+        super().update(food)
+        TimedDotDistanceField.elapsed += time.perf_counter() - startTime
+
+    def getPathToClosestDot(self, position: Tuple[int, int]) -> List[str]:
+        startTime = time.perf_counter()
+        path = super().getPathToClosestDot(position)
+        TimedDotDistanceField.elapsed += time.perf_counter() - startTime
+        return path
+
+
+def benchmarkClosestDot(layouts: Tuple[str, ...] = ('bigSearch', 'mediumMaze', 'bigMaze'),
+                        rooms: Tuple[Tuple[int, int], ...] = ((60, 200), (100, 50)), repeats: int = 3) -> None:
+    """Compare closest dot planning by search from scratch with the incremental distance field.
+
+    Plans a whole game with ClosestDotSearchAgent.registerInitialState, once
+    with a breadth first search from scratch for every dot and once with
+    incremental=True, which keeps a DotDistanceField up to date instead, and
+    reports the total time and the time spent finding paths, best of repeats.
+    Maze layouts are filled with food in every open cell, and each (size,
+    food) room has its food in random cells.
+
+    Args:
+        layouts: Layout names to run on
+        rooms: Sizes and food counts of open rooms to run on
+        repeats: Number of times to plan each game
+    """
+    print('closestDot: whole board planning time and time spent finding paths')
+    states = [(name, loadGameState(name) if name.endswith('Search') else dottedGameState(name)) for name in layouts]
+    states += [(f'room{size}', sprinkledGameState(size, numFood)) for size, numFood in rooms]
+    for name, state in states:
+        for label in ['bfs', 'field']:
+            elapsed = searchElapsed = float('inf')
+            for _ in range(repeats):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    agent = BreadthFirstClosestDotAgent() if label == 'bfs' else ClosestDotSearchAgent(incremental=True)
+                findPath, searchTime = agent.findPathToClosestDot, 0.0
+
+                def timedFindPath(gameState: pacman.GameState) -> List[str]:
+                    nonlocal searchTime
+                    startTime = time.perf_counter()
+                    path = findPath(gameState)
+                    searchTime += time.perf_counter() - startTime
+                    return path
+
+                agent.findPathToClosestDot = timedFindPath
+                TimedDotDistanceField.elapsed = 0.0
+                searchAgents.DotDistanceField = TimedDotDistanceField
+                startTime = time.perf_counter()
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        agent.registerInitialState(state)
+                finally:
+                    searchAgents.DotDistanceField = DotDistanceField
+                elapsed = min(elapsed, time.perf_counter() - startTime)
+                searchElapsed = min(searchElapsed, searchTime + TimedDotDistanceField.elapsed)
+            print(f'  {name:<14} {label:<6} {state.getNumFood():>5} dots cost {len(agent.actions):>5} '
+                  f'{1e3 * elapsed:8.1f} ms total {1e3 * searchElapsed:8.1f} ms finding paths '
+                  f'{1e6 * searchElapsed / state.getNumFood():7.1f} us/dot')
+
+
+RESULTS_VERSION = 1
+
+# The problem type for the layouts whose names end in each suffix, and the
+# heuristics A* is run with on it
+PROBLEM_TYPES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ('Maze', 'PositionSearchProblem', ('manhattanHeuristic', 'euclideanHeuristic')),
+    ('Corners', 'CornersProblem', ('cornersHeuristic',)),
+    ('Search', 'FoodSearchProblem', ('foodHeuristic',)),
+]
+DEFAULT_ALGORITHMS = ('dfs', 'bfs', 'ucs', 'astar')
+
+
+class BudgetExceeded(Exception):
+    """Raised when a search expands more states than it is allowed to."""
+
+
+def searchLayouts() -> List[str]:
+    """List the layouts in the layouts directory that one of the PROBLEM_TYPES fits, by name."""
+    names = sorted(name[:-4] for name in os.listdir('layouts') if name.endswith('.lay'))
+    return [name for name in names if problemType(name) is not None]
+
+
+def problemType(layoutName: str) -> Optional[Tuple[str, Tuple[str, ...]]]:
+    """Get the problem type name and A* heuristic names for a layout, or None if none fits."""
+    for suffix, problemName, heuristics in PROBLEM_TYPES:
+        if layoutName.endswith(suffix):
+            return problemName, heuristics
+    return None
+
+
+def makeProblem(problemName: str, state: pacman.GameState) -> Any:
+    """Build a search problem of the named type for a game state, without any display."""
+    problemClass = getattr(searchAgents, problemName)
+    if problemClass is searchAgents.PositionSearchProblem:
+        return problemClass(state, warn=False, visualize=False)
+    return problemClass(state)
+
+
+def runOnce(searchFunction: Callable[[Any], List[str]], problemName: str, state: pacman.GameState,
+            maxExpansions: int) -> Tuple[str, float, int, Optional[float]]:
+    """Run a search once, counting expansions.
+
+    Expansions are the problem's own count (problem._expanded) where it keeps
+    one, which also covers searches that expand states without getSuccessors,
+    such as bidirectional and jump point search, else the getSuccessors
+    calls. Anything the search prints is discarded.
+
+    Args:
+        searchFunction: Search taking only the problem
+        problemName: Name of the problem type in searchAgents
+        state: Initial game state of the layout
+        maxExpansions: Number of expansions after which the search is stopped
+
+    Returns:
+        Tuple of (status, seconds, expansions, path cost or None), where status is
+        'ok', 'budget' if the search was stopped, 'not implemented', or the name
+        of the exception the search raised
+    """
+    problem = makeProblem(problemName, state)
+    getSuccessors = problem.getSuccessors
+    expanded = 0
+
+    def countingSuccessors(searchState: Any) -> List[Tuple[Any, str, float]]:
+        nonlocal expanded
+        if max(expanded, getattr(problem, '_expanded', 0)) >= maxExpansions:
+            raise BudgetExceeded()
+        expanded += 1
+        return getSuccessors(searchState)
+
+    problem.getSuccessors = countingSuccessors
+    status, cost = 'ok', None
+    startTime = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            actions = searchFunction(problem)
+            if hasattr(problem, 'expandActions'):
+                actions = problem.expandActions(actions)
+            seconds = time.perf_counter() - startTime
+            cost = problem.getCostOfActions(actions)
+    except BudgetExceeded:
+        status = 'budget'
+    except SystemExit:
+        status = 'not implemented'  # util.raiseNotDefined exits
+    except Exception as e:
+        status = type(e).__name__
+    if status != 'ok':
+        seconds = time.perf_counter() - startTime
+    return status, seconds, getattr(problem, '_expanded', expanded), cost
+
+
+def runCase(searchFunction: Callable[[Any], List[str]], problemName: str, state: pacman.GameState,
+            repeats: int, maxExpansions: int) -> Dict[str, Any]:
+    """Time a search repeats times, then run it once more under tracemalloc for its peak memory.
+
+    A search that does not finish the first time is not repeated.
+
+    Returns:
+        Dict with the status, the median and least seconds, expansions,
+        path cost and peak bytes allocated
+    """
+    times = []
+    for _ in range(repeats):
+        status, seconds, expanded, cost = runOnce(searchFunction, problemName, state, maxExpansions)
+        times.append(seconds)
+        if status != 'ok':
+            break
+    peakBytes = None
+    if status == 'ok':
+        tracemalloc.start()
+        try:
+            runOnce(searchFunction, problemName, state, maxExpansions)
+            peakBytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'status': status, 'seconds': statistics.median(times), 'minSeconds': min(times),
+            'expanded': expanded, 'cost': cost, 'peakBytes': peakBytes}
+
+
+def searchFunctionFor(algorithm: str, heuristic: Optional[str]) -> Callable[[Any], List[str]]:
+    """Get a search function of the problem alone, like SearchAgent builds from fn and heuristic."""
+    if algorithm not in dir(search):
+        raise SystemExit(f'{algorithm} is not a search function in search.py')
+    function = getattr(search, algorithm)
+    if heuristic is None:
+        return function
+    heuristicFunction = getattr(searchAgents, heuristic, None) or getattr(search, heuristic)
+    return lambda problem: function(problem, heuristic=heuristicFunction)
+
+
+def caseKey(case: Dict[str, Any]) -> str:
+    """Get the key that identifies a case across results files."""
+    return f'{case["problem"]}/{case["layout"]}/{case["algorithm"]}/{case["heuristic"] or "-"}'
+
+
+def runSuite(layouts: List[str], algorithms: List[str], repeats: int, maxExpansions: int) -> List[Dict[str, Any]]:
+    """Run every algorithm on every layout, printing one line per case as it finishes.
+
+    Algorithms that take a heuristic are run once per heuristic of the
+    layout's problem type.
+
+    Returns:
+        One result dict per case
+    """
+    cases = []
+    for layoutName in layouts:
+        fitting = problemType(layoutName)
+        if fitting is None:
+            raise SystemExit(f'No problem type fits the layout {layoutName}')
+        problemName, heuristics = fitting
+        lay = layout.getLayout(layoutName)
+        if lay is None:
+            raise SystemExit(f'The layout {layoutName} cannot be found')
+        state = pacman.GameState()
+        state.initialize(lay, 0)
+        for algorithm in algorithms:
+            function = getattr(search, algorithm, None)
+            takesHeuristic = function is not None and 'heuristic' in function.__code__.co_varnames
+            for heuristic in heuristics if takesHeuristic else (None,):
+                case = {'problem': problemName, 'layout': layoutName, 'algorithm': algorithm,
+                        'heuristic': heuristic}
+                case.update(runCase(searchFunctionFor(algorithm, heuristic), problemName, state,
+                                    repeats, maxExpansions))
+                cases.append(case)
+                printCase(case)
+    return cases
+
+
+def printCase(case: Dict[str, Any]) -> None:
+    """Print one line for a case."""
+    label = case['algorithm'] + (f'/{case["heuristic"]}' if case['heuristic'] else '')
+    line = f'  {case["layout"]:<18} {label:<26}'
+    if case['status'] == 'ok':
+        line += (f' cost {case["cost"]:>6} {case["expanded"]:>8} expanded {1e3 * case["seconds"]:9.2f} ms '
+                 f'{case["peakBytes"] / 1024:9.0f} KB')
+    else:
+        line += f' {case["status"]} after {case["expanded"]} expanded'
+    print(line)
+
+
+def compareResults(cases: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                   tolerance: float, minSeconds: float = 0.002) -> List[str]:
+    """Find the cases that got worse than in a baseline.
+
+    A case regresses if it no longer finishes, if its path got more
+    expensive, or if its expansions, median time or peak memory grew by more
+    than tolerance (a fraction). Time differences below minSeconds are
+    treated as noise.
+
+    Returns:
+        One description per regression
+    """
+    baseCases = {caseKey(case): case for case in baseline}
+    regressions = []
+    for case in cases:
+        base = baseCases.get(caseKey(case))
+        if base is None or base['status'] != 'ok':
+            continue
+        key = caseKey(case)
+        if case['status'] != 'ok':
+            regressions.append(f'{key}: {case["status"]}, was ok')
+            continue
+        if case['cost'] > base['cost']:
+            regressions.append(f'{key}: path cost {case["cost"]}, was {base["cost"]}')
+        if case['expanded'] > base['expanded'] * (1 + tolerance):
+            regressions.append(f'{key}: {case["expanded"]} expanded, was {base["expanded"]}')
+        if (case['seconds'] > base['seconds'] * (1 + tolerance)
+                and case['seconds'] - base['seconds'] > minSeconds):
+            regressions.append(f'{key}: {1e3 * case["seconds"]:.2f} ms, was {1e3 * base["seconds"]:.2f} ms')
+        if case['peakBytes'] > base['peakBytes'] * (1 + tolerance):
+            regressions.append(f'{key}: {case["peakBytes"] / 1024:.0f} KB peak, was {base["peakBytes"] / 1024:.0f} KB')
+    return regressions
+
+
+def readResults(fileName: str) -> List[Dict[str, Any]]:
+    """Read the cases of a results file written by benchmarkSuite.
+
+    Raises:
+        Exception: If the file is not a results file of a supported version
+    """
+    with open(fileName) as f:
+        results = json.load(f)
+    if not isinstance(results, dict) or results.get('version') != RESULTS_VERSION:
+        raise Exception(f'{fileName} is not a version {RESULTS_VERSION} search benchmark results file')
+    return results['cases']
+
+
+def benchmarkSuite(layouts: Optional[List[str]] = None, algorithms: Tuple[str, ...] = DEFAULT_ALGORITHMS,
+                   repeats: int = 3, maxExpansions: int = 100000, output: Optional[str] = None,
+                   baseline: Optional[str] = None, tolerance: float = 0.25) -> int:
+    """Run every search algorithm on every search layout and flag regressions against a baseline.
+
+    The problem type is picked from the layout name (see PROBLEM_TYPES):
+    PositionSearchProblem on the mazes, CornersProblem on the corners layouts
+    and FoodSearchProblem on the search layouts. Each case is timed repeats
+    times, and wall time, expansions, path cost and peak memory are recorded.
+
+    Args:
+        layouts: Layout names to run on (default: every layout a problem type fits)
+        algorithms: Names of search functions in search.py
+        repeats: Number of timed runs per case
+        maxExpansions: Number of expansions after which a search is stopped
+        output: File to write the results to, if any
+        baseline: Results file of an earlier run to flag regressions against, if any
+        tolerance: Fraction by which expansions, time or memory may grow
+
+    Returns:
+        Number of cases that regressed against the baseline
+    """
+    # Check the baseline and algorithms before spending time on the suite
+    baseCases = readResults(baseline) if baseline is not None else None
+    for algorithm in algorithms:
+        searchFunctionFor(algorithm, None)
+    layouts = layouts or searchLayouts()
+    print(f'suite: {len(layouts)} layouts, {repeats} runs per case')
+    cases = runSuite(layouts, list(algorithms), repeats, maxExpansions)
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump({'version': RESULTS_VERSION, 'python': sys.version.split()[0],
+                       'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'repeats': repeats,
+                       'maxExpansions': maxExpansions, 'cases': cases}, f, indent=1)
+            f.write('\n')
+        print(f'  results written to {output}')
+    if baseCases is None:
+        return 0
+    regressions = compareResults(cases, baseCases, tolerance)
+    for regression in regressions:
+        print(f'  REGRESSION {regression}')
+    print(f'  {len(regressions)} regressions against {baseline}')
+    return len(regressions)
+
+
+BENCHMARKS: Dict[str, Callable[[], Any]] = {
+    'grid': benchmarkGrid,
+    'moves': benchmarkMoves,
+    'frontier': benchmarkFrontier,
+    'buckets': benchmarkBuckets,
+    'distance': benchmarkDistance,
+    'states': benchmarkStates,
+    'corridors': benchmarkCorridors,
+    'bidirectional': benchmarkBidirectional,
+    'jps': benchmarkJumpPoints,
+    'memory': benchmarkMemoryBounded,
+    'anytime': benchmarkAnytime,
+    'closestDot': benchmarkClosestDot,
+    'puzzle': benchmarkPuzzle,
+    'distributed': benchmarkDistributed,
+    'heuristicCache': benchmarkHeuristicCache,
+    'suite': benchmarkSuite,
+}
+
+
+def main(argv: List[str]) -> int:
+    """Run the benchmarks named on the command line, or all of them.
+
+    The options only apply to the suite benchmark.
+
+    Args:
+        argv: Options and benchmark names
+
+    Returns:
+        Exit status: 1 if any suite case regressed against the baseline, else 0
+    """
+    parser = OptionParser(__doc__.split('\n\n')[3].replace('Usage:', '', 1))
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='suite: comma separated layouts to run on (default: every maze, corners and search layout)')
+    parser.add_option('-a', '--algorithms', dest='algorithms', default=','.join(DEFAULT_ALGORITHMS),
+                      help='suite: comma separated search functions in search.py (default: %default)')
+    parser.add_option('-r', '--repeats', dest='repeats', type='int', default=3,
+                      help='suite: number of timed runs per case (default: %default)')
+    parser.add_option('-m', '--maxExpansions', dest='maxExpansions', type='int', default=100000,
+                      help='suite: number of expansions after which a search is stopped (default: %default)')
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='suite: file to write the results to')
+    parser.add_option('-b', '--baseline', dest='baseline', default=None,
+                      help='suite: results file of an earlier run to flag regressions against')
+    parser.add_option('-t', '--tolerance', dest='tolerance', type='float', default=0.25,
+                      help='suite: fraction by which expansions, time or memory may grow (default: %default)')
+    options, names = parser.parse_args(argv)
+    if options.repeats < 1:
+        parser.error('--repeats must be positive')
+    if options.baseline is not None and not os.path.exists(options.baseline):
+        parser.error(f'No results file {options.baseline}')
+    names = names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f'Unknown benchmark {name}; choose from {", ".join(BENCHMARKS)}')
+    regressions = 0
+    for name in names:
+        if name == 'suite':
+            regressions = benchmarkSuite(options.layouts.split(',') if options.layouts else None,
+                                         tuple(options.algorithms.split(',')), options.repeats,
+                                         options.maxExpansions, options.output, options.baseline,
+                                         options.tolerance)
+        else:
+            BENCHMARKS[name]()
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
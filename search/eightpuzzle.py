@@ -34,8 +34,10 @@ Pieter Abbeel (pabbeel@cs.berkeley.edu).
 
 
 import search
+import mmap
+import os
 import random
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 class EightPuzzleState:
     """
@@ -44,13 +46,21 @@ class EightPuzzleState:
 
     This class defines the mechanics of the puzzle itself. The
     task of recasting this puzzle as a search problem is left to
-    the EightPuzzleSearchProblem class.
+    the EightPuzzleSearchProblem class. Any square size works, so
+    the same class also plays the fifteen puzzle (size 4).
+
+    The board is packed into a single int, four bits per cell in
+    row-major order, so that applying a move and hashing a state
+    take constant time.
 
     Attributes:
-        cells (List[List[int]]): 2D list representing the puzzle grid
-        blankLocation (Tuple[int, int]): Row,col coordinates of blank space
+        size (int): Number of rows (and columns) of the puzzle
+        board (int): Tile in cell i at bits 4 * i to 4 * i + 3
+        blank (int): Index of the blank cell, row * size + col
     """
 
+    __slots__ = ('size', 'board', 'blank')
+
     def __init__(self, numbers: List[int]) -> None:
         """
         Constructs a new eight puzzle from an ordering of numbers.
@@ -67,19 +77,29 @@ class EightPuzzleState:
                 -------------
                 | 6 | 7 | 8 |
                 ------------
+                A list of 0 to 15 makes a fifteen puzzle, and so on.
 
-        The configuration of the puzzle is stored in a 2-dimensional
-        list (a list of lists) 'cells'.
+        Raises:
+            ValueError: If numbers is not a permutation of 0 to n * n - 1
+                for some n up to 4
         """
-        self.cells: List[List[int]] = []
-        numbers = numbers[:]  # Make a copy so as not to cause side-effects.
-        numbers.reverse()
-        for row in range(3):
-            self.cells.append([])
-            for col in range(3):
-                self.cells[row].append(numbers.pop())
-                if self.cells[row][col] == 0:
-                    self.blankLocation = (row, col)
+        size = int(len(numbers) ** 0.5 + 0.5)
+        if size * size != len(numbers) or not 1 < size <= 4 or sorted(numbers) != list(range(len(numbers))):
+            raise ValueError(f'Not a puzzle: {numbers}')
+        self.size = size
+        self.board = sum(tile << 4 * cell for cell, tile in enumerate(numbers))
+        self.blank = numbers.index(0)
+
+    @property
+    def cells(self) -> List[List[int]]:
+        """The tiles as a list of rows, with 0 for the blank."""
+        size, board = self.size, self.board
+        return [[board >> 4 * (row * size + col) & 15 for col in range(size)] for row in range(size)]
+
+    @property
+    def blankLocation(self) -> Tuple[int, int]:
+        """Row,col coordinates of the blank space."""
+        return divmod(self.blank, self.size)
 
     def isGoal(self) -> bool:
         """
@@ -103,13 +123,7 @@ class EightPuzzleState:
             >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).isGoal()
             False
         """
-        current = 0
-        for row in range(3):
-            for col in range(3):
-                if current != self.cells[row][col]:
-                    return False
-                current += 1
-        return True
+        return self.board == GOAL_BOARDS[self.size]
 
     def legalMoves(self) -> List[str]:
         """
@@ -125,17 +139,7 @@ class EightPuzzleState:
             >>> EightPuzzleState([0, 1, 2, 3, 4, 5, 6, 7, 8]).legalMoves()
             ['down', 'right']
         """
-        moves = []
-        row, col = self.blankLocation
-        if row != 0:
-            moves.append('up')
-        if row != 2:
-            moves.append('down')
-        if col != 0:
-            moves.append('left')
-        if col != 2:
-            moves.append('right')
-        return moves
+        return [move for move, _ in BLANK_MOVES[self.size][self.blank]]
 
     def result(self, move: str) -> 'EightPuzzleState':
         """
@@ -155,30 +159,18 @@ class EightPuzzleState:
             This function does not modify the current object. Instead,
             it returns a new object.
         """
-        row, col = self.blankLocation
-        if move == 'up':
-            newrow = row - 1
-            newcol = col
-        elif move == 'down':
-            newrow = row + 1
-            newcol = col
-        elif move == 'left':
-            newrow = row
-            newcol = col - 1
-        elif move == 'right':
-            newrow = row
-            newcol = col + 1
-        else:
-            raise ValueError("Illegal Move")
-
-        # Create a copy of the current eightPuzzle
-        newPuzzle = EightPuzzleState([0, 0, 0, 0, 0, 0, 0, 0, 0])
-        newPuzzle.cells = [values[:] for values in self.cells]
-        # And update it to reflect the move
-        newPuzzle.cells[row][col] = self.cells[newrow][newcol]
-        newPuzzle.cells[newrow][newcol] = self.cells[row][col]
-        newPuzzle.blankLocation = (newrow, newcol)
-
+        for legalMove, cell in BLANK_MOVES[self.size][self.blank]:
+            if legalMove == move:
+                return self._moveBlank(cell)
+        raise ValueError("Illegal Move")
+
+    def _moveBlank(self, cell: int) -> 'EightPuzzleState':
+        """Returns the state with the blank swapped with the tile in an adjacent cell."""
+        tile = self.board >> 4 * cell & 15
+        newPuzzle = EightPuzzleState.__new__(EightPuzzleState)
+        newPuzzle.size = self.size
+        newPuzzle.board = self.board ^ tile << 4 * cell ^ tile << 4 * self.blank
+        newPuzzle.blank = cell
         return newPuzzle
 
     # Utilities for comparison and display
@@ -200,14 +192,11 @@ class EightPuzzleState:
         """
         if not isinstance(other, EightPuzzleState):
             return False
-        for row in range(3):
-            if self.cells[row] != other.cells[row]:
-                return False
-        return True
+        return self.board == other.board and self.size == other.size
 
     def __hash__(self) -> int:
         """Returns hash of the puzzle state."""
-        return hash(str(self.cells))
+        return hash(self.board)
 
     def __getAsciiString(self) -> str:
         """
@@ -217,14 +206,14 @@ class EightPuzzleState:
             str: ASCII representation of puzzle
         """
         lines = []
-        horizontalLine = ('-' * 13)
+        horizontalLine = ('-' * (4 * self.size + 1))
         lines.append(horizontalLine)
         for row in self.cells:
             rowLine = '|'
             for col in row:
                 if col == 0:
                     col = ' '
-                rowLine = f'{rowLine} {col} |'
+                rowLine = f'{rowLine}{col:>2} |'
             lines.append(rowLine)
             lines.append(horizontalLine)
         return '\n'.join(lines)
@@ -233,8 +222,41 @@ class EightPuzzleState:
         """Returns string representation of the puzzle."""
         return self.__getAsciiString()
 
+def _blankMoves(size: int) -> List[Tuple[Tuple[str, int], ...]]:
+    """
+    Lists the moves of the blank from each cell of a size * size puzzle.
+
+    Args:
+        size: Number of rows (and columns) of the puzzle
+
+    Returns:
+        For each cell, the legal (move, cell the blank moves to) pairs in
+        'up', 'down', 'left', 'right' order
+    """
+    moves = []
+    for cell in range(size * size):
+        row, col = divmod(cell, size)
+        cellMoves = []
+        if row != 0:
+            cellMoves.append(('up', cell - size))
+        if row != size - 1:
+            cellMoves.append(('down', cell + size))
+        if col != 0:
+            cellMoves.append(('left', cell - 1))
+        if col != size - 1:
+            cellMoves.append(('right', cell + 1))
+        moves.append(tuple(cellMoves))
+    return moves
+
+# The moves of the blank from each cell, and the solved board, for each puzzle size
+BLANK_MOVES: Dict[int, List[Tuple[Tuple[str, int], ...]]] = {size: _blankMoves(size) for size in (2, 3, 4)}
+GOAL_BOARDS: Dict[int, int] = {size: sum(tile << 4 * tile for tile in range(size * size)) for size in (2, 3, 4)}
+
 # TODO: Implement The methods in this class
 
+# The move that undoes each move of the blank
+REVERSE_MOVES = {'up': 'down', 'down': 'up', 'left': 'right', 'right': 'left'}
+
 class EightPuzzleSearchProblem(search.SearchProblem):
     """
     Implementation of a SearchProblem for the Eight Puzzle domain.
@@ -278,10 +300,25 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         Returns:
             List of (successor state, action, cost) tuples
         """
-        succ = []
-        for a in state.legalMoves():
-            succ.append((state.result(a), a, 1))
-        return succ
+        return [(state._moveBlank(cell), move, 1) for move, cell in BLANK_MOVES[state.size][state.blank]]
+
+    def getGoalState(self) -> EightPuzzleState:
+        """Returns the solved puzzle state, for bidirectional search."""
+        return EightPuzzleState(list(range(self.puzzle.size ** 2)))
+
+    def getPredecessors(self, state: EightPuzzleState) -> List[Tuple[EightPuzzleState, str, float]]:
+        """
+        Returns list of (predecessor, action, stepCost) triples, where action
+        moves the blank from predecessor to state at a cost of 1.0.
+        Moves are reversible, so each predecessor is a successor of state.
+
+        Args:
+            state: Current puzzle state
+
+        Returns:
+            List of (predecessor state, action, cost) tuples
+        """
+        return [(state._moveBlank(cell), REVERSE_MOVES[move], 1) for move, cell in BLANK_MOVES[state.size][state.blank]]
 
     def getCostOfActions(self, actions: List[str]) -> float:
         """
@@ -297,6 +334,177 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         """
         return len(actions)
 
+# Directory for PatternDatabase files, or None to keep pattern databases in memory only
+PATTERN_CACHE_DIR: Optional[str] = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')), 'pacman', 'patterns')
+
+# The tile groups of the PatternDatabase for each puzzle size
+PATTERN_GROUPS: Dict[int, Tuple[Tuple[int, ...], ...]] = {
+    2: ((1, 2, 3),),
+    3: ((1, 2, 3, 4), (5, 6, 7, 8)),
+    4: ((1, 4, 5, 8, 9), (2, 3, 6, 7, 11), (10, 12, 13, 14, 15)),
+}
+
+class PatternDatabase:
+    """
+    An additive pattern database: a heuristic for puzzles of one size.
+
+    The tiles are split into groups (PATTERN_GROUPS). For each group a table
+    holds the fewest moves of that group's tiles that bring them home from
+    any placement, found by a breadth first search back from the goal in
+    which moves of other tiles are free, for every cell of the blank. No
+    move is counted by two groups, so the sum of the groups' entries never
+    overestimates the moves left (it is admissible and consistent), while
+    being much closer to them than the manhattan distance.
+
+    A table is indexed by its tiles' cells and then the blank's, as the
+    digits of a base size * size number, with one byte per entry. Tables are
+    built on first use and kept in PATTERN_CACHE_DIR, from which later runs
+    memory-map them.
+
+    Attributes:
+        size: Number of rows (and columns) of the puzzles
+        groups: Tile groups, one table each
+        tables: Moves per placement of each group and the blank
+        transpose: Cell (or tile) mirrored in the diagonal, per cell
+    """
+
+    FILE_HEADER = 'pacman-patterns'
+    FILE_VERSION = 1
+    _databases: Dict[int, 'PatternDatabase'] = {}
+
+    def __init__(self, size: int, groups: Optional[Tuple[Tuple[int, ...], ...]] = None) -> None:
+        """
+        Build or load the tables for a puzzle size.
+
+        Args:
+            size: Number of rows (and columns) of the puzzles
+            groups: Tile groups covering every tile once (default: PATTERN_GROUPS[size])
+        """
+        self.size = size
+        self.groups = groups if groups is not None else PATTERN_GROUPS[size]
+        if sorted(tile for group in self.groups for tile in group) != list(range(1, size * size)):
+            raise ValueError(f'The groups {self.groups} do not split the tiles of a size {size} puzzle')
+        self.tables = [self._loadTable(group) for group in self.groups]
+        self.transpose = [col * size + row for row in range(size) for col in range(size)]
+
+    @classmethod
+    def forSize(cls, size: int) -> 'PatternDatabase':
+        """
+        Get the pattern database with the default groups for a puzzle size, built once per run.
+
+        Args:
+            size: Number of rows (and columns) of the puzzles
+
+        Returns:
+            PatternDatabase for the size
+        """
+        if size not in cls._databases:
+            cls._databases[size] = cls(size)
+        return cls._databases[size]
+
+    def _buildTable(self, group: Tuple[int, ...]) -> bytearray:
+        """Find the moves left for every placement of a group's tiles, by breadth first search."""
+        cellCount = self.size * self.size
+        neighbors = [[cell for _, cell in moves] for moves in BLANK_MOVES[self.size]]
+        radix = [cellCount ** i for i in range(len(group))]
+        table = bytearray(b'\xff') * cellCount ** (len(group) + 1)
+        frontier = [(group, sum(tile * r for tile, r in zip(group, radix)), 0)]
+        moves = 0
+        while frontier:
+            nextFrontier = []
+            for positions, index, blank in frontier:
+                if table[index * cellCount + blank] != 255:
+                    continue
+                # Every cell the blank reaches without moving the group's tiles is as far from the goal
+                occupied = {cell: i for i, cell in enumerate(positions)}
+                table[index * cellCount + blank] = moves
+                region = [blank]
+                for cell in region:
+                    for neighbor in neighbors[cell]:
+                        if neighbor in occupied:
+                            # Slide the tile into the blank, which takes its cell
+                            i = occupied[neighbor]
+                            newPositions = positions[:i] + (cell,) + positions[i + 1:]
+                            nextFrontier.append((newPositions, index + (cell - neighbor) * radix[i], neighbor))
+                        elif table[index * cellCount + neighbor] == 255:
+                            table[index * cellCount + neighbor] = moves
+                            region.append(neighbor)
+            frontier = nextFrontier
+            moves += 1
+        return table
+
+    def _loadTable(self, group: Tuple[int, ...]) -> memoryview:
+        """Get a group's table from PATTERN_CACHE_DIR, building and saving it if it is not there."""
+        header = f'{self.FILE_HEADER} {self.FILE_VERSION} {self.size} {" ".join(map(str, group))}\n'.encode()
+        entries = (self.size * self.size) ** (len(group) + 1)
+        if PATTERN_CACHE_DIR is None:
+            return memoryview(self._buildTable(group))
+        fileName = os.path.join(PATTERN_CACHE_DIR, f'{self.size}-{"-".join(map(str, group))}.pdb')
+        try:
+            with open(fileName, 'rb') as f:
+                if f.readline() == header and os.fstat(f.fileno()).st_size == len(header) + entries:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    return memoryview(mapped)[len(header):]
+        except (OSError, ValueError):
+            pass
+        table = self._buildTable(group)
+        try:
+            os.makedirs(PATTERN_CACHE_DIR, exist_ok=True)
+            # Write to a private file first so that readers never see a partial table
+            tempName = f'{fileName}.{os.getpid()}'
+            with open(tempName, 'wb') as f:
+                f.write(header)
+                f.write(table)
+            os.replace(tempName, fileName)
+        except OSError:
+            pass
+        return memoryview(table)
+
+    def getEstimate(self, state: EightPuzzleState) -> int:
+        """
+        Get the heuristic value of a puzzle state.
+
+        Args:
+            state: Puzzle of this database's size
+
+        Returns:
+            int: A lower bound on the number of moves that solve the puzzle
+        """
+        cellCount = self.size * self.size
+        board = state.board
+        cells = [0] * cellCount
+        for cell in range(cellCount):
+            cells[board >> 4 * cell & 15] = cell
+        # The puzzle mirrored in its diagonal is as far from the goal, and may be estimated higher
+        transpose = self.transpose
+        mirroredCells = [0] * cellCount
+        for tile in range(cellCount):
+            mirroredCells[transpose[tile]] = transpose[cells[tile]]
+        estimates = []
+        for tileCells, blank in ((cells, state.blank), (mirroredCells, transpose[state.blank])):
+            estimate = 0
+            for group, table in zip(self.groups, self.tables):
+                index = 0
+                for tile in reversed(group):
+                    index = index * cellCount + tileCells[tile]
+                estimate += table[index * cellCount + blank]
+            estimates.append(estimate)
+        return max(estimates)
+
+def patternDatabaseHeuristic(state: EightPuzzleState, problem: Optional[EightPuzzleSearchProblem] = None) -> int:
+    """
+    A heuristic for the puzzle from the additive PatternDatabase of its size.
+
+    Args:
+        state: Puzzle state
+        problem: The search problem (unused)
+
+    Returns:
+        int: A lower bound on the number of moves that solve the puzzle
+    """
+    return PatternDatabase.forSize(state.size).getEstimate(state)
+
 EIGHT_PUZZLE_DATA = [[1, 0, 2, 3, 4, 5, 6, 7, 8],
                      [1, 7, 8, 2, 3, 4, 5, 6, 0],
                      [4, 3, 2, 7, 0, 5, 1, 6, 8],
@@ -326,17 +534,18 @@ def loadEightPuzzle(puzzleNumber: int) -> EightPuzzleState:
     """
     return EightPuzzleState(EIGHT_PUZZLE_DATA[puzzleNumber])
 
-def createRandomEightPuzzle(moves: int = 100) -> EightPuzzleState:
+def createRandomEightPuzzle(moves: int = 100, size: int = 3) -> EightPuzzleState:
     """
     Creates a random eight puzzle by applying random moves to solved puzzle.
 
     Args:
         moves: Number of random moves to apply (default: 100)
+        size: Number of rows (and columns), 4 for a fifteen puzzle (default: 3)
 
     Returns:
         EightPuzzleState: Randomly generated puzzle state
     """
-    puzzle = EightPuzzleState([0,1,2,3,4,5,6,7,8])
+    puzzle = EightPuzzleState(list(range(size * size)))
     for i in range(moves):
         # Execute a random legal move
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
@@ -29,9 +29,12 @@ Pieter Abbeel (pabbeel@cs.berkeley.edu).
 
 import abc
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, Iterable, Iterator, Any, Set
 from util import *
+import hashlib
+import zlib
 import time, os
+from array import array
 import traceback
 import sys
 
@@ -53,6 +56,9 @@ class Agent(metaclass=abc.ABCMeta):
         registerInitialState(state): Called at start to inspect initial state
         getAction(state): Required method to determine agent's next action
     """
+
+    # Agents that modify the states they are given set this to receive deep copies
+    copyObservations = False
     def __init__(self, index: int = 0) -> None:
         self.index = index
 
@@ -327,14 +333,7 @@ class Grid:
         return self.data == other.data
 
     def __hash__(self) -> int:
-        base = 1
-        h = 0
-        for l in self.data:
-            for i in l:
-                if i:
-                    h += base
-                base *= 2
-        return hash(h)
+        return hash(self._cellBits())
 
     def copy(self) -> 'Grid':
         """Create a deep copy of this grid.
@@ -392,23 +391,40 @@ class Grid:
 
     def packBits(self) -> Tuple[int, ...]:
         """Pack grid data into an efficient integer representation.
-        
+
         Returns:
             Tuple of (width, height, packed_bits...) where packed_bits
             are integers encoding the boolean grid values
         """
-        bits = [self.width, self.height]
-        currentInt = 0
-        for i in range(self.height * self.width):
-            bit = self.CELLS_PER_INT - (i % self.CELLS_PER_INT) - 1
-            x, y = self._cellIndexToPosition(i)
-            if self[x][y]:
-                currentInt += 2 ** bit
-            if (i + 1) % self.CELLS_PER_INT == 0:
-                bits.append(currentInt)
-                currentInt = 0
-        bits.append(currentInt)
-        return tuple(bits)
+        return (self.width, self.height) + self._packCells(self._cellBits())
+
+    def _cellBits(self) -> int:
+        """Encode the grid as one integer whose bit x * height + y is cell (x,y).
+
+        Returns:
+            Integer bitset of the cells that are True
+        """
+        digits = ''.join(['1' if cell else '0' for column in reversed(self.data) for cell in reversed(column)])
+        return int(digits, 2) if digits else 0
+
+    def _packCells(self, cells: int) -> Tuple[int, ...]:
+        """Split a cell bitset into the CELLS_PER_INT sized chunks used by packBits.
+
+        Within a chunk the first cell is stored in the most significant bit.
+
+        Args:
+            cells: Integer bitset as returned by _cellBits
+
+        Returns:
+            Tuple of packed integers
+        """
+        size = self.CELLS_PER_INT
+        mask = (1 << size) - 1
+        chunks = []
+        for start in range(0, self.width * self.height + 1, size):
+            chunk = (cells >> start) & mask
+            chunks.append(int(format(chunk, f'0{size}b')[::-1], 2))
+        return tuple(chunks)
 
     def _cellIndexToPosition(self, index: int) -> Tuple[int, int]:
         """Convert cell index to x,y coordinates.
@@ -425,41 +441,280 @@ class Grid:
 
     def _unpackBits(self, bits: Tuple[int, ...]) -> None:
         """Fill grid data from bit-level representation.
-        
+
         Args:
             bits: Tuple of integers encoding the grid data
         """
-        cell = 0
-        for packed in bits:
-            for bit in self._unpackInt(packed, self.CELLS_PER_INT):
-                if cell == self.width * self.height: break
-                x, y = self._cellIndexToPosition(cell)
-                self[x][y] = bit
-                cell += 1
+        cells = self._unpackCells(bits)
+        height = self.height
+        for x in range(self.width):
+            column = cells >> (x * height)
+            self.data[x] = [(column >> y) & 1 != 0 for y in range(height)]
+
+    def _unpackCells(self, bits: Tuple[int, ...]) -> int:
+        """Reassemble packBits chunks into a single cell bitset.
 
-    def _unpackInt(self, packed: int, size: int) -> List[bool]:
-        """Unpack an integer into boolean values.
-        
         Args:
-            packed: Integer to unpack
-            size: Number of boolean values to extract
-            
+            bits: Tuple of packed integers (without the width and height)
+
         Returns:
-            List of boolean values
-            
+            Integer bitset whose bit x * height + y is cell (x,y)
+
         Raises:
-            ValueError if packed is negative
-        """
-        bools = []
-        if packed < 0: raise ValueError("must be a positive integer")
-        for i in range(size):
-            n = 2 ** (self.CELLS_PER_INT - i - 1)
-            if packed >= n:
-                bools.append(True)
-                packed -= n
+            ValueError if a packed integer is negative
+        """
+        size = self.CELLS_PER_INT
+        cells = 0
+        for i, packed in enumerate(bits):
+            if packed < 0: raise ValueError("must be a positive integer")
+            cells |= int(format(packed, f'0{size}b')[::-1], 2) << (i * size)
+        return cells & ((1 << (self.width * self.height)) - 1)
+
+
+class _BitColumn:
+    """A writable view of one column of a BitGrid, so grid[x][y] keeps working.
+
+    Reads behave like a column list of Grid.data and writes go straight through to
+    the grid's bits. The column length is fixed, so list methods that resize it
+    (append, insert, pop, ...) are not provided.
+    """
+    __slots__ = ('grid', 'offset')
+
+    def __init__(self, grid: 'BitGrid', x: int) -> None:
+        self.grid = grid
+        self.offset = x * grid.height
+
+    def __len__(self) -> int:
+        return self.grid.height
+
+    def _index(self, y: int) -> int:
+        height = self.grid.height
+        if -height <= y < 0:
+            y += height
+        if not 0 <= y < height:
+            raise IndexError('grid column index out of range')
+        return y
+
+    def __getitem__(self, y: Union[int, slice]) -> Union[bool, List[bool]]:
+        if type(y) is int and 0 <= y < self.grid.height:
+            return (self.grid.bits >> (self.offset + y)) & 1 != 0
+        if isinstance(y, slice):
+            return list(self)[y]
+        return (self.grid.bits >> (self.offset + self._index(y))) & 1 != 0
+
+    def __iter__(self) -> Iterator[bool]:
+        column = self.grid.bits >> self.offset
+        return iter([(column >> y) & 1 != 0 for y in range(self.grid.height)])
+
+    def __reversed__(self) -> Iterator[bool]:
+        return reversed(list(self))
+
+    def __contains__(self, value: Any) -> bool:
+        return value in list(self)
+
+    def __setitem__(self, y: Union[int, slice], value: Any) -> None:
+        if isinstance(y, slice):
+            rows = range(*y.indices(self.grid.height))
+            values = list(value)
+            if len(values) != len(rows):
+                raise ValueError('cannot resize a grid column')
+            for row, cell in zip(rows, values):
+                self[row] = cell
+            return
+        y = self._index(y)
+        if value:
+            self.grid.bits |= 1 << (self.offset + y)
+        else:
+            self.grid.bits &= ~(1 << (self.offset + y))
+
+    def count(self, value: Any) -> int:
+        return list(self).count(value)
+
+    def index(self, value: Any, *bounds: int) -> int:
+        return list(self).index(value, *bounds)
+
+    def copy(self) -> List[bool]:
+        return list(self)
+
+    def __eq__(self, other: Any) -> bool:
+        return list(self) == other
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class _BitColumns:
+    """A write-through view of a BitGrid's columns that stands in for Grid.data."""
+    __slots__ = ('grid',)
+
+    def __init__(self, grid: 'BitGrid') -> None:
+        self.grid = grid
+
+    def __len__(self) -> int:
+        return self.grid.width
+
+    def __getitem__(self, x: Union[int, slice]) -> Union[_BitColumn, List[_BitColumn]]:
+        if isinstance(x, slice):
+            return [self.grid[i] for i in range(*x.indices(self.grid.width))]
+        return self.grid[x]
+
+    def __setitem__(self, x: int, column: List[bool]) -> None:
+        self.grid[x] = column
+
+    def __iter__(self) -> Iterator[_BitColumn]:
+        return iter([self.grid[x] for x in range(self.grid.width)])
+
+    def __eq__(self, other: Any) -> bool:
+        return [list(column) for column in self] == other
+
+    def __repr__(self) -> str:
+        return repr([list(column) for column in self])
+
+
+class BitGrid(Grid):
+    """
+    A boolean Grid backed by the bits of a single Python int.
+
+    Cell (x,y) is bit x * height + y, the same ordering Grid uses for hashing and
+    packBits, so a BitGrid hashes and compares equal to a list-backed Grid holding
+    the same cells. Because ints are immutable, copy() is O(1), and __hash__,
+    __eq__, count and asList work a machine word at a time instead of visiting
+    every cell from Python. Layouts store their food in a BitGrid, which makes the
+    food grids that search problems and game states copy and hash on every
+    successor cheap.
+
+    grid[x][y] and grid.data[x][y] reads and writes work as with Grid; grid[x]
+    and grid.data are views onto the bits rather than lists.
+
+    Args:
+        width: Width of the grid in cells
+        height: Height of the grid in cells
+        initialValue: Initial boolean value to fill grid with (default False)
+        bitRepresentation: Optional bit-packed representation to initialize from
+    """
+    def __init__(self, width: int, height: int, initialValue: bool = False,
+                 bitRepresentation: Optional[Tuple[int, ...]] = None) -> None:
+        if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        self.bits = (1 << (width * height)) - 1 if initialValue else 0
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+
+    @classmethod
+    def fromGrid(cls, grid: Grid) -> 'BitGrid':
+        """Build a BitGrid holding the same cells as a list-backed Grid.
+
+        Args:
+            grid: Boolean Grid to convert
+
+        Returns:
+            New BitGrid with the same width, height and cells
+        """
+        g = cls(grid.width, grid.height)
+        g.bits = grid._cellBits()
+        return g
+
+    @property
+    def data(self) -> _BitColumns:
+        """A write-through view of the columns, for code written against Grid.data.
+
+        grid.data[x][y] = value updates the grid just like grid[x][y] = value.
+        """
+        return _BitColumns(self)
+
+    def __getitem__(self, i: int) -> _BitColumn:
+        if not 0 <= i < self.width:
+            if -self.width <= i < 0:
+                i += self.width
             else:
-                bools.append(False)
-        return bools
+                raise IndexError('grid index out of range')
+        return _BitColumn(self, i)
+
+    def __setitem__(self, key: int, item: List[bool]) -> None:
+        column = self[key]
+        if len(item) != self.height:
+            raise ValueError('grid columns must have %d cells' % self.height)
+        for y, value in enumerate(item):
+            column[y] = value
+
+    def __str__(self) -> str:
+        out = [''.join(['T' if (self.bits >> (x * self.height + y)) & 1 else 'F'
+                        for x in range(self.width)]) for y in range(self.height)]
+        out.reverse()
+        return '\n'.join(out)
+
+    def __eq__(self, other: Any) -> bool:
+        if other == None: return False
+        if isinstance(other, BitGrid):
+            return self.bits == other.bits and self.width == other.width and self.height == other.height
+        return Grid.__eq__(self, other)
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def copy(self) -> 'BitGrid':
+        """Create an independent copy of this grid in O(1).
+
+        Returns:
+            New BitGrid with the same cells
+        """
+        g = BitGrid.__new__(BitGrid)
+        g.CELLS_PER_INT = self.CELLS_PER_INT
+        g.width = self.width
+        g.height = self.height
+        g.bits = self.bits
+        return g
+
+    def shallowCopy(self) -> 'BitGrid':
+        """Same as copy(); the backing int is immutable so nothing is shared.
+
+        Returns:
+            New BitGrid with the same cells
+        """
+        return self.copy()
+
+    def count(self, item: bool = True) -> int:
+        """Count cells matching the given value.
+
+        Args:
+            item: Value to count (default True)
+
+        Returns:
+            Number of cells matching the value
+        """
+        if item not in [False, True]: return 0
+        trueCells = self.bits.bit_count()
+        return trueCells if item else self.width * self.height - trueCells
+
+    def asList(self, key: bool = True) -> List[Tuple[int, int]]:
+        """Return coordinates of cells matching the given value.
+
+        Args:
+            key: Value to match (default True)
+
+        Returns:
+            List of (x,y) coordinates where value matches key, ordered as in Grid.asList
+        """
+        if key not in [False, True]: return []
+        bits = self.bits if key else ~self.bits & ((1 << (self.width * self.height)) - 1)
+        height = self.height
+        cells = []
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            cells.append((index // height, index % height))
+            bits ^= low
+        return cells
+
+    def _cellBits(self) -> int:
+        return self.bits
+
+    def _unpackBits(self, bits: Tuple[int, ...]) -> None:
+        self.bits = self._unpackCells(bits)
+
 
 def reconstituteGrid(bitRep: Union[Tuple[int, ...], 'Grid']) -> 'Grid':
     """Reconstruct a Grid from its bit representation.
@@ -639,6 +894,512 @@ class Actions:
         x, y = position
         return (x + dx, y + dy)
 
+class MoveTable:
+    """
+    The legal moves from every cell of a wall grid, computed once.
+
+    Cell (x,y) has id x * height + y, as in BitGrid. Each table holds, per
+    cell id, what Actions.getPossibleActions and Actions.getLegalNeighbors
+    would derive from the walls, so looking up a move is a single index.
+    Layout.getMoveTable builds one per layout on first use.
+
+    Attributes:
+        height: Height of the wall grid
+        actions: Legal actions (Stop included) per cell, in Actions order
+        neighbors: Legal neighbor positions (the cell itself included) per cell
+        successors: (action, position) pairs of the moves out of each cell,
+            in the North, South, East, West order used by search problems
+    """
+
+    SEARCH_ORDER = (Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST)
+
+    def __init__(self, walls: 'Grid') -> None:
+        """
+        Build the tables for a wall grid.
+
+        Args:
+            walls: Grid of wall positions; cells outside it count as walls
+        """
+        width, height = walls.width, walls.height
+        self.height = height
+        self.actions: List[Tuple[str, ...]] = []
+        self.neighbors: List[Tuple[Tuple[int, int], ...]] = []
+        self.successors: List[Tuple[Tuple[str, Tuple[int, int]], ...]] = []
+
+        def isOpen(x: int, y: int) -> bool:
+            return 0 <= x < width and 0 <= y < height and not walls[x][y]
+
+        for x in range(width):
+            for y in range(height):
+                moves = {direction: (x + dx, y + dy) for direction, (dx, dy) in Actions._directionsAsList
+                         if isOpen(x + dx, y + dy)}
+                self.actions.append(tuple(moves))
+                self.neighbors.append(tuple(moves.values()))
+                self.successors.append(tuple((direction, moves[direction])
+                                             for direction in self.SEARCH_ORDER if direction in moves))
+
+    def getPossibleActions(self, config: 'Configuration') -> List[str]:
+        """
+        Get the legal actions for an agent in the given configuration.
+
+        Same as Actions.getPossibleActions with the walls this table was built from.
+
+        Args:
+            config: Agent's current configuration (position/direction)
+
+        Returns:
+            New list of legal direction strings the agent can move
+        """
+        x, y = config.pos
+        x_int, y_int = int(x + 0.5), int(y + 0.5)
+
+        # In between grid points, all agents must continue straight
+        if (abs(x - x_int) + abs(y - y_int) > Actions.TOLERANCE):
+            return [config.getDirection()]
+        return list(self.actions[x_int * self.height + y_int])
+
+    def getLegalNeighbors(self, position: Tuple[float, float]) -> Tuple[Tuple[int, int], ...]:
+        """
+        Get legal neighboring positions, as Actions.getLegalNeighbors does.
+
+        Args:
+            position: (x,y) current position
+
+        Returns:
+            Tuple of (x,y) neighboring positions that are not walls
+        """
+        x, y = position
+        return self.neighbors[int(x + 0.5) * self.height + int(y + 0.5)]
+
+    def getSuccessors(self, position: Tuple[int, int]) -> Tuple[Tuple[str, Tuple[int, int]], ...]:
+        """
+        Get the moves out of a grid position, excluding Stop.
+
+        Args:
+            position: (x,y) current grid position
+
+        Returns:
+            Tuple of (action, next position) pairs in SEARCH_ORDER
+        """
+        x, y = position
+        return self.successors[x * self.height + y]
+
+# Directory for DistanceTable files, or None to keep distance tables in memory only
+DISTANCE_CACHE_DIR: Optional[str] = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')), 'pacman', 'distances')
+
+class DistanceTable:
+    """
+    The maze distance between every two open cells of a wall grid, computed once.
+
+    Open cells are numbered in the column-major order of the grid, and
+    distances holds one row of int16 distances per cell, found by a breadth
+    first search from that cell; cells that cannot be reached have distance -1.
+    Layout.getDistanceTable builds one per layout on first use, through forWalls,
+    which also keeps the table on disk in DISTANCE_CACHE_DIR under a hash of the
+    walls, so that later runs on the same maze only read it back. The file
+    header repeats that hash along with a CRC-32 of the distances, and a file
+    that does not match is recomputed rather than trusted.
+
+    Attributes:
+        cellIds: Id of each open (x,y) cell
+        size: Number of open cells
+        distances: size * size distances, indexed by id1 * size + id2
+    """
+
+    FILE_HEADER = 'pacman-distances'
+    FILE_VERSION = 2
+
+    def __init__(self, walls: 'Grid', moveTable: 'MoveTable', distances: Optional[array] = None) -> None:
+        """
+        Number the open cells of a wall grid and compute their distances.
+
+        Args:
+            walls: Grid of wall positions
+            moveTable: MoveTable of the same walls
+            distances: Previously computed distances to use instead
+        """
+        self.cellIds: Dict[Tuple[int, int], int] = {}
+        for x in range(walls.width):
+            for y in range(walls.height):
+                if not walls[x][y]:
+                    self.cellIds[(x, y)] = len(self.cellIds)
+        self.size = len(self.cellIds)
+        if distances is None:
+            distances = self._computeDistances(moveTable)
+        self.distances = distances
+
+    def _computeDistances(self, moveTable: 'MoveTable') -> array:
+        """Run a breadth first search from every open cell."""
+        cellIds, size = self.cellIds, self.size
+        adjacent = [tuple(cellIds[position] for _, position in moveTable.getSuccessors(cell))
+                    for cell in cellIds]
+        distances = array('h')
+        for source in range(size):
+            row = [-1] * size
+            row[source] = 0
+            frontier = [source]
+            distance = 0
+            while frontier:
+                distance += 1
+                nextFrontier = []
+                for cell in frontier:
+                    for neighbor in adjacent[cell]:
+                        if row[neighbor] < 0:
+                            row[neighbor] = distance
+                            nextFrontier.append(neighbor)
+                frontier = nextFrontier
+            distances.extend(row)
+        return distances
+
+    def getDistance(self, position1: Tuple[int, int], position2: Tuple[int, int]) -> int:
+        """
+        Get the maze distance between two open cells.
+
+        Args:
+            position1: (x,y) first open cell
+            position2: (x,y) second open cell
+
+        Returns:
+            Length of the shortest path between them, or -1 if there is none
+        """
+        return self.distances[self.cellIds[position1] * self.size + self.cellIds[position2]]
+
+    def getDistances(self, position: Tuple[int, int], targets: Iterable[Tuple[int, int]]) -> List[int]:
+        """
+        Get the maze distances from one open cell to many.
+
+        Args:
+            position: (x,y) open cell to measure from
+            targets: (x,y) open cells to measure to
+
+        Returns:
+            Distance to each target in order, -1 for targets that cannot be reached
+        """
+        cellIds, distances = self.cellIds, self.distances
+        row = cellIds[position] * self.size
+        return [distances[row + cellIds[target]] for target in targets]
+
+    @staticmethod
+    def wallsHash(walls: 'Grid') -> str:
+        """
+        Get the content hash that identifies a wall grid in the distance cache.
+
+        Args:
+            walls: Grid of wall positions
+
+        Returns:
+            Hex SHA-1 digest of the grid's size and walls
+        """
+        return hashlib.sha1(f'{walls.width} {walls.height}\n{walls}'.encode()).hexdigest()
+
+    @classmethod
+    def forWalls(cls, walls: 'Grid', moveTable: 'MoveTable') -> 'DistanceTable':
+        """
+        Get the distance table of a wall grid, from DISTANCE_CACHE_DIR if it is there.
+
+        A table that has to be computed is written to the cache for next time.
+        Cache files that cannot be read, or whose walls hash, size or checksum
+        do not match, are recomputed, and cache directories that cannot be
+        written to are ignored.
+
+        Args:
+            walls: Grid of wall positions
+            moveTable: MoveTable of the same walls
+
+        Returns:
+            DistanceTable for the walls
+        """
+        if DISTANCE_CACHE_DIR is None:
+            return cls(walls, moveTable)
+        wallsHash = cls.wallsHash(walls)
+        fileName = os.path.join(DISTANCE_CACHE_DIR, wallsHash + '.dist')
+        table = cls(walls, moveTable, array('h'))
+        header = f'{cls.FILE_HEADER} {cls.FILE_VERSION} {table.size} {wallsHash}'
+        try:
+            with open(fileName, 'rb') as f:
+                line = f.readline()
+                data = f.read()
+            if (len(data) == table.size * table.size * table.distances.itemsize
+                    and line == f'{header} {zlib.crc32(data):08x}\n'.encode()):
+                table.distances.frombytes(data)
+                if sys.byteorder == 'big':
+                    table.distances.byteswap()
+                return table
+        except OSError:
+            pass
+        table.distances = table._computeDistances(moveTable)
+        try:
+            os.makedirs(DISTANCE_CACHE_DIR, exist_ok=True)
+            # Write to a private file first so that readers never see a partial table
+            tempName = f'{fileName}.{os.getpid()}'
+            distances = array('h', table.distances)
+            if sys.byteorder == 'big':
+                distances.byteswap()
+            data = distances.tobytes()
+            with open(tempName, 'wb') as f:
+                f.write(f'{header} {zlib.crc32(data):08x}\n'.encode())
+                f.write(data)
+            os.replace(tempName, fileName)
+        except OSError:
+            pass
+        return table
+
+class DotDistanceField:
+    """
+    The maze distance from every open cell to the nearest food dot, kept up to
+    date as dots come and go.
+
+    A breadth first search from all the dots at once builds the field, and
+    update repairs it after that instead of searching again. Every cell
+    remembers which dot its distance was measured to. Removing a dot forgets
+    the distances of the cells that were measured to it, and those cells are
+    relaxed again from the cells around them; adding a dot lowers distances
+    outward from it. The path to the closest dot is read off the field by
+    stepping to a neighbor one closer each time, so no query searches the
+    board.
+
+    Cell (x,y) has id x * height + y, as in BitGrid and MoveTable.
+
+    Attributes:
+        moveTable: MoveTable of the walls
+        adjacent: Ids of the open neighbors of each cell
+        bits: Cells holding a dot, one bit per cell id as in BitGrid
+        distances: Distance to the nearest dot per cell id, UNREACHABLE for
+            walls and for cells that cannot reach any dot
+        sources: Id of the dot each cell's distance was measured to, -1 for
+            cells with no distance
+    """
+
+    UNREACHABLE = 1 << 30
+
+    def __init__(self, moveTable: 'MoveTable', food: 'Grid') -> None:
+        """
+        Measure the distance to the nearest dot from every cell.
+
+        Args:
+            moveTable: MoveTable of the walls
+            food: Grid of food positions to measure to
+        """
+        self.moveTable = moveTable
+        height = moveTable.height
+        self.adjacent = [tuple(x * height + y for _, (x, y) in successors)
+                         for successors in moveTable.successors]
+        self.bits = 0
+        self.distances = [self.UNREACHABLE] * len(self.adjacent)
+        self.sources = [-1] * len(self.adjacent)
+        self.update(food)
+
+    def update(self, food: 'Grid') -> None:
+        """
+        Repair the field for a new set of dots.
+
+        Args:
+            food: Grid of food positions to measure to from now on
+        """
+        bits = food._cellBits()
+        removed, added = self.bits & ~bits, bits & ~self.bits
+        self.bits = bits
+        seeds = self._forget(self._cellIds(removed)) if removed else []
+        seeds.extend((0, cell, cell) for cell in self._cellIds(added))
+        self._lower(seeds)
+
+    def getDistance(self, position: Tuple[int, int]) -> int:
+        """
+        Get the maze distance from a cell to the nearest dot.
+
+        Args:
+            position: (x,y) open cell
+
+        Returns:
+            Distance to the nearest dot, or UNREACHABLE if no dot can be reached
+        """
+        x, y = position
+        return self.distances[x * self.moveTable.height + y]
+
+    def getPathToClosestDot(self, position: Tuple[int, int]) -> List[str]:
+        """
+        Get a shortest path from a cell to the nearest dot.
+
+        Among equally short paths, each step takes the first move in
+        MoveTable.SEARCH_ORDER that leads one step closer.
+
+        Args:
+            position: (x,y) open cell to start from
+
+        Returns:
+            Actions that reach the nearest dot, empty if the cell holds a dot
+            or no dot can be reached
+        """
+        height, distances, successors = self.moveTable.height, self.distances, self.moveTable.successors
+        cell = position[0] * height + position[1]
+        distance = distances[cell]
+        if distance == self.UNREACHABLE:
+            return []
+        path = []
+        while distance > 0:
+            distance -= 1
+            for action, (x, y) in successors[cell]:
+                if distances[x * height + y] == distance:
+                    path.append(action)
+                    cell = x * height + y
+                    break
+        return path
+
+    @staticmethod
+    def _cellIds(bits: int) -> List[int]:
+        """List the ids of the set bits of a cell bit set."""
+        cells = []
+        while bits:
+            low = bits & -bits
+            cells.append(low.bit_length() - 1)
+            bits ^= low
+        return cells
+
+    def _forget(self, removed: List[int]) -> List[Tuple[int, int, int]]:
+        """
+        Forget the distances measured to removed dots.
+
+        The cells measured to a dot are connected to it through each other,
+        so they are found by a search out from the dot.
+
+        Returns:
+            (distance, cell, dot) seeds that relax each forgotten cell from
+            its nearest neighbor that still has a distance
+        """
+        distances, adjacent, sources = self.distances, self.adjacent, self.sources
+        forgotten = []
+        for dot in removed:
+            region = [dot]
+            sources[dot] = -1
+            for cell in region:
+                for neighbor in adjacent[cell]:
+                    if sources[neighbor] == dot:
+                        sources[neighbor] = -1
+                        region.append(neighbor)
+            forgotten.extend(region)
+        for cell in forgotten:
+            distances[cell] = self.UNREACHABLE
+        seeds = []
+        for cell in forgotten:
+            best = self.UNREACHABLE
+            for neighbor in adjacent[cell]:
+                if distances[neighbor] < best:
+                    best, source = distances[neighbor], sources[neighbor]
+            if best < self.UNREACHABLE:
+                seeds.append((best + 1, cell, source))
+        return seeds
+
+    def _lower(self, seeds: List[Tuple[int, int, int]]) -> None:
+        """Lower distances outward from (distance, cell, dot) seeds, one distance at a time."""
+        distances, adjacent, sources = self.distances, self.adjacent, self.sources
+        levels: Dict[int, List[int]] = {}
+        for distance, cell, source in seeds:
+            if distance < distances[cell]:
+                distances[cell] = distance
+                sources[cell] = source
+                levels.setdefault(distance, []).append(cell)
+        distance = min(levels, default=0)
+        while levels:
+            cells = levels.pop(distance, ())
+            distance += 1
+            lowered = []
+            for cell in cells:
+                if distances[cell] == distance - 1:
+                    source = sources[cell]
+                    for neighbor in adjacent[cell]:
+                        if distances[neighbor] > distance:
+                            distances[neighbor] = distance
+                            sources[neighbor] = source
+                            lowered.append(neighbor)
+            if lowered:
+                levels.setdefault(distance, []).extend(lowered)
+
+class CorridorGraph:
+    """
+    A wall grid with its corridors contracted into edges.
+
+    Every open cell that does not have exactly two open neighbors (junctions
+    and dead ends) is a node, and so is every cell passed to withNodes. Each
+    run of moves from a node through degree-2 corridor cells to the next node
+    becomes one edge, so a search over the graph visits one state per node
+    instead of one per cell. Corridors that lead from a node back to itself are
+    dropped, as no shortest path uses them. Layout.getCorridorGraph builds one
+    per layout on first use, and withNodes derives the graph for a particular
+    search from it by splitting only the corridors that its cells lie on.
+
+    Attributes:
+        moveTable: MoveTable the graph was built from
+        nodes: Positions of the nodes
+        edges: Per node, the (next node, actions, cells) of each edge out of
+            it, where cells are the positions entered along the edge
+        corridorEnds: The two nodes at the ends of the corridor through each
+            corridor cell
+    """
+
+    def __init__(self, moveTable: 'MoveTable', walls: 'Grid') -> None:
+        """
+        Find the junctions and dead ends of a wall grid and the corridors between them.
+
+        Args:
+            moveTable: MoveTable of the walls
+            walls: Grid of wall positions
+        """
+        self.moveTable = moveTable
+        self.nodes: Set[Tuple[int, int]] = set()
+        for x in range(walls.width):
+            for y in range(walls.height):
+                if not walls[x][y] and len(moveTable.getSuccessors((x, y))) != 2:
+                    self.nodes.add((x, y))
+        self.corridorEnds: Dict[Tuple[int, int], Tuple[Tuple[int, int], Tuple[int, int]]] = {}
+        self.edges: Dict[Tuple[int, int], Tuple[Tuple[Tuple[int, int], Tuple[str, ...], Tuple[Tuple[int, int], ...]], ...]] = {
+            node: self._corridorsFrom(node) for node in self.nodes}
+
+    def _corridorsFrom(self, node: Tuple[int, int]) -> Tuple[Tuple[Tuple[int, int], Tuple[str, ...], Tuple[Tuple[int, int], ...]], ...]:
+        """Follow every corridor out of a node to the node at its other end."""
+        edges = []
+        for action, position in self.moveTable.getSuccessors(node):
+            actions, cells = [action], [position]
+            previous = node
+            while position not in self.nodes:
+                # A corridor cell has two moves: take the one that does not turn back
+                for nextAction, nextPosition in self.moveTable.getSuccessors(position):
+                    if nextPosition != previous:
+                        break
+                previous, position = position, nextPosition
+                actions.append(nextAction)
+                cells.append(position)
+            for cell in cells[:-1]:
+                self.corridorEnds[cell] = (node, position)
+            if position != node:
+                edges.append((position, tuple(actions), tuple(cells)))
+        return tuple(edges)
+
+    def withNodes(self, cells: Iterable[Tuple[int, int]]) -> 'CorridorGraph':
+        """
+        Get a copy of the graph in which some more open cells are nodes.
+
+        Args:
+            cells: Open cells that must be nodes, such as the start and goal of a search
+
+        Returns:
+            This graph if every cell already is a node, otherwise a new graph
+        """
+        newNodes = set(cells) - self.nodes
+        if not newNodes:
+            return self
+        graph = CorridorGraph.__new__(CorridorGraph)
+        graph.moveTable = self.moveTable
+        graph.nodes = self.nodes | newNodes
+        graph.corridorEnds = dict(self.corridorEnds)
+        graph.edges = dict(self.edges)
+        split = set(newNodes)
+        for cell in newNodes:
+            split.update(self.corridorEnds.get(cell, ()))
+        for node in split:
+            graph.edges[node] = graph._corridorsFrom(node)
+        return graph
+
 class GameStateData:
     """
     A class that stores the complete game state data.
@@ -849,6 +1610,190 @@ try:
 except:
     _BOINC_ENABLED = False  # Disable BOINC integration if not installed
 
+# Game records are versioned, line-delimited text files written one move at a
+# time (see GameRecorder). Each move is a fixed-width line holding the agent
+# index in base 36 and a one-letter action code.
+RECORD_HEADER = 'pacman-record'
+RECORD_VERSION = 1
+_AGENT_CODES = '0123456789abcdefghijklmnopqrstuvwxyz'
+_ACTION_CODES = {Directions.NORTH: 'N', Directions.SOUTH: 'S', Directions.EAST: 'E',
+                 Directions.WEST: 'W', Directions.STOP: 'X'}
+_CODE_ACTIONS = {code: action for action, code in _ACTION_CODES.items()}
+
+
+def layoutHash(layoutText: List[str]) -> str:
+    """
+    Get the content hash that identifies a layout in game records.
+
+    Args:
+        layoutText: Rows of the layout
+
+    Returns:
+        Hex SHA-1 digest of the layout text
+    """
+    return hashlib.sha1('\n'.join(layoutText).encode()).hexdigest()
+
+
+class GameRecorder:
+    """
+    Writes the record of a game to a file while the game is played.
+
+    A record consists of the lines
+
+        pacman-record <version>
+        layout <layoutHash of the layout> <number of rows>
+        <the rows of the layout>
+        seed <random seed the game was played with, or ->
+        moves
+        <one line per move>
+
+    Every move is flushed as soon as it is made, so the record of a game that
+    crashes or is interrupted is complete up to its last move. Read records
+    with readGameRecord. Can be used as a context manager.
+    """
+
+    def __init__(self, fileName: str, layoutText: List[str], seed: Optional[int] = None) -> None:
+        """
+        Create the record file and write its header.
+
+        Args:
+            fileName: Name of the record file
+            layoutText: Rows of the layout the game is played on
+            seed: Random seed the game was played with, if known
+        """
+        self.file = open(fileName, 'w', encoding='ascii', newline='\n')
+        self.file.write(f'{RECORD_HEADER} {RECORD_VERSION}\n')
+        self.file.write(f'layout {layoutHash(layoutText)} {len(layoutText)}\n')
+        self.file.writelines(row + '\n' for row in layoutText)
+        self.file.write(f'seed {"-" if seed is None else seed}\nmoves\n')
+        self.file.flush()
+
+    def recordMove(self, agentIndex: int, action: str) -> None:
+        """
+        Append a move to the record.
+
+        Args:
+            agentIndex: Index of the agent that moved, below 36
+            action: Direction the agent moved in
+        """
+        self.file.write(f'{_AGENT_CODES[agentIndex]}{_ACTION_CODES[action]}\n')
+        self.file.flush()
+
+    def close(self) -> None:
+        """
+        Close the record file.
+        """
+        self.file.close()
+
+    def __enter__(self) -> 'GameRecorder':
+        return self
+
+    def __exit__(self, *excInfo: Any) -> None:
+        self.close()
+
+
+def readGameRecord(fileName: str) -> Tuple[List[str], Optional[int], Iterator[Tuple[int, str]]]:
+    """
+    Read a game record written by GameRecorder.
+
+    The header is read at once and the moves only as the returned iterator is
+    consumed, so a replay can start before the whole file is read. A last move
+    cut short by a crash is skipped.
+
+    Args:
+        fileName: Name of the record file
+
+    Returns:
+        Tuple of (layout rows, seed or None, iterator over (agentIndex, action) moves)
+
+    Raises:
+        Exception: If the file is not a game record of a supported version,
+            or its layout does not match the layout hash
+    """
+    f = open(fileName, encoding='ascii', newline='\n')
+    try:
+        header = f.readline().split()
+        if len(header) != 2 or header[0] != RECORD_HEADER:
+            raise Exception(f'{fileName} is not a recorded game')
+        if header[1] != str(RECORD_VERSION):
+            raise Exception(f'{fileName} is a version {header[1]} game record; only version {RECORD_VERSION} is supported')
+        _, digest, numRows = f.readline().split()
+        layoutText = [f.readline().rstrip('\n') for _ in range(int(numRows))]
+        if layoutHash(layoutText) != digest:
+            raise Exception(f'The layout in {fileName} does not match its hash')
+        _, seed = f.readline().split()
+        if f.readline() != 'moves\n':
+            raise Exception(f'{fileName} has no moves section')
+    except ValueError:
+        f.close()
+        raise Exception(f'{fileName} is not a valid game record')
+    except Exception:
+        f.close()
+        raise
+
+    def moves() -> Iterator[Tuple[int, str]]:
+        with f:
+            for line in f:
+                if len(line) == 3:
+                    yield int(line[0], 36), _CODE_ACTIONS[line[1]]
+
+    return layoutText, None if seed == '-' else int(seed), moves()
+
+
+# Search traces are the cells a search expanded, in order: a header line
+# 'pacman-trace <version> <number of cells>' followed by the x and y of each
+# cell as little-endian unsigned 16-bit ints.
+TRACE_HEADER = 'pacman-trace'
+TRACE_VERSION = 1
+
+
+def writeSearchTrace(fileName: str, cells: List[Tuple[int, int]]) -> None:
+    """
+    Write the cells a search expanded to a search trace file.
+
+    Args:
+        fileName: Name of the trace file
+        cells: (x, y) cells in the order they were expanded
+    """
+    coordinates = array('H', [coordinate for cell in cells for coordinate in cell])
+    if sys.byteorder != 'little':
+        coordinates.byteswap()
+    with open(fileName, 'wb') as f:
+        f.write(f'{TRACE_HEADER} {TRACE_VERSION} {len(cells)}\n'.encode('ascii'))
+        coordinates.tofile(f)
+
+
+def readSearchTrace(fileName: str) -> List[Tuple[int, int]]:
+    """
+    Read a search trace written by writeSearchTrace, e.g. for
+    drawExpandedCells to replay.
+
+    Args:
+        fileName: Name of the trace file
+
+    Returns:
+        (x, y) cells in the order they were expanded
+
+    Raises:
+        Exception: If the file is not a complete search trace of a supported version
+    """
+    with open(fileName, 'rb') as f:
+        header = f.readline().split()
+        if len(header) != 3 or header[0] != TRACE_HEADER.encode('ascii'):
+            raise Exception(f'{fileName} is not a search trace')
+        if header[1] != str(TRACE_VERSION).encode('ascii'):
+            raise Exception(f'{fileName} is a version {header[1].decode()} search trace; '
+                            f'only version {TRACE_VERSION} is supported')
+        coordinates = array('H')
+        try:
+            coordinates.fromfile(f, 2 * int(header[2]))
+        except (EOFError, ValueError):
+            raise Exception(f'{fileName} is not a complete search trace')
+    if sys.byteorder != 'little':
+        coordinates.byteswap()
+    return list(zip(coordinates[::2], coordinates[1::2]))
+
+
 class Game:
     """
     The Game manages the control flow, soliciting actions from agents.
@@ -862,6 +1807,9 @@ class Game:
         startingIndex: Index of first agent to move (default 0)
         muteAgents: Whether to suppress agent output (default False)
         catchExceptions: Whether to catch agent exceptions (default False)
+
+    A GameRecorder set as recorder before the game runs receives every move
+    as it is made.
     """
 
     def __init__(self, agents: List[Any], display: Any, rules: Any, 
@@ -879,6 +1827,8 @@ class Game:
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
         self.agentTimeout = False
+        self.moveTimer = MoveTimer()
+        self.recorder: Optional[GameRecorder] = None
         import io
         self.agentOutput = [io.StringIO() for agent in agents]
 
@@ -933,6 +1883,24 @@ class Game:
         sys.stdout = OLD_STDOUT
         sys.stderr = OLD_STDERR
 
+    def _observationFor(self, agent: Any) -> Any:
+        """
+        Get the state to hand to an agent.
+
+        The game never changes a state once it has moved on from it, so agents
+        share the game's current state unless they set copyObservations to
+        receive a deep copy that they are free to modify.
+
+        Args:
+            agent: Agent that will observe the state
+
+        Returns:
+            The current state, or a deep copy of it
+        """
+        if getattr(agent, 'copyObservations', False):
+            return self.state.deepCopy()
+        return self.state
+
     def run(self) -> None:
         """
         Main control loop for game play.
@@ -944,6 +1912,19 @@ class Game:
         - Updating game state and display
         - Processing win/loss conditions
         - Cleanup and final agent notifications
+
+        When exceptions are caught, agent calls are timed by a MoveTimer that is
+        set up once for the whole game, so move timeouts may be fractional.
+        """
+        if self.catchExceptions:
+            with self.moveTimer:
+                self._runGame()
+        else:
+            self._runGame()
+
+    def _runGame(self) -> None:
+        """
+        Play the game until it is over; see run.
         """
         self.display.initialize(self.state.data)
         self.numMoves = 0
@@ -964,10 +1945,10 @@ class Game:
                 self.mute(i)
                 if self.catchExceptions:
                     try:
-                        timed_func = TimeoutFunction(agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
+                        timed_func = self.moveTimer.timed(agent.registerInitialState, self.rules.getMaxStartupTime(i))
                         try:
                             start_time = time.time()
-                            timed_func(self.state.deepCopy())
+                            timed_func(self._observationFor(agent))
                             time_taken = time.time() - start_time
                             self.totalAgentTimes[i] += time_taken
                         except TimeoutFunctionException:
@@ -981,7 +1962,7 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    agent.registerInitialState(self.state.deepCopy())
+                    agent.registerInitialState(self._observationFor(agent))
                 ## TODO: could this exceed the total time
                 self.unmute()
 
@@ -998,10 +1979,10 @@ class Game:
                 self.mute(agentIndex)
                 if self.catchExceptions:
                     try:
-                        timed_func = TimeoutFunction(agent.observationFunction, int(self.rules.getMoveTimeout(agentIndex)))
+                        timed_func = self.moveTimer.timed(agent.observationFunction, self.rules.getMoveTimeout(agentIndex))
                         try:
                             start_time = time.time()
-                            observation = timed_func(self.state.deepCopy())
+                            observation = timed_func(self._observationFor(agent))
                         except TimeoutFunctionException:
                             skip_action = True
                         move_time += time.time() - start_time
@@ -1011,17 +1992,17 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    observation = agent.observationFunction(self.state.deepCopy())
+                    observation = agent.observationFunction(self._observationFor(agent))
                 self.unmute()
             else:
-                observation = self.state.deepCopy()
+                observation = self._observationFor(agent)
 
             # Solicit an action
             action = None
             self.mute(agentIndex)
             if self.catchExceptions:
                 try:
-                    timed_func = TimeoutFunction(agent.getAction, int(self.rules.getMoveTimeout(agentIndex)) - int(move_time))
+                    timed_func = self.moveTimer.timed(agent.getAction, self.rules.getMoveTimeout(agentIndex) - move_time)
                     try:
                         start_time = time.time()
                         if skip_action:
@@ -1065,6 +2046,8 @@ class Game:
 
             # Execute the action
             self.moveHistory.append( (agentIndex, action) )
+            if self.recorder is not None:
+                self.recorder.recordMove(agentIndex, action)
             if self.catchExceptions:
                 try:
                     self.state = self.state.generateSuccessor( agentIndex, action )
@@ -37,12 +37,13 @@ Pieter Abbeel (pabbeel@cs.berkeley.edu).
 
 from typing import List, Tuple, Set, Dict, Optional
 from util import manhattanDistance
-from game import Grid, Directions
+from game import Grid, BitGrid, Directions, MoveTable, DistanceTable, CorridorGraph
 import os
 import random
 from functools import reduce
 
 VISIBILITY_MATRIX_CACHE: Dict[str, Grid] = {}
+LAYOUT_CACHE: Dict[Tuple[str, ...], 'Layout'] = {}
 
 class Layout:
     """
@@ -52,13 +53,16 @@ class Layout:
         width (int): Width of the board in grid cells
         height (int): Height of the board in grid cells
         walls (Grid): Grid marking wall locations
-        food (Grid): Grid marking food pellet locations  
+        food (BitGrid): Bit-packed grid marking food pellet locations  
         capsules (List[Tuple[int, int]]): List of power capsule coordinates
         agentPositions (List[Tuple[bool, Tuple[int, int]]]): List of (isPacman, position) tuples
         numGhosts (int): Number of ghosts in the layout
         layoutText (List[str]): Original text representation of layout
         totalFood (int): Total number of food pellets
         visibility (Grid): Visibility information for each position (optional)
+        moveTable (MoveTable): Legal moves per cell, built by getMoveTable
+        distanceTable (DistanceTable): Maze distances between cells, built by getDistanceTable
+        corridorGraph (CorridorGraph): Junctions and the corridors between them, built by getCorridorGraph
     """
 
     def __init__(self, layoutText: List[str]) -> None:
@@ -71,18 +75,39 @@ class Layout:
         self.width = len(layoutText[0])
         self.height = len(layoutText)
         self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        self.food = BitGrid(self.width, self.height, False)
         self.capsules: List[Tuple[int, int]] = []
         self.agentPositions: List[Tuple[bool, Tuple[int, int]]] = []
         self.numGhosts = 0
         self.processLayoutText(layoutText)
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
+        self.moveTable: Optional[MoveTable] = None
+        self.distanceTable: Optional[DistanceTable] = None
+        self.corridorGraph: Optional[CorridorGraph] = None
 
     def getNumGhosts(self) -> int:
         """Return the number of ghosts in the layout."""
         return self.numGhosts
 
+    def getMoveTable(self) -> MoveTable:
+        """Return the table of legal moves from every cell, building it on first use."""
+        if self.moveTable is None:
+            self.moveTable = MoveTable(self.walls)
+        return self.moveTable
+
+    def getDistanceTable(self) -> DistanceTable:
+        """Return the maze distances between all open cells, loading or building them on first use."""
+        if self.distanceTable is None:
+            self.distanceTable = DistanceTable.forWalls(self.walls, self.getMoveTable())
+        return self.distanceTable
+
+    def getCorridorGraph(self) -> CorridorGraph:
+        """Return the graph of junctions and the corridors between them, building it on first use."""
+        if self.corridorGraph is None:
+            self.corridorGraph = CorridorGraph(self.getMoveTable(), self.walls)
+        return self.corridorGraph
+
     def initializeVisibilityMatrix(self) -> None:
         """
         Initialize the visibility matrix for the layout.
@@ -175,8 +200,12 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self) -> 'Layout':
-        """Return a new copy of the layout."""
-        return Layout(self.layoutText[:])
+        """Return this layout.
+
+        Layouts are never modified after they are built, so game states and
+        their copies share one instance instead of re-parsing the layout text.
+        """
+        return self
 
     def processLayoutText(self, layoutText: List[str]) -> None:
         """
@@ -266,4 +295,23 @@ def tryToLoad(fullname: str) -> Optional[Layout]:
     if not os.path.exists(fullname):
         return None
     with open(fullname) as f:
-        return Layout([line.strip() for line in f])
+        return internLayout([line.strip() for line in f])
+
+
+def internLayout(layoutText: List[str]) -> Layout:
+    """
+    Return the shared Layout for the given text, parsing it only the first time.
+
+    Layouts are immutable, so every game played on the same maze can use a
+    single instance.
+
+    Args:
+        layoutText: List of strings representing the maze layout
+
+    Returns:
+        The interned Layout for this text
+    """
+    key = tuple(layoutText)
+    if key not in LAYOUT_CACHE:
+        LAYOUT_CACHE[key] = Layout(list(layoutText))
+    return LAYOUT_CACHE[key]
@@ -53,6 +53,7 @@ import os
 from typing import Any
 from game import GameStateData
 from game import Game
+from game import GameRecorder, readGameRecord, readSearchTrace
 from game import Directions
 from game import Actions
 from util import nearestPoint
@@ -347,7 +348,7 @@ class PacmanRules:
         """
         Returns a list of possible actions.
         """
-        return Actions.getPossibleActions( state.getPacmanState().configuration, state.data.layout.walls )
+        return state.data.layout.getMoveTable().getPossibleActions( state.getPacmanState().configuration )
     getLegalActions = staticmethod( getLegalActions )
 
     def applyAction( state, action ):
@@ -404,7 +405,7 @@ class GhostRules:
         reach a dead end, but can turn 90 degrees at intersections.
         """
         conf = state.getGhostState( ghostIndex ).configuration
-        possibleActions = Actions.getPossibleActions( conf, state.data.layout.walls )
+        possibleActions = state.data.layout.getMoveTable().getPossibleActions( conf )
         reverse = Actions.reverseDirection( conf.direction )
         if Directions.STOP in possibleActions:
             possibleActions.remove( Directions.STOP )
@@ -527,7 +528,9 @@ def readCommand(argv):
     parser.add_option('-r', '--recordActions', action='store_true', dest='record',
                       help='Writes game histories to a file (named by the time they were played)', default=False)
     parser.add_option('--replay', dest='gameToReplay',
-                      help='A recorded game file (pickle) to replay', default=None)
+                      help='A recorded game file to replay', default=None)
+    parser.add_option('--trace', dest='traceToReplay',
+                      help='A search trace (SearchAgent trace=NAME writes NAME.trace) to draw over the layout', default=None)
     parser.add_option('-a','--agentArgs',dest='agentArgs',
                       help='Comma separated values sent to agent. e.g. "opt1=val1,opt2,opt3=val3"')
     parser.add_option('-x', '--numTraining', dest='numTraining', type='int',
@@ -536,8 +539,10 @@ def readCommand(argv):
                       help=default('Time to delay between frames; <0 means keyboard'), default=0.1)
     parser.add_option('-c', '--catchExceptions', action='store_true', dest='catchExceptions',
                       help='Turns on exception handling and timeouts during games', default=False)
-    parser.add_option('--timeout', dest='timeout', type='int',
+    parser.add_option('--timeout', dest='timeout', type='float',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('-j', '--jobs', dest='jobs', type='int',
+                      help=default('Number of worker processes playing games in parallel (requires -q)'), default=1)
 
     try:
         options, otherjunk = parser.parse_args(argv)
@@ -547,6 +552,8 @@ def readCommand(argv):
         print(f"Error parsing command line: {e}")
         # Use default values if there's an error
         options, _ = parser.parse_args([])  # Parse with empty args to get defaults
+    if options.jobs > 1 and not options.quietGraphics:
+        raise Exception('Parallel games (--jobs) can only be played with quiet graphics (-q)')
     
     args = dict()
 
@@ -566,7 +573,9 @@ def readCommand(argv):
 
     # Choose a Pacman agent
     try:
-        noKeyboard = options.gameToReplay is None and (options.textGraphics or options.quietGraphics)
+        # Replays need no agent, so the keyboard agent may be loaded for them
+        noKeyboard = (options.gameToReplay is None and options.traceToReplay is None
+                      and (options.textGraphics or options.quietGraphics))
         pacmanType = loadAgent(options.pacman, noKeyboard)
         agentOpts = parseAgentArgs(options.agentArgs)
         
@@ -621,20 +630,25 @@ def readCommand(argv):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['jobs'] = options.jobs
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay is not None:
         print('Replaying recorded game %s.' % options.gameToReplay)
         try:
-            import pickle
-            with open(options.gameToReplay, 'rb') as f:
-                recorded = pickle.load(f)
-            recorded['display'] = args['display']
-            replayGame(**recorded)
+            layoutText, seed, moves = readGameRecord(options.gameToReplay)
+            replayGame(layout.internLayout(layoutText), moves, args['display'])
             sys.exit(0)
         except Exception as e:
             print(f"Error replaying game: {e}")
             # Continue with normal game if replay fails
+    if options.traceToReplay is not None:
+        print('Replaying search trace %s.' % options.traceToReplay)
+        try:
+            replayTrace(args['layout'], readSearchTrace(options.traceToReplay), args['display'])
+            sys.exit(0)
+        except Exception as e:
+            print(f"Error replaying search trace: {e}")
 
     return args
 
@@ -702,14 +716,98 @@ def replayGame( layout, actions, display ):
 
     display.finish()
 
-def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30 ):
+def replayTrace( layout, cells, display ):
+    """
+    Shows the layout with the cells of a search trace drawn over it, in the
+    order they were expanded, as a search agent draws them.
+    """
+    import pacmanAgents
+    rules = ClassicGameRules()
+    game = rules.newGame( layout, pacmanAgents.GreedyAgent(), [], display )
+    display.initialize(game.state.data)
+    if 'drawExpandedCells' in dir(display):
+        display.drawExpandedCells(cells)
+    display.finish()
+
+def runGame( game, layout, record, gameIndex, seed ):
+    """
+    Plays a game. If record is set, the moves are written while the game is
+    played to a file named by the game index and the time it started, along
+    with the seed a worker process started the game with (None for a game
+    played on from the current random sequence). Recording never touches the
+    random sequence, so it does not change the game.
+    """
+    if not record:
+        game.run()
+        return
+    fname = ('recorded-game-%d' % (gameIndex + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
+    with GameRecorder(fname, layout.layoutText, seed) as recorder:
+        game.recorder = recorder
+        game.run()
+
+# Game set-up for the worker processes of runGamesInParallel
+_workerSetup = None
+
+def _initGameWorker( layout, pacman, ghosts, rules, catchExceptions, record ):
+    global _workerSetup
+    _workerSetup = (layout, pacman, ghosts, rules, catchExceptions, record)
+
+def _playGameInWorker( job ):
+    """
+    Plays one quiet game in a worker process and returns
+    (game index, final state, move history, agent timed out, agent crashed).
+    """
+    import textDisplay
+    gameIndex, seed = job
+    layout, pacman, ghosts, rules, catchExceptions, record = _workerSetup
+    random.seed(seed)
+    game = rules.newGame( layout, pacman, ghosts, textDisplay.NullGraphics(), True, catchExceptions)
+    try:
+        runGame(game, layout, record, gameIndex, seed)
+    except SystemExit as e:
+        # A worker that exits is replaced without its task ever finishing, which
+        # would leave the pool waiting forever (util.raiseNotDefined exits)
+        raise Exception('Game %d exited with status %s' % (gameIndex + 1, e.code))
+    sys.stdout.flush()
+    return gameIndex, game.state, game.moveHistory, game.agentTimeout, game.agentCrashed
+
+def runGamesInParallel( layout, pacman, ghosts, rules, jobList, catchExceptions, record, jobs ):
+    """
+    Plays quiet games in a pool of worker processes, yielding (game index, game)
+    in the order the games finish. jobList holds a (game index, random seed)
+    tuple for each game to play.
+
+    Each worker plays on its own copy of the agents, and records its games
+    if record is set.
+    """
+    import multiprocessing, textDisplay
+    # Forked workers inherit the agents, so they need not be picklable
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    sys.stdout.flush()
+    with context.Pool(jobs, _initGameWorker, (layout, pacman, ghosts, rules, catchExceptions, record)) as pool:
+        for i, state, moveHistory, agentTimeout, agentCrashed in pool.imap_unordered(_playGameInWorker, jobList):
+            game = rules.newGame( layout, pacman, ghosts, textDisplay.NullGraphics(), False, catchExceptions)
+            game.state = state
+            game.moveHistory = moveHistory
+            game.agentTimeout = agentTimeout
+            game.agentCrashed = agentCrashed
+            game.gameOver = True
+            rules.process(state, game)
+            yield i, game
+
+def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30, jobs=1 ):
     import __main__
     __main__.__dict__['_display'] = display
 
     rules = ClassicGameRules(timeout)
     games = []
 
-    for i in range( numGames ):
+    # Training games change the agents, so only the games after them are spread over jobs
+    numSerial = numGames if jobs <= 1 else min(numTraining, numGames)
+    for i in range( numSerial ):
         beQuiet = i < numTraining
         if beQuiet:
                 # Suppress output and graphics
@@ -720,16 +818,19 @@ def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0
             gameDisplay = display
             rules.quiet = False
         game = rules.newGame( layout, pacman, ghosts, gameDisplay, beQuiet, catchExceptions)
-        game.run()
+        runGame(game, layout, record, i, None)
         if not beQuiet: games.append(game)
 
-        if record:
-            import time, pickle
-            fname = ('recorded-game-%d' % (i + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
-            f = open(fname, 'wb')
-            components = {'layout': layout, 'actions': game.moveHistory}
-            pickle.dump(components, f)
-            f.close()
+    if numSerial < numGames:
+        # Serial games play on from the random sequence as it stands. Each game
+        # handed to a worker is played from its own seed instead, drawn here
+        # before any of them starts, so a fixed seed (-f) plays the same
+        # parallel games whatever the number of jobs
+        jobList = [(i, random.randrange(2 ** 32)) for i in range(numSerial, numGames)]
+        finished = {}
+        for i, game in runGamesInParallel(layout, pacman, ghosts, rules, jobList, catchExceptions, record, jobs):
+            finished[i] = game
+        games.extend(finished[i] for i in sorted(finished))
 
     if (numGames-numTraining) > 0:
         scores = [game.state.getScore() for game in games]
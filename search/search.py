@@ -48,6 +48,15 @@ be used by the Pacman agents to find paths through the maze.
 ================================================================================
 """
 import abc
+import csv
+import heapq
+import itertools
+import json
+import os
+import queue
+import sys
+import time
+import game
 from game import Directions
 import util
 from util import Stack, Queue, PriorityQueue, Counter
@@ -117,6 +126,15 @@ class SearchProblem(metaclass=abc.ABCMeta):
             The sequence must be composed of legal moves.
         """
         return
+
+    # Problems with a single goal state and reversible actions can also
+    # support bidirectionalSearch by providing:
+    #
+    #   getGoalState(self) -> Any
+    #       The one goal state
+    #   getPredecessors(self, state) -> List[Tuple[Any, str, float]]
+    #       (predecessor, action, stepCost) tuples, where action leads from
+    #       predecessor to state at a cost of stepCost
         
 def tinyMazeSearch(problem: 'SearchProblem') -> List[str]:
     """Return a fixed sequence of moves that solves tinyMaze.
@@ -226,8 +244,933 @@ def aStarSearch(problem: 'SearchProblem', heuristic: Callable = nullHeuristic) -
     util.raiseNotDefined()
 
 
+def bidirectionalSearch(problem: 'SearchProblem', heuristic: Callable = nullHeuristic,
+                        reverseHeuristic: Callable = nullHeuristic) -> List[str]:
+    """Search forward from the start and backward from the goal at the same time.
+    
+    Runs uniform cost search from both ends of a problem with a single goal
+    state, always expanding the smaller frontier, until no path through either
+    frontier can be cheaper than the cheapest meeting of the two found so far.
+    With unit step costs this is bidirectional breadth-first search. Given
+    consistent heuristics it is front-to-end bidirectional A*: the forward
+    search uses heuristic, the estimated cost to the goal, and the backward
+    search uses reverseHeuristic, the estimated cost from the start.
+    
+    The problem must provide getGoalState and getPredecessors (see
+    SearchProblem), as PositionSearchProblem and EightPuzzleSearchProblem do.
+    
+    Args:
+        problem: A SearchProblem instance defining the search space
+        heuristic: Estimate of the cost from a state to the goal (default: nullHeuristic)
+        reverseHeuristic: Estimate of the cost from the start to a state,
+            called with the same arguments as heuristic (default: nullHeuristic)
+        
+    Returns:
+        List[str]: A sequence of actions that reaches the goal state with optimal cost,
+                  or empty list if no solution exists
+    """
+    start, goal = problem.getStartState(), problem.getGoalState()
+    if start == goal:
+        return []
+    heuristics = (heuristic, reverseHeuristic)
+    expand = (problem.getSuccessors, problem.getPredecessors)
+    costs: Tuple[Dict[Any, float], Dict[Any, float]] = ({start: 0}, {goal: 0})
+    # Per direction: state -> (the state it was reached from, action between them)
+    parents: Tuple[Dict[Any, Any], Dict[Any, Any]] = ({start: None}, {goal: None})
+    closed: Tuple[set, set] = (set(), set())
+    frontiers = ([(heuristic(start, problem), 0, start)], [(reverseHeuristic(goal, problem), 1, goal)])
+    count = 2
+    informed = heuristic is not nullHeuristic or reverseHeuristic is not nullHeuristic
+    best, meeting = float('inf'), None
+    instrument = getattr(problem, 'instrument', None)
+    if instrument is not None:
+        instrument.record('push', start)
+        instrument.record('push', goal)
+
+    while frontiers[0] and frontiers[1]:
+        # Every path not yet found costs at least this much
+        lowForward, lowBackward = frontiers[0][0][0], frontiers[1][0][0]
+        bound = max(lowForward, lowBackward) if informed else lowForward + lowBackward
+        if bound >= best:
+            break
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        _, _, state = heapq.heappop(frontiers[side])
+        if instrument is not None:
+            instrument.record('pop', state)
+        if state in closed[side]:
+            if instrument is not None:
+                instrument.record('duplicate', state)
+            continue
+        closed[side].add(state)
+        cost = costs[side][state]
+        otherCosts = costs[1 - side]
+        for neighbor, action, stepCost in expand[side](state):
+            newCost = cost + stepCost
+            if neighbor in closed[side] or newCost >= costs[side].get(neighbor, float('inf')):
+                continue
+            costs[side][neighbor] = newCost
+            parents[side][neighbor] = (state, action)
+            heapq.heappush(frontiers[side], (newCost + heuristics[side](neighbor, problem), count, neighbor))
+            count += 1
+            if instrument is not None:
+                instrument.record('push', neighbor)
+            if neighbor in otherCosts and newCost + otherCosts[neighbor] < best:
+                best, meeting = newCost + otherCosts[neighbor], neighbor
+
+    if meeting is None:
+        return []
+    path = []
+    state = meeting
+    while parents[0][state] is not None:
+        state, action = parents[0][state]
+        path.append(action)
+    path.reverse()
+    state = meeting
+    while parents[1][state] is not None:
+        state, action = parents[1][state]
+        path.append(action)
+    return path
+
+
+def jumpPointSearch(problem: 'SearchProblem') -> List[str]:
+    """Find a shortest path on a uniform-cost grid with Jump Point Search.
+    
+    A* with the Manhattan distance heuristic, except that instead of stepping
+    to each neighbor, every move jumps in a straight line until it reaches a
+    cell where the path might have to turn: the goal, or (4-connected jump
+    rules) a cell along a row whose upper or lower neighbor opens up where the
+    previous cell's was a wall, or a cell in a column from which such a row
+    cell or the goal is reachable in a straight line. Only these jump points
+    are expanded, which skips the many equivalent paths through open regions.
+    
+    The problem must be a position search on a wall grid with unit step costs,
+    such as PositionSearchProblem: it needs walls, getStartState() and
+    getGoalState(). Each expanded jump point counts as one expansion.
+    
+    Args:
+        problem: A SearchProblem instance defining the search space
+        
+    Returns:
+        List[str]: A sequence of actions that reaches the goal state with optimal cost,
+                  or empty list if no solution exists
+    """
+    walls = problem.walls
+    width, height = walls.width, walls.height
+    start, goal = problem.getStartState(), problem.getGoalState()
+    goalx, goaly = goal
+
+    def isOpen(x: int, y: int) -> bool:
+        return 0 <= x < width and 0 <= y < height and not walls[x][y]
+
+    def jump(x: int, y: int, dx: int, dy: int) -> Optional[Tuple[int, int]]:
+        # Follow the move from (x, y) to the next jump point, if there is one
+        while True:
+            x, y = x + dx, y + dy
+            if not isOpen(x, y):
+                return None
+            if x == goalx and y == goaly:
+                return (x, y)
+            if dx:
+                if (isOpen(x, y + 1) and not isOpen(x - dx, y + 1)) or \
+                   (isOpen(x, y - 1) and not isOpen(x - dx, y - 1)):
+                    return (x, y)
+            elif jump(x, y, 1, 0) is not None or jump(x, y, -1, 0) is not None:
+                return (x, y)
+
+    directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+    costs = {start: 0}
+    parents: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {start: None}
+    closed = set()
+    frontier = [(util.manhattanDistance(start, goal), 0, start, (0, 0))]
+    count = 1
+    while frontier:
+        _, _, position, (fromx, fromy) = heapq.heappop(frontier)
+        if position in closed:
+            continue
+        if position == goal:
+            break
+        closed.add(position)
+        problem._expanded += 1
+        x, y = position
+        for dx, dy in directions:
+            if dx == -fromx and dy == -fromy and (dx or dy):
+                continue
+            jumpPoint = jump(x, y, dx, dy)
+            if jumpPoint is None or jumpPoint in closed:
+                continue
+            cost = costs[position] + abs(jumpPoint[0] - x) + abs(jumpPoint[1] - y)
+            if cost < costs.get(jumpPoint, float('inf')):
+                costs[jumpPoint] = cost
+                parents[jumpPoint] = position
+                heapq.heappush(frontier, (cost + util.manhattanDistance(jumpPoint, goal), count, jumpPoint, (dx, dy)))
+                count += 1
+    if goal not in parents:
+        return []
+
+    path = []
+    position = goal
+    while parents[position] is not None:
+        previous = parents[position]
+        dx, dy = position[0] - previous[0], position[1] - previous[1]
+        action = Directions.EAST if dx > 0 else Directions.WEST if dx < 0 else \
+            Directions.NORTH if dy > 0 else Directions.SOUTH
+        path.extend([action] * (abs(dx) + abs(dy)))
+        position = previous
+    path.reverse()
+    return path
+
+
+def _iterativeDeepening(problem: 'SearchProblem', heuristic: Callable, maxNodes: int) -> List[str]:
+    """Run IDA*, remembering the cheapest cost found for up to maxNodes states per iteration.
+
+    Records the largest number of nodes held at once (the current path, the
+    successors still to try along it and the remembered states) in
+    problem._peakNodes.
+    """
+    start = problem.getStartState()
+    problem._peakNodes = 1
+    if problem.isGoalState(start):
+        return []
+    threshold = heuristic(start, problem)
+    while True:
+        nextThreshold = float('inf')
+        costs: Dict[Any, float] = {start: 0}  # Only used when maxNodes > 0
+        states, actions, pathCosts = [start], [], [0]
+        onPath = {start}
+        successors = problem.getSuccessors(start)
+        stack = [[successors, 0]]
+        pending = len(successors)
+        while stack:
+            top = stack[-1]
+            successors, index = top
+            if index == len(successors):
+                stack.pop()
+                onPath.discard(states.pop())
+                pathCosts.pop()
+                if actions:
+                    actions.pop()
+                continue
+            top[1] = index + 1
+            pending -= 1
+            successor, action, stepCost = successors[index]
+            if successor in onPath:
+                continue
+            cost = pathCosts[-1] + stepCost
+            estimate = cost + heuristic(successor, problem)
+            if estimate > threshold:
+                nextThreshold = min(nextThreshold, estimate)
+                continue
+            if maxNodes:
+                # A state reached as cheaply before in this iteration has been searched already
+                previousCost = costs.get(successor)
+                if previousCost is not None and previousCost <= cost:
+                    continue
+                if previousCost is not None or len(costs) < maxNodes:
+                    costs[successor] = cost
+            if problem.isGoalState(successor):
+                return actions + [action]
+            states.append(successor)
+            actions.append(action)
+            pathCosts.append(cost)
+            onPath.add(successor)
+            successors = problem.getSuccessors(successor)
+            stack.append([successors, 0])
+            pending += len(successors)
+            held = len(states) + pending + (len(costs) if maxNodes else 0)
+            if held > problem._peakNodes:
+                problem._peakNodes = held
+        if nextThreshold == float('inf'):
+            return []
+        threshold = nextThreshold
+
+
+def idaStarSearch(problem: 'SearchProblem', heuristic: Callable = nullHeuristic) -> List[str]:
+    """Search with iterative deepening A* (IDA*).
+    
+    Runs depth-first searches bounded by f(n) = g(n) + h(n), raising the bound
+    each time to the smallest f that exceeded it, until a goal is found. Memory
+    is only the current path and the successors still to try along it, so it
+    stays small on state spaces far too large for aStarSearch, at the price of
+    re-expanding nodes: every iteration starts over, and states reachable by
+    several paths are searched once per path (see memoryBoundedAStarSearch).
+    The largest number of nodes held at once is recorded in problem._peakNodes.
+    
+    Args:
+        problem: A SearchProblem instance defining the search space
+        heuristic: A consistent estimate of the remaining cost to goal (default: nullHeuristic)
+        
+    Returns:
+        List[str]: A sequence of actions that reaches the goal state with optimal cost,
+                  or empty list if no solution exists
+    """
+    return _iterativeDeepening(problem, heuristic, 0)
+
+
+def memoryBoundedAStarSearch(problem: 'SearchProblem', heuristic: Callable = nullHeuristic,
+                             maxNodes: int = 100000) -> List[str]:
+    """Search with IDA* plus a transposition table of at most maxNodes states.
+    
+    Like idaStarSearch, but each iteration also remembers the cheapest cost at
+    which it reached each state, for up to maxNodes states, and skips any
+    state it reaches again at no lower cost. On state spaces with many
+    paths to the same state, such as mazes, this removes most of IDA*'s
+    repeated work, while memory stays bounded by maxNodes plus the current path.
+    The result is still optimal. The largest number of nodes held at once,
+    table included, is recorded in problem._peakNodes.
+    
+    Args:
+        problem: A SearchProblem instance defining the search space
+        heuristic: A consistent estimate of the remaining cost to goal (default: nullHeuristic)
+        maxNodes: Maximum number of states to remember per iteration
+        
+    Returns:
+        List[str]: A sequence of actions that reaches the goal state with optimal cost,
+                  or empty list if no solution exists
+    """
+    if maxNodes < 1:
+        raise ValueError(f'maxNodes must be positive, not {maxNodes}')
+    return _iterativeDeepening(problem, heuristic, maxNodes)
+
+
+def anytimeRepairingAStarSearch(problem: 'SearchProblem', heuristic: Callable = nullHeuristic,
+                                timeLimit: float = 1.0, initialWeight: float = 3.0,
+                                weightStep: float = 0.5) -> List[str]:
+    """Search with anytime repairing A* (ARA*) until a deadline.
+    
+    Starts with weighted A*, ordering the frontier by g(n) + w * h(n) with
+    w = initialWeight, which quickly finds a path costing at most w times the
+    optimum. While time remains, w is lowered by weightStep and the search is
+    resumed rather than restarted: costs found so far are kept, and only the
+    states whose cost improved after they were expanded are queued again. With
+    w = 1 the path found is optimal and the search stops early.
+    
+    The first path is always searched for to completion; timeLimit only cuts
+    the improvements short, in which case the best path found so far is
+    returned. The bound on its suboptimality (cost over optimal cost) proved
+    by the last completed search is recorded in problem._suboptimality.
+    
+    Args:
+        problem: A SearchProblem instance defining the search space
+        heuristic: A consistent estimate of the remaining cost to goal (default: nullHeuristic)
+        timeLimit: Seconds after which to stop improving the path
+        initialWeight: Heuristic weight of the first search, at least 1
+        weightStep: Amount to lower the weight by after each search
+        
+    Returns:
+        List[str]: A sequence of actions that reaches the goal state, or empty list
+                  if no solution exists
+    """
+    if initialWeight < 1 or weightStep <= 0:
+        raise ValueError('initialWeight must be at least 1 and weightStep positive')
+    deadline = time.perf_counter() + timeLimit
+    start = problem.getStartState()
+    problem._suboptimality = 1.0
+    if problem.isGoalState(start):
+        return []
+    problem._suboptimality = float('inf')
+    # Each reached state maps to [cost, heuristic, parent, action, status], where status is
+    # OPEN while it waits in the frontier, GOAL, or the number of the search that expanded it
+    OPEN, GOAL = -1, -2
+    nodes: Dict[Any, list] = {start: [0, heuristic(start, problem), None, None, OPEN]}
+    goal, goalCost = None, float('inf')
+    weight = initialWeight
+    counter = itertools.count()
+    frontier = [(weight * nodes[start][1], next(counter), start)]
+    inconsistent = set()
+    for iteration in itertools.count():
+        # Expand until no frontier state could lead to a cheaper path to the goal
+        outOfTime = False
+        while frontier:
+            key, _, state = frontier[0]
+            node = nodes[state]
+            if node[4] != OPEN or key != node[0] + weight * node[1]:
+                heapq.heappop(frontier)  # Expanded or requeued at a lower cost since
+                continue
+            if key >= goalCost:
+                break
+            # Only the searches after the first, which has a path to fall back on, may be cut short
+            if problem._suboptimality < float('inf') and time.perf_counter() > deadline:
+                outOfTime = True
+                break
+            heapq.heappop(frontier)
+            node[4] = iteration
+            cost = node[0]
+            for successor, action, stepCost in problem.getSuccessors(state):
+                successorCost = cost + stepCost
+                successorNode = nodes.get(successor)
+                if successorNode is None:
+                    if problem.isGoalState(successor):
+                        successorNode = nodes[successor] = [successorCost, 0, state, action, GOAL]
+                    else:
+                        successorNode = nodes[successor] = [successorCost, heuristic(successor, problem),
+                                                            state, action, OPEN]
+                elif successorCost < successorNode[0]:
+                    successorNode[0], successorNode[2], successorNode[3] = successorCost, state, action
+                    if successorNode[4] == iteration:
+                        inconsistent.add(successor)
+                        continue
+                    if successorNode[4] != GOAL:
+                        successorNode[4] = OPEN
+                else:
+                    continue
+                if successorNode[4] == GOAL:
+                    if successorCost < goalCost:
+                        goal, goalCost = successor, successorCost
+                    continue
+                heapq.heappush(frontier, (successorCost + weight * successorNode[1], next(counter), successor))
+        if goal is None:
+            return []
+        path = []
+        node = nodes[goal]
+        while node[2] is not None:
+            path.append(node[3])
+            node = nodes[node[2]]
+        path.reverse()
+        if outOfTime:
+            # The path may have improved, but only the last completed search bounds it
+            return path
+        waiting = [state for state, node in nodes.items() if node[4] == OPEN] + list(inconsistent)
+        lowerBound = min((nodes[state][0] + nodes[state][1] for state in waiting), default=goalCost)
+        problem._suboptimality = max(1.0, min(weight, goalCost / lowerBound)) if lowerBound > 0 else weight
+        if problem._suboptimality == 1 or time.perf_counter() > deadline:
+            return path
+        # Lower the weight and requeue the states whose cost improved after expansion
+        weight = max(1.0, weight - weightStep)
+        frontier = []
+        for state in waiting:
+            node = nodes[state]
+            node[4] = OPEN
+            frontier.append((node[0] + weight * node[1], next(counter), state))
+        heapq.heapify(frontier)
+        inconsistent = set()
+
+
+# Number of nodes a worker of hashDistributedAStarSearch expands, or sends another worker at once
+DISTRIBUTED_BATCH = 64
+
+
+def _owner(state: Any, workers: int) -> int:
+    """Return the worker of hashDistributedAStarSearch that owns a state.
+
+    The state's hash is mixed by hashing it in a tuple first, because the
+    low bits of some hashes, such as those of packed int states, vary little.
+    """
+    return hash((state,)) % workers
+
+
+def _hashDistributedWorker(index: int, problem: 'SearchProblem', heuristic: Callable, inboxes: List[Any],
+                           results: Any, lock: Any, pending: Any, idle: Any, done: Any, incumbent: Any) -> None:
+    """Run worker index of hashDistributedAStarSearch until told to stop.
+
+    The worker searches the states that _owner assigns to it, until the
+    search is done. It then answers the calling process's
+    requests for its expansion count and goal, and for the parents of its
+    states, so the path can be traced back.
+
+    Args:
+        index: Number of this worker
+        problem: The search problem
+        heuristic: A consistent estimate of the remaining cost to goal
+        inboxes: Each worker's queue of node batches, and of requests once done
+        results: Queue of messages to the calling process
+        lock: Guards pending, idle and done, and the updates of incumbent
+        pending: Number of node batches sent but not yet taken
+        idle: Per worker, 1 while it has no node left that could lead to a cheaper goal
+        done: Set to 1 once the search is over
+        incumbent: Cost of the cheapest goal found by any worker
+    """
+    workers = len(inboxes)
+    inbox = inboxes[index]
+    costs: Dict[Any, float] = {}
+    # State -> (the state it was reached from, action between them)
+    parents: Dict[Any, Tuple[Any, Any]] = {}
+    frontier: List[Tuple[float, int, float, Any]] = []
+    counter = itertools.count()
+    outboxes: List[List[Tuple[Any, float, Any, Any]]] = [[] for _ in range(workers)]
+    expanded = 0
+    goal, goalCost = None, float('inf')
+    # A request from the calling process that came before this worker saw that the search was done
+    requests: List[Tuple[Any, ...]] = []
+
+    def receive(batch: List[Tuple[Any, float, Any, Any]]) -> None:
+        for state, cost, parent, action in batch:
+            if cost < costs.get(state, float('inf')):
+                costs[state] = cost
+                parents[state] = (parent, action)
+                heapq.heappush(frontier, (cost + heuristic(state, problem), next(counter), cost, state))
+
+    def send(owner: int) -> None:
+        with lock:
+            pending.value += 1
+        inboxes[owner].put(outboxes[owner])
+        outboxes[owner] = []
+
+    try:
+        while not done.value:
+            while True:
+                try:
+                    batch = inbox.get_nowait()
+                except queue.Empty:
+                    break
+                if not isinstance(batch, list):
+                    requests.append(batch)
+                    break
+                with lock:
+                    idle[index] = 0
+                    pending.value -= 1
+                receive(batch)
+            if requests:
+                break
+            for _ in range(DISTRIBUTED_BATCH):
+                if not frontier or frontier[0][0] >= incumbent.value:
+                    break
+                _, _, cost, state = heapq.heappop(frontier)
+                if cost > costs[state]:
+                    continue  # Reached more cheaply since
+                if problem.isGoalState(state):
+                    if cost < goalCost:
+                        goal, goalCost = state, cost
+                        with lock:
+                            incumbent.value = min(incumbent.value, cost)
+                    continue
+                expanded += 1
+                for successor, action, stepCost in problem.getSuccessors(state):
+                    successorCost = cost + stepCost
+                    if successorCost >= incumbent.value:
+                        continue
+                    owner = _owner(successor, workers)
+                    if owner == index:
+                        receive([(successor, successorCost, state, action)])
+                    else:
+                        outboxes[owner].append((successor, successorCost, state, action))
+                        if len(outboxes[owner]) >= DISTRIBUTED_BATCH:
+                            send(owner)
+            for owner in range(workers):
+                if outboxes[owner]:
+                    send(owner)
+            if frontier and frontier[0][0] < incumbent.value:
+                continue
+            # Nothing left here could lead to a cheaper goal, so wait for nodes from other workers.
+            # The search is over once every worker waits and no nodes are on their way.
+            frontier.clear()
+            with lock:
+                idle[index] = 1
+                if pending.value == 0 and all(idle) and not done.value:
+                    done.value = 1
+                    results.put(('done',))
+            while not done.value:
+                try:
+                    batch = inbox.get(timeout=0.01)
+                except queue.Empty:
+                    continue
+                if not isinstance(batch, list):
+                    requests.append(batch)
+                    break
+                with lock:
+                    idle[index] = 0
+                    pending.value -= 1
+                receive(batch)
+                break
+    except Exception:
+        import traceback
+        with lock:
+            done.value = 1
+        results.put(('error', traceback.format_exc()))
+
+    while True:
+        message = requests.pop() if requests else inbox.get()
+        if isinstance(message, list):
+            continue  # Nodes still on their way when another worker failed
+        if message[0] == 'stop':
+            return
+        if message[0] == 'report':
+            results.put(('report', expanded, goalCost, goal))
+        elif message[0] == 'parent':
+            results.put(('parent', parents[message[1]]))
+
+
+def hashDistributedAStarSearch(problem: 'SearchProblem', heuristic: Callable = nullHeuristic,
+                               workers: Optional[int] = None) -> List[str]:
+    """Search with hash distributed A* (HDA*) in several worker processes.
+    
+    Every state belongs to one worker, chosen by its hash. Each worker runs A*
+    over its own states: it keeps their frontier and cheapest known costs,
+    and sends the successors it generates for other workers' states to their
+    queues, in batches. A goal found by any worker bounds the cost of the
+    rest: nodes that cannot lead to a cheaper goal are dropped. The search is
+    over once no worker holds such a node and no batch is on its way, at
+    which point the cheapest goal found is optimal, as with serial A*. The
+    path is then traced back through the workers that own its states.
+    
+    Workers are forked where possible, so the problem and heuristic need not
+    be picklable, but states and actions are sent between processes and must
+    be. Each worker has its own copy of the problem, so anything a heuristic
+    stores in it stays per worker; problem._expanded is increased by the
+    expansions of every worker.
+    
+    Args:
+        problem: A SearchProblem instance defining the search space
+        heuristic: A consistent estimate of the remaining cost to goal (default: nullHeuristic)
+        workers: Number of worker processes (default: the number of CPUs)
+        
+    Returns:
+        List[str]: A sequence of actions that reaches the goal state with optimal cost,
+                  or empty list if no solution exists
+    """
+    import multiprocessing
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f'workers must be positive, not {workers}')
+    start = problem.getStartState()
+    if problem.isGoalState(start):
+        return []
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    lock = context.Lock()
+    pending = context.RawValue('i', 1)
+    idle = context.RawArray('b', [1] * workers)
+    done = context.RawValue('b', 0)
+    incumbent = context.RawValue('d', float('inf'))
+    inboxes = [context.Queue() for _ in range(workers)]
+    results = context.Queue()
+    processes = [context.Process(target=_hashDistributedWorker, daemon=True,
+                                 args=(index, problem, heuristic, inboxes, results,
+                                       lock, pending, idle, done, incumbent))
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+
+    def result() -> Tuple[Any, ...]:
+        while True:
+            try:
+                message = results.get(timeout=0.1)
+            except queue.Empty:
+                if not all(process.is_alive() for process in processes):
+                    raise RuntimeError('A search worker exited unexpectedly')
+                continue
+            if message[0] == 'error':
+                raise RuntimeError(f'A search worker failed:\n{message[1]}')
+            return message
+
+    try:
+        inboxes[_owner(start, workers)].put([(start, 0, None, None)])
+        result()
+        for inbox in inboxes:
+            inbox.put(('report',))
+        reports = [result() for _ in range(workers)]
+        if hasattr(problem, '_expanded'):
+            problem._expanded += sum(report[1] for report in reports)
+        _, _, goalCost, goal = min(reports, key=lambda report: report[2])
+        path = []
+        if goalCost < float('inf'):
+            state = goal
+            while True:
+                inboxes[_owner(state, workers)].put(('parent', state))
+                state, action = result()[1]
+                if state is None:
+                    break
+                path.append(action)
+            path.reverse()
+        return path
+    finally:
+        done.value = 1
+        for inbox in inboxes:
+            inbox.put(('stop',))
+        for process in processes:
+            process.join()
+
+
+# Approximate bytes a closed set spends per state, besides the state itself
+SET_ENTRY_BYTES = 32
+# Frontier classes in util that SearchInstrument.run records the pushes and pops of
+FRONTIER_CLASSES = ('Stack', 'Queue', 'PriorityQueue', 'PriorityQueueWithFunction')
+
+
+def _estimateBytes(obj: Any) -> int:
+    """Estimate the memory an object takes, counting what containers hold and objects' attributes."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (tuple, list, set, frozenset)):
+        return size + sum(_estimateBytes(item) for item in obj)
+    if isinstance(obj, dict):
+        return size + sum(_estimateBytes(key) + _estimateBytes(value) for key, value in obj.items())
+    if isinstance(obj, (int, float, str, bytes)) or obj is None:
+        return size
+    # One level only, so that shared structures such as layouts are not counted
+    values = list(getattr(obj, '__dict__', {}).values())
+    values += [getattr(obj, name) for name in getattr(type(obj), '__slots__', ()) if hasattr(obj, name)]
+    return size + sum(sys.getsizeof(value) for value in values)
+
+
+class SearchInstrument:
+    """Records what a search does, to find where its time and memory go.
+    
+    Search functions report events to record: 'push' and 'pop' as items
+    enter and leave the frontier, 'expand' as a state's successors are
+    generated, 'goal' for each goal test and 'duplicate' for a state reached
+    again after it was expanded. run reports them for any search function,
+    student code included, by wrapping the problem and the frontier classes
+    in util; search functions with frontiers of their own can report pushes
+    and pops themselves, as bidirectionalSearch does for the problem's
+    instrument attribute.
+    
+    The results are the count and time of each kind of event, the peak
+    frontier size, the closed set size (states expanded) with an estimate of
+    the memory the search held, and the order states were expanded in. They
+    can be written as a JSON summary, a CSV profile of the frontier over the
+    expansions, or a search trace of the expanded cells (game.writeSearchTrace)
+    for graphicsDisplay's drawExpandedCells to replay.
+    
+    Attributes:
+        counts: Number of events of each kind
+        seconds: Time spent on each kind of event, and on the heuristic if timed
+        frontier: Number of items in the frontier
+        peakFrontier: Largest number of items in the frontier at once
+        closed: States expanded
+        expansions: (seconds since the search started, frontier size, state) per expansion
+        elapsed: Seconds the last run took
+        problem: The problem of the last run
+    """
+
+    EVENTS = ('push', 'pop', 'expand', 'goal', 'duplicate')
+    SAMPLE_EVERY = 256  # Every how many pushes or expansions the item's size is estimated
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget everything recorded so far."""
+        self.counts: Dict[str, int] = {event: 0 for event in self.EVENTS}
+        self.seconds: Dict[str, float] = {event: 0.0 for event in self.EVENTS}
+        self.frontier = self.peakFrontier = 0
+        self.closed: set = set()
+        self.expansions: List[Tuple[float, int, Any]] = []
+        self.stateBytes: List[int] = []
+        self.itemBytes: List[int] = []
+        self.elapsed = 0.0
+        self.problem: Any = None
+        self.startTime = time.perf_counter()
+
+    def record(self, event: str, item: Any = None, seconds: float = 0.0) -> None:
+        """Record an event of a search.
+        
+        Args:
+            event: One of EVENTS
+            item: The item pushed or popped, or the state expanded, goal tested
+                or found again
+            seconds: Time the event took
+            
+        Raises:
+            ValueError: If event is not one of EVENTS
+        """
+        if event not in self.counts:
+            raise ValueError(f'Unknown search event {event!r}; choose from {", ".join(self.EVENTS)}')
+        self.counts[event] += 1
+        self.seconds[event] += seconds
+        if event == 'push':
+            self.frontier += 1
+            if self.frontier > self.peakFrontier:
+                self.peakFrontier = self.frontier
+            if self.counts['push'] % self.SAMPLE_EVERY == 1:
+                self.itemBytes.append(_estimateBytes(item))
+        elif event == 'pop':
+            self.frontier -= 1
+        elif event == 'expand':
+            try:
+                if item in self.closed:
+                    self.counts['expand'] -= 1
+                    self.seconds['expand'] -= seconds
+                    self.record('duplicate', item, seconds)
+                    return
+                self.closed.add(item)
+            except TypeError:
+                pass  # Unhashable states are not checked for duplicates
+            self.expansions.append((time.perf_counter() - self.startTime, self.frontier, item))
+            if self.counts['expand'] % self.SAMPLE_EVERY == 1:
+                self.stateBytes.append(_estimateBytes(item))
+
+    def timed(self, phase: str, function: Callable) -> Callable:
+        """Wrap a function, such as a heuristic, so that its calls are timed as phase."""
+        def call(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.seconds[phase] = self.seconds.get(phase, 0.0) + time.perf_counter() - start
+        return call
+
+    def run(self, searchFunction: Callable, problem: 'SearchProblem', **options: Any) -> List[str]:
+        """Run a search function, recording the events of its search.
+        
+        The search function is given an InstrumentedProblem in place of the
+        problem. While it runs, the FRONTIER_CLASSES are replaced, in util and
+        in this module, by subclasses that record pushes and pops. A heuristic
+        option is timed as 'heuristic'.
+        
+        Args:
+            searchFunction: Search function taking the problem and options
+            problem: The search problem
+            options: Further arguments for the search function
+            
+        Returns:
+            List[str]: The actions the search function returned
+        """
+        if 'heuristic' in options:
+            options['heuristic'] = self.timed('heuristic', options['heuristic'])
+        self.problem = problem
+        modules = [util.__dict__, globals()]
+        replaced = [(namespace, name, namespace[name]) for namespace in modules
+                    for name in FRONTIER_CLASSES if name in namespace]
+        frontiers = {name: self._frontierClass(getattr(util, name)) for name in FRONTIER_CLASSES}
+        for namespace, name, _ in replaced:
+            namespace[name] = frontiers[name]
+        self.startTime = time.perf_counter()
+        try:
+            return searchFunction(InstrumentedProblem(problem, self), **options)
+        finally:
+            self.elapsed += time.perf_counter() - self.startTime
+            for namespace, name, frontierClass in replaced:
+                namespace[name] = frontierClass
+
+    def _frontierClass(self, frontierClass: type) -> type:
+        """Make a subclass of a frontier class that records its pushes and pops."""
+        instrument = self
+
+        class Frontier(frontierClass):
+            def push(self, *args: Any) -> None:
+                start = time.perf_counter()
+                frontierClass.push(self, *args)
+                instrument.record('push', args[0], time.perf_counter() - start)
+
+            def pop(self) -> Any:
+                start = time.perf_counter()
+                item = frontierClass.pop(self)
+                instrument.record('pop', item, time.perf_counter() - start)
+                return item
+
+        Frontier.__name__ = Frontier.__qualname__ = frontierClass.__name__
+        return Frontier
+
+    def estimatedBytes(self) -> int:
+        """Estimate the memory the closed set and the frontier took at their largest."""
+        stateBytes = sum(self.stateBytes) / len(self.stateBytes) if self.stateBytes else 0
+        itemBytes = sum(self.itemBytes) / len(self.itemBytes) if self.itemBytes else 0
+        return int(len(self.closed) * (stateBytes + SET_ENTRY_BYTES) + self.peakFrontier * (itemBytes + 8))
+
+    def summary(self) -> Dict[str, Any]:
+        """Get the totals recorded, as a dict that can be written as JSON."""
+        elapsed = self.elapsed or time.perf_counter() - self.startTime
+        seconds = dict(self.seconds)
+        seconds['other'] = max(0.0, elapsed - sum(seconds.values()))
+        seconds['total'] = elapsed
+        return {
+            'events': dict(self.counts),
+            'seconds': seconds,
+            'expansionsPerSecond': self.counts['expand'] / elapsed if elapsed else 0.0,
+            'peakFrontier': self.peakFrontier,
+            'closedStates': len(self.closed),
+            'estimatedBytes': self.estimatedBytes(),
+        }
+
+    def writeJson(self, fileName: str) -> None:
+        """Write the summary to a JSON file."""
+        with open(fileName, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+            f.write('\n')
+
+    def writeCsv(self, fileName: str) -> None:
+        """Write one row per expansion, with its time and the frontier size then, to a CSV file."""
+        with open(fileName, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['expansion', 'seconds', 'frontier', 'state'])
+            for order, (seconds, frontier, state) in enumerate(self.expansions):
+                writer.writerow([order, f'{seconds:.6f}', frontier, state])
+
+    def writeTrace(self, fileName: str) -> None:
+        """Write the cells of the expanded states, in order, to a search trace file.
+        
+        The cell of a state is the state itself for position problems, its
+        first element for states such as FoodSearchProblem's, which start with
+        Pacman's position, and found through the problem's toGridState for
+        compact states. States without a cell are left out.
+        """
+        toGridState = getattr(self.problem, 'toGridState', None)
+        cells = []
+        for _, _, state in self.expansions:
+            if toGridState is not None:
+                state = toGridState(state)
+            if isinstance(state, tuple) and state and isinstance(state[0], tuple):
+                state = state[0]
+            if isinstance(state, tuple) and len(state) == 2 and all(isinstance(c, int) for c in state):
+                cells.append(state)
+        game.writeSearchTrace(fileName, cells)
+
+    def __str__(self) -> str:
+        summary = self.summary()
+        seconds = summary['seconds']
+        phases = ', '.join(f'{phase} {seconds[phase]:.3f}s' for phase in seconds if phase != 'total')
+        return (f'{summary["expansionsPerSecond"]:.0f} expansions/s, peak frontier {self.peakFrontier}, '
+                f'{len(self.closed)} closed states, ~{summary["estimatedBytes"] / 1024:.0f} KB; {phases}')
+
+
+class InstrumentedProblem(SearchProblem):
+    """A search problem that reports its goal tests and expansions to a SearchInstrument.
+    
+    Every other attribute is the wrapped problem's, and setting one sets the
+    wrapped problem's, so search functions and heuristics can use it in
+    place of the problem.
+    
+    Attributes:
+        problem: The wrapped search problem
+        instrument: The SearchInstrument that events are reported to
+    """
+
+    def __init__(self, problem: 'SearchProblem', instrument: SearchInstrument) -> None:
+        object.__setattr__(self, 'problem', problem)
+        object.__setattr__(self, 'instrument', instrument)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.problem, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.problem, name, value)
+
+    def getStartState(self) -> Any:
+        return self.problem.getStartState()
+
+    def isGoalState(self, state: Any) -> bool:
+        start = time.perf_counter()
+        isGoal = self.problem.isGoalState(state)
+        self.instrument.record('goal', state, time.perf_counter() - start)
+        return isGoal
+
+    def getSuccessors(self, state: Any) -> List[Tuple[Any, str, float]]:
+        start = time.perf_counter()
+        successors = self.problem.getSuccessors(state)
+        self.instrument.record('expand', state, time.perf_counter() - start)
+        return successors
+
+    def getPredecessors(self, state: Any) -> List[Tuple[Any, str, float]]:
+        start = time.perf_counter()
+        predecessors = self.problem.getPredecessors(state)
+        self.instrument.record('expand', state, time.perf_counter() - start)
+        return predecessors
+
+    def getCostOfActions(self, actions: List[str]) -> float:
+        return self.problem.getCostOfActions(actions)
+
+
 # Abbreviations - Common search algorithm aliases with type hints
 bfs: Callable[[SearchProblem], List[str]] = breadthFirstSearch
 dfs: Callable[[SearchProblem], List[str]] = depthFirstSearch 
 astar: Callable[[SearchProblem, Callable], List[str]] = aStarSearch
 ucs: Callable[[SearchProblem], List[str]] = uniformCostSearch
+bds: Callable[[SearchProblem], List[str]] = bidirectionalSearch
+jps: Callable[[SearchProblem], List[str]] = jumpPointSearch
+idastar: Callable[[SearchProblem, Callable], List[str]] = idaStarSearch
+mbastar: Callable[[SearchProblem, Callable], List[str]] = memoryBoundedAStarSearch
+arastar: Callable[[SearchProblem, Callable], List[str]] = anytimeRepairingAStarSearch
+hdastar: Callable[[SearchProblem, Callable], List[str]] = hashDistributedAStarSearch
@@ -64,10 +64,11 @@ from math import dist
 from game import Directions
 from game import Agent
 from game import Actions
+from game import DotDistanceField
 import util
 import time
 import search
-from typing import List, Tuple, Any, Optional, Callable, Dict
+from typing import List, Tuple, Any, Optional, Callable, Dict, Iterable, Union
 
 
 class GoWestAgent(Agent):
@@ -101,29 +102,52 @@ class SearchAgent(Agent):
     Attributes:
         searchFunction (Callable): The search algorithm to use (e.g. DFS, BFS)
         searchType (Any): The type of search problem to solve
+        instrument (SearchInstrument): Records the search when a trace is asked for
+        heuristic (Callable): The heuristic, for search functions that take one
         actions (List[str]): The sequence of actions to reach the goal
         actionIndex (int): Index tracking current position in action sequence
     """
 
     def __init__(self, fn: str = 'depthFirstSearch', 
                  prob: str = 'PositionSearchProblem',
-                 heuristic: str = 'nullHeuristic') -> None:
+                 heuristic: str = 'nullHeuristic', timeLimit: Optional[str] = None,
+                 workers: Optional[str] = None, trace: Optional[str] = None) -> None:
         """Initialize the SearchAgent.
         
         Args:
             fn: Name of search function to use (default: 'depthFirstSearch')
             prob: Name of search problem type (default: 'PositionSearchProblem') 
             heuristic: Name of heuristic function (default: 'nullHeuristic')
+            timeLimit: Seconds the search function may take, for functions with a
+                timeLimit argument such as anytimeRepairingAStarSearch (default: their own)
+            workers: Number of processes to search with, for functions with a
+                workers argument such as hashDistributedAStarSearch (default: their own)
+            trace: Name, without extension, of the files to write a profile of the
+                search to: <trace>.json, <trace>.csv and <trace>.trace, which
+                pacman.py --trace replays (default: no profile)
             
         Raises:
-            AttributeError: If search function, problem, or heuristic not found
+            AttributeError: If search function, problem, or heuristic not found,
+                or a time limit or number of workers is given for a function
+                that does not take one
         """
         if fn not in dir(search):
             raise AttributeError(f'{fn} is not a search function in search.py.')
         func = getattr(search, fn)
+        options = {}
+        if timeLimit is not None:
+            if 'timeLimit' not in func.__code__.co_varnames:
+                raise AttributeError(f'{fn} does not take a time limit.')
+            options['timeLimit'] = float(timeLimit)
+        if workers is not None:
+            if 'workers' not in func.__code__.co_varnames:
+                raise AttributeError(f'{fn} does not take a number of workers.')
+            options['workers'] = int(workers)
+        self.trace = trace
+        self.instrument = search.SearchInstrument() if trace is not None else None
         if 'heuristic' not in func.__code__.co_varnames:
             print(f'[SearchAgent] using function {fn}')
-            self.searchFunction = func
+            self.searchFunction = lambda x: func(x, **options)
         else:
             if heuristic in globals().keys():
                 heur = globals()[heuristic]
@@ -132,7 +156,10 @@ class SearchAgent(Agent):
             else:
                 raise AttributeError(f'{heuristic} is not a function in searchAgents.py or search.py.')
             print(f'[SearchAgent] using function {fn} and heuristic {heuristic}')
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.heuristic = heur
+            if self.instrument is not None:
+                heur = self.instrument.timed('heuristic', heur)
+            self.searchFunction = lambda x: func(x, heuristic=gridStateHeuristic(heur, x), **options)
 
         if prob not in globals().keys() or not prob.endswith('Problem'):
             raise AttributeError(f'{prob} is not a search problem type in SearchAgents.py.')
@@ -155,11 +182,30 @@ class SearchAgent(Agent):
             raise Exception("No search function provided for SearchAgent")
         starttime = time.time()
         problem = self.searchType(state)
-        self.actions = self.searchFunction(problem)
+        instrument = getattr(self, 'instrument', None)
+        if instrument is not None:
+            instrument.clear()
+            self.actions = instrument.run(self.searchFunction, problem)
+        else:
+            self.actions = self.searchFunction(problem)
+        if hasattr(problem, 'expandActions'):
+            self.actions = problem.expandActions(self.actions)
         totalCost = problem.getCostOfActions(self.actions)
         print(f'Path found with total cost of {totalCost} in {time.time() - starttime:.1f} seconds')
         if '_expanded' in dir(problem): 
             print(f'Search nodes expanded: {problem._expanded}')
+        if '_peakNodes' in dir(problem):
+            print(f'Peak search nodes in memory: {problem._peakNodes}')
+        if '_suboptimality' in dir(problem):
+            print(f'Path cost at most {problem._suboptimality:.2f} times optimal')
+        if isinstance(getattr(self, 'heuristic', None), util.HeuristicCache):
+            print(f'Heuristic cache: {self.heuristic}')
+        if instrument is not None:
+            print(f'Search profile: {instrument}')
+            instrument.writeJson(f'{self.trace}.json')
+            instrument.writeCsv(f'{self.trace}.csv')
+            instrument.writeTrace(f'{self.trace}.trace')
+            print(f'Search profile written to {self.trace}.json, {self.trace}.csv and {self.trace}.trace')
 
     def getAction(self, state: Any) -> str:
         """Return next action in the stored path.
@@ -179,6 +225,23 @@ class SearchAgent(Agent):
         else:
             return Directions.STOP
 
+def gridStateHeuristic(heuristic: Callable, problem: Any) -> Callable:
+    """Let a heuristic written for grid states score the states of a compact problem.
+    
+    Args:
+        heuristic: Heuristic taking (state, problem)
+        problem: Search problem the heuristic will be used on
+        
+    Returns:
+        Callable: The heuristic itself, or for problems with a toGridState method
+            (such as CompactFoodSearchProblem) a heuristic that converts each
+            state to grid form before scoring it
+    """
+    toGridState = getattr(problem, 'toGridState', None)
+    if toGridState is None:
+        return heuristic
+    return lambda state, problem=problem: heuristic(toGridState(state), problem)
+
 class PositionSearchProblem(search.SearchProblem):
     """A search problem for finding paths to a particular position on the Pacman board.
     
@@ -187,6 +250,7 @@ class PositionSearchProblem(search.SearchProblem):
     
     Attributes:
         walls: 2D array of booleans indicating wall positions
+        moveTable: Legal moves from each position, shared by the layout
         startState: Initial (x,y) position of Pacman
         goal: Target (x,y) position to reach
         costFn: Function that returns cost for moving to a position
@@ -210,6 +274,7 @@ class PositionSearchProblem(search.SearchProblem):
             visualize: Whether to visualize search progress
         """
         self.walls = gameState.getWalls()
+        self.moveTable = gameState.data.layout.getMoveTable()
         self.startState = gameState.getPacmanPosition()
         if start is not None: 
             self.startState = start
@@ -266,15 +331,9 @@ class PositionSearchProblem(search.SearchProblem):
         Returns:
             List of (successor, action, cost) tuples
         """
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x, y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append((nextState, action, cost))
+        costFn = self.costFn
+        successors = [(nextState, action, costFn(nextState))
+                      for action, nextState in self.moveTable.getSuccessors(state)]
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -284,6 +343,38 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def getGoalState(self) -> Tuple[int, int]:
+        """Return the goal state, for bidirectional search.
+        
+        Returns:
+            Goal (x,y) position
+        """
+        return self.goal
+
+    def getPredecessors(self, state: Tuple[int, int]) -> List[Tuple[Tuple[int, int], str, float]]:
+        """Get the states that lead to a state, for searching backward from the goal.
+        
+        Moves are reversible, so the predecessors are the successors, each with the
+        action that leads from it back to state and the cost of entering state.
+        
+        Args:
+            state: Current (x,y) position
+            
+        Returns:
+            List of (predecessor, action from predecessor to state, cost) tuples
+        """
+        cost = self.costFn(state)
+        predecessors = [(previousState, Actions.reverseDirection(action), cost)
+                        for action, previousState in self.moveTable.getSuccessors(state)]
+
+        # Bookkeeping for display purposes
+        self._expanded += 1 # DO NOT CHANGE
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return predecessors
+
     def getCostOfActions(self, actions: Optional[List[str]]) -> float:
         """Calculate total cost of a sequence of actions.
         
@@ -307,6 +398,96 @@ class PositionSearchProblem(search.SearchProblem):
         return cost
 
         
+class CorridorPositionSearchProblem(PositionSearchProblem):
+    """A PositionSearchProblem that moves from junction to junction.
+    
+    Searches the CorridorGraph of the maze, whose nodes are its junctions, dead
+    ends, start and goal: each successor follows a whole corridor, its action is
+    the tuple of moves along it and its cost is the cost of every cell entered.
+    UCS and A* (with any heuristic for PositionSearchProblem, since states are
+    still positions) return paths of the same cost as on PositionSearchProblem
+    while expanding far fewer nodes; BFS minimizes the number of corridors
+    rather than of moves. expandActions turns the search result back into
+    single moves, which SearchAgent does automatically, e.g.
+    -p SearchAgent -a fn=ucs,prob=CorridorPositionSearchProblem
+    
+    Attributes:
+        graph: The layout's CorridorGraph, with the start and goal made nodes
+    """
+
+    def __init__(self, gameState: Any, costFn: Callable = lambda x: 1, 
+                 goal: Tuple[int, int] = (1,1), start: Optional[Tuple[int, int]] = None, 
+                 warn: bool = True, visualize: bool = True) -> None:
+        """Initialize the problem and contract the corridors of its maze.
+        
+        Args:
+            gameState: A GameState object representing game state
+            costFn: Function that returns cost for moving to a position
+            goal: Target (x,y) position to reach
+            start: Optional starting position, defaults to Pacman's position
+            warn: Whether to show warning for invalid maze configurations
+            visualize: Whether to visualize search progress
+        """
+        super().__init__(gameState, costFn, goal, start, warn, visualize)
+        self.graph = gameState.data.layout.getCorridorGraph().withNodes((self.startState, goal))
+
+    def getSuccessors(self, state: Tuple[int, int]) -> List[Tuple[Tuple[int, int], Tuple[str, ...], float]]:
+        """Get the nodes at the far end of each corridor out of a node.
+        
+        Args:
+            state: Current (x,y) node position
+            
+        Returns:
+            List of (next node, actions along the corridor, cost of the corridor) tuples
+        """
+        costFn = self.costFn
+        successors = [(nextNode, actions, sum(map(costFn, cells)))
+                      for nextNode, actions, cells in self.graph.edges[state]]
+
+        # Bookkeeping for display purposes
+        self._expanded += 1 # DO NOT CHANGE
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return successors
+
+    def getPredecessors(self, state: Tuple[int, int]) -> List[Tuple[Tuple[int, int], Tuple[str, ...], float]]:
+        """Get the nodes at the far end of each corridor into a node.
+        
+        Args:
+            state: Current (x,y) node position
+            
+        Returns:
+            List of (previous node, actions along the corridor to state, cost of the corridor) tuples
+        """
+        costFn, reverse = self.costFn, Actions.reverseDirection
+        predecessors = [(previousNode, tuple(reverse(action) for action in reversed(actions)),
+                         sum(map(costFn, cells[-2::-1])) + costFn(state))
+                        for previousNode, actions, cells in self.graph.edges[state]]
+
+        # Bookkeeping for display purposes
+        self._expanded += 1 # DO NOT CHANGE
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return predecessors
+
+    def expandActions(self, path: Optional[List[Tuple[str, ...]]]) -> Optional[List[str]]:
+        """Turn a path of corridors into the single moves along them.
+        
+        Args:
+            path: Actions of the successors a search followed, one tuple per corridor
+            
+        Returns:
+            List of moves, or None if path is None
+        """
+        if path is None:
+            return None
+        return [action for actions in path for action in actions]
+
+        
 class StayEastSearchAgent(SearchAgent):
     """An agent that prefers positions on the East side of the board.
     
@@ -382,7 +563,7 @@ class CornersProblem(search.SearchProblem):
     """A search problem that finds paths through all four corners of a layout.
     
     This search problem requires finding a path that visits all four corners of the maze.
-    The state space consists of Pacman's position and the list of corners visited so far.
+    The state space consists of Pacman's position and the corners visited so far.
     
     Attributes:
         walls: Grid of maze walls
@@ -409,18 +590,18 @@ class CornersProblem(search.SearchProblem):
         
         "*** YOUR CODE HERE ***"
 
-    def getStartState(self) -> Tuple[Tuple[int, int], List[Tuple[int, int]]]:
+    def getStartState(self) -> Any:
         """Get the initial search state.
         
         Returns:
             Tuple containing:
                 - Current position as (x,y) coordinates
-                - Empty list of visited corners
+                - The corners visited so far
         """
         "*** YOUR CODE HERE ***"
         util.raiseNotDefined()
 
-    def isGoalState(self, state: Tuple[Tuple[int, int], List[Tuple[int, int]]]) -> bool:
+    def isGoalState(self, state: Any) -> bool:
         """Check if current state is a goal state.
         
         A goal state is reached when all four corners have been visited.
@@ -434,7 +615,7 @@ class CornersProblem(search.SearchProblem):
         "*** YOUR CODE HERE ***"
         util.raiseNotDefined()
 
-    def getSuccessors(self, state: Tuple[Tuple[int, int], List[Tuple[int, int]]]) -> List[Tuple[Tuple[Tuple[int, int], List[Tuple[int, int]]], str, int]]:
+    def getSuccessors(self, state: Any) -> List[Tuple[Any, str, int]]:
         """Get successor states and their associated actions and costs.
         
         Args:
@@ -477,8 +658,7 @@ class CornersProblem(search.SearchProblem):
         return len(actions)
 
 
-def cornersHeuristic(state: Tuple[Tuple[int, int], List[Tuple[int, int]]], 
-                     problem: 'CornersProblem') -> float:
+def cornersHeuristic(state: Any, problem: 'CornersProblem') -> float:
     """Calculate an admissible heuristic for the CornersProblem.
     
     This heuristic estimates the minimum distance needed to visit all unvisited corners
@@ -487,11 +667,15 @@ def cornersHeuristic(state: Tuple[Tuple[int, int], List[Tuple[int, int]]],
     Args:
         state: Current search state containing:
             - Position as (x,y) tuple
-            - List of visited corner coordinates
+            - The corners visited so far
         problem: The CornersProblem instance for this layout
             
     Returns:
         float: A lower bound on the shortest path distance to visit all remaining corners
+        
+    Note:
+        Decorating the heuristic with @util.memoizeHeuristic() keeps its recent
+        values, for states reached again, with bounded memory.
     """
     corners = problem.corners # These are the corner coordinates
     walls = problem.walls # These are the walls of the maze, as a Grid (game.py)
@@ -526,6 +710,7 @@ class FoodSearchProblem:
     Attributes:
         start (Tuple[Tuple[int, int], Grid]): Initial state with Pacman position and food grid
         walls (Grid): Grid indicating wall locations
+        moveTable (MoveTable): Legal moves from each position, shared by the layout
         startingGameState (GameState): Initial game state
         _expanded (int): Number of search nodes expanded
         heuristicInfo (Dict): Storage for heuristic computations
@@ -538,6 +723,7 @@ class FoodSearchProblem:
         """
         self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
         self.walls = startingGameState.getWalls()
+        self.moveTable = startingGameState.data.layout.getMoveTable()
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # Storage for heuristic computations
@@ -577,14 +763,10 @@ class FoodSearchProblem:
         """
         successors = []
         self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
+        for direction, (nextx, nexty) in self.moveTable.getSuccessors(state[0]):
+            nextFood = state[1].copy()
+            nextFood[nextx][nexty] = False
+            successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
         return successors
 
     def getCostOfActions(self, actions: List[str]) -> int:
@@ -596,7 +778,7 @@ class FoodSearchProblem:
         Returns:
             int: Total cost (999999 if sequence includes illegal moves)
         """
-        x,y = self.getStartState()[0]
+        x,y = self.start[0]
         cost = 0
         for action in actions:
             dx, dy = Actions.directionToVector(action)
@@ -606,6 +788,115 @@ class FoodSearchProblem:
             cost += 1
         return cost
 
+class CompactFoodSearchProblem(FoodSearchProblem):
+    """A FoodSearchProblem whose states are single ints.
+    
+    A state packs Pacman's cell id x * height + y (as in BitGrid and MoveTable)
+    into its low cellBits bits, above which bit i is set while foodCells[i]
+    still holds food: state = foodMask << cellBits | cell. Such states are far
+    cheaper to hash and to keep in a closed set than (position, Grid) pairs,
+    and successors are found by table lookups.
+    
+    toGridState and fromGridState convert between the two forms. SearchAgent
+    passes grid states to its heuristic when it is given this problem, so
+    heuristics written for FoodSearchProblem work unchanged, e.g.
+    -p SearchAgent -a fn=astar,prob=CompactFoodSearchProblem,heuristic=foodHeuristic
+    
+    Attributes:
+        start (Tuple[Tuple[int, int], Grid]): Initial state in grid form
+        compactStart (int): Initial state in compact form
+        height (int): Height of the maze, for cell ids
+        cellBits (int): Number of low state bits that hold the cell id
+        foodCells (List[Tuple[int, int]]): Cell of each food bit
+        foodMoves (List[Tuple[Tuple[str, int, int], ...]]): Per cell id, the
+            (action, next cell id, state bit of the food in the next cell) of each move
+    """
+    def __init__(self, startingGameState: 'GameState') -> None:
+        """Initialize the food search problem and its compact encoding.
+        
+        Args:
+            startingGameState: Initial game state containing maze layout and food
+        """
+        super().__init__(startingGameState)
+        width, height = self.walls.width, self.walls.height
+        self.height = height
+        self.cellBits = (width * height - 1).bit_length()
+        self.foodCells = self.start[1].asList()
+        foodBits = {cell: 1 << (self.cellBits + i) for i, cell in enumerate(self.foodCells)}
+        self.foodMoves = [tuple((direction, nextx * height + nexty, foodBits.get((nextx, nexty), 0))
+                                for direction, (nextx, nexty) in self.moveTable.getSuccessors((x, y)))
+                          for x in range(width) for y in range(height)]
+        self.compactStart = self.fromGridState(self.start)
+
+    def getStartState(self) -> int:
+        """Get the initial search state.
+        
+        Returns:
+            Pacman's starting cell id with every food bit set
+        """
+        return self.compactStart
+
+    def isGoalState(self, state: int) -> bool:
+        """Check if no food remains.
+        
+        Args:
+            state: Current compact state
+            
+        Returns:
+            bool: True if no food remains, False otherwise
+        """
+        return state >> self.cellBits == 0
+
+    def getSuccessors(self, state: int) -> List[Tuple[int, str, int]]:
+        """Get successor states and actions from current state.
+        
+        Args:
+            state: Current compact state
+            
+        Returns:
+            List of (successor state, action, cost of 1) tuples
+        """
+        self._expanded += 1 # DO NOT CHANGE
+        cell = state & ((1 << self.cellBits) - 1)
+        food = state ^ cell
+        return [((food & ~foodBit) | nextCell, direction, 1)
+                for direction, nextCell, foodBit in self.foodMoves[cell]]
+
+    def toGridState(self, state: int) -> Tuple[Tuple[int, int], 'Grid']:
+        """Convert a compact state to the (position, food grid) form of FoodSearchProblem.
+        
+        Args:
+            state: Compact state
+            
+        Returns:
+            Tuple of Pacman's (x,y) position and a grid of the remaining food
+        """
+        height = self.height
+        foodMask = state >> self.cellBits
+        food = self.start[1].copy()
+        food.bits = 0
+        for i, (x, y) in enumerate(self.foodCells):
+            if foodMask >> i & 1:
+                food.bits |= 1 << (x * height + y)
+        return divmod(state & ((1 << self.cellBits) - 1), height), food
+
+    def fromGridState(self, state: Tuple[Tuple[int, int], 'Grid']) -> int:
+        """Convert a (position, food grid) state to compact form.
+        
+        Args:
+            state: Tuple of Pacman's (x,y) position and a grid of the remaining food,
+                which may only hold food that the starting state had
+            
+        Returns:
+            The compact state
+        """
+        (x, y), food = state
+        foodMask = 0
+        for i, (foodx, foody) in enumerate(self.foodCells):
+            if food[foodx][foody]:
+                foodMask |= 1 << i
+        return foodMask << self.cellBits | x * self.height + y
+
 class AStarFoodSearchAgent(SearchAgent):
     """A SearchAgent that uses A* search with foodHeuristic for FoodSearchProblem.
     
@@ -621,6 +912,28 @@ class AStarFoodSearchAgent(SearchAgent):
         self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
         self.searchType = FoodSearchProblem
 
+def foodGridKey(food: 'Grid', problem: Any = None) -> Any:
+    """Get the key a util.HeuristicCache keeps a food grid's value under.
+    
+    For functions of the remaining food alone, such as the length of a tree
+    through the food, so that all states with the same food share a value.
+    
+    Example:
+        @util.memoizeHeuristic(key=foodGridKey)
+        def foodTreeCost(food, problem):
+            ...
+    
+    Args:
+        food: Grid of remaining food
+        problem: The search problem (unused)
+        
+    Returns:
+        The bits of a BitGrid, which take far less memory to keep than the
+        grid, or the grid itself
+    """
+    return getattr(food, 'bits', food)
+
+
 def foodHeuristic(state: Tuple[Tuple[int, int], 'Grid'], problem: 'FoodSearchProblem') -> float:
     """Calculate an admissible heuristic for the FoodSearchProblem.
     
@@ -642,6 +955,10 @@ def foodHeuristic(state: Tuple[Tuple[int, int], 'Grid'], problem: 'FoodSearchPro
         than UCS, the heuristic is not consistent/admissible.
         
         The problem.heuristicInfo dict can be used to cache values between calls.
+        Alternatively, a helper the heuristic calls on the food grid alone can
+        be decorated with @util.memoizeHeuristic(key=foodGridKey): it then keeps
+        its recent values with bounded memory, and every state with the same
+        food shares one value wherever Pacman is.
     """
     position, food_grid = state
     
@@ -656,9 +973,24 @@ class ClosestDotSearchAgent(SearchAgent):
     paths to the closest remaining food dot.
     
     Attributes:
+        incremental (bool): Whether to plan with a DotDistanceField kept up to
+            date between dots instead of calling findPathToClosestDot
         actions (List[str]): Sequence of actions to collect all food
         actionIndex (int): Current position in action sequence
     """
+    def __init__(self, incremental: Union[str, bool] = False, **kwargs: Any) -> None:
+        """Initialize the agent.
+        
+        Args:
+            incremental: Plan with an incremental DotDistanceField, which
+                repairs the distances to the remaining dots after each dot is
+                eaten instead of searching from scratch for the next one
+                (-a incremental=True; default: use findPathToClosestDot)
+            kwargs: Arguments for SearchAgent
+        """
+        super().__init__(**kwargs)
+        self.incremental = str(incremental).lower() in ('true', '1')
+
     def registerInitialState(self, state: 'GameState') -> None:
         """Find complete path to collect all food when first seeing game board.
         
@@ -673,8 +1005,15 @@ class ClosestDotSearchAgent(SearchAgent):
         """
         self.actions = []
         currentState = state
+        field = None
+        if self.incremental:
+            field = DotDistanceField(state.data.layout.getMoveTable(), state.getFood())
         while(currentState.getFood().count() > 0):
-            nextPathSegment = self.findPathToClosestDot(currentState)
+            if field is not None:
+                field.update(currentState.getFood())
+                nextPathSegment = field.getPathToClosestDot(currentState.getPacmanPosition())
+            else:
+                nextPathSegment = self.findPathToClosestDot(currentState)
             self.actions += nextPathSegment
             for action in nextPathSegment:
                 legal = currentState.getLegalActions()
@@ -734,6 +1073,7 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
         # Initialize PositionSearchProblem attributes
         self.walls = gameState.getWalls()
+        self.moveTable = gameState.data.layout.getMoveTable()
         self.startState = gameState.getPacmanPosition()
         self.costFn = lambda x: 1
         self._visited, self._visitedlist, self._expanded = {}, [], 0 # DO NOT CHANGE
@@ -756,8 +1096,12 @@ def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int],
                  gameState: 'GameState') -> int:
     """Calculate the shortest path distance between two points in the maze.
     
-    Uses breadth-first search to find the shortest path between points through
-    the maze, ignoring Pacman's current position in the game state.
+    Looks the distance up in the layout's DistanceTable, which holds the
+    breadth-first search distance between every two open cells, ignoring
+    Pacman's current position in the game state. The table is built (or read
+    from disk) the first time a layout is asked for a distance. As with the
+    breadth-first search it replaces, points with no path between them are
+    0 apart.
     
     Args:
         point1: Starting (x,y) coordinates
@@ -765,7 +1109,7 @@ def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int],
         gameState: GameState object containing maze layout
         
     Returns:
-        int: Length of shortest path between points
+        int: Length of shortest path between points, or 0 if there is none
         
     Raises:
         AssertionError: If either point1 or point2 is located on a wall
@@ -779,5 +1123,29 @@ def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int],
     walls = gameState.getWalls()
     assert not walls[x1][y1], f'point1 is a wall: {point1}'
     assert not walls[x2][y2], f'point2 is a wall: {point2}'
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return max(gameState.data.layout.getDistanceTable().getDistance(point1, point2), 0)
+
+
+def mazeDistances(point: Tuple[int, int], points: Iterable[Tuple[int, int]],
+                  gameState: 'GameState') -> List[int]:
+    """Calculate the shortest path distances from one point to many.
+    
+    The batch form of mazeDistance, for heuristics that measure from Pacman
+    to every remaining food or corner: one table row is looked up for all of
+    them. Like mazeDistance, goals that cannot be reached are 0 away.
+    
+    Args:
+        point: Starting (x,y) coordinates, not on a wall
+        points: Goal (x,y) coordinates, none of them on a wall
+        gameState: GameState object containing maze layout
+        
+    Returns:
+        List[int]: Length of the shortest path to each goal in order,
+            or 0 for goals that cannot be reached
+        
+    Example:
+        >>> mazeDistances((2,4), [(5,6), (2,5)], gameState)
+        [8, 1]
+    """
+    return [max(distance, 0) for distance in
+            gameState.data.layout.getDistanceTable().getDistances(point, points)]
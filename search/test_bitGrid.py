@@ -0,0 +1,102 @@
+"""Tests for the int-backed BitGrid.
+
+Run with:
+    python -m unittest test_bitGrid
+
+Original Licensing Information:
+You are free to use or extend these projects for educational purposes provided that
+(1) you do not distribute or publish solutions
+(2) you retain this notice
+(3) you provide clear attribution to UC Berkeley, including a link to http://ai.berkeley.edu
+
+Original Attribution:
+The Pacman AI projects were developed at UC Berkeley.
+Core projects and autograders created by John DeNero (denero@cs.berkeley.edu)
+and Dan Klein (klein@cs.berkeley.edu).
+Student side autograding added by Brad Miller, Nick Hay, and Pieter Abbeel (pabbeel@cs.berkeley.edu).
+"""
+
+import random
+import unittest
+
+import layout
+from game import BitGrid, Grid
+
+
+def randomGrids(width: int, height: int, seed: int) -> tuple[Grid, BitGrid]:
+    """Build a list-backed Grid and a BitGrid holding the same random cells."""
+    rng = random.Random(seed)
+    grid = Grid(width, height)
+    bitGrid = BitGrid(width, height)
+    for x in range(width):
+        for y in range(height):
+            value = rng.random() < 0.4
+            grid[x][y] = value
+            bitGrid[x][y] = value
+    return grid, bitGrid
+
+
+class BitGridTest(unittest.TestCase):
+
+    def testMatchesGrid(self) -> None:
+        for seed in range(5):
+            grid, bitGrid = randomGrids(7, 5, seed)
+            self.assertEqual(bitGrid, grid)
+            self.assertEqual(grid, bitGrid)
+            self.assertEqual(hash(bitGrid), hash(grid))
+            self.assertEqual(bitGrid.asList(), grid.asList())
+            self.assertEqual(bitGrid.asList(False), grid.asList(False))
+            self.assertEqual(bitGrid.count(), grid.count())
+            self.assertEqual(bitGrid.count(False), grid.count(False))
+            self.assertEqual(str(bitGrid), str(grid))
+            self.assertEqual(bitGrid.packBits(), grid.packBits())
+            self.assertEqual(BitGrid.fromGrid(grid), bitGrid)
+
+    def testPackBitsRoundTrip(self) -> None:
+        _, bitGrid = randomGrids(9, 8, 1)
+        self.assertEqual(BitGrid(9, 8, bitRepresentation=bitGrid.packBits()[2:]), bitGrid)
+
+    def testCopyIsIndependent(self) -> None:
+        _, bitGrid = randomGrids(4, 4, 2)
+        copy = bitGrid.copy()
+        copy[0][0] = not copy[0][0]
+        self.assertNotEqual(copy, bitGrid)
+        self.assertNotEqual(copy[0][0], bitGrid[0][0])
+
+    def testDataWritesThrough(self) -> None:
+        grid, bitGrid = randomGrids(5, 3, 3)
+        grid.data[2][1] = bitGrid.data[2][1] = True
+        grid.data[4] = [True, False, True]
+        bitGrid.data[4] = [True, False, True]
+        self.assertEqual(bitGrid, grid)
+        self.assertEqual(bitGrid.data, grid.data)
+        with self.assertRaises(ValueError):
+            bitGrid.data[0] = [True]
+
+    def testColumnBehavesLikeList(self) -> None:
+        grid, bitGrid = randomGrids(3, 6, 4)
+        for x in range(3):
+            column, bitColumn = grid[x], bitGrid[x]
+            self.assertEqual(len(bitColumn), len(column))
+            self.assertEqual(bitColumn[-1], column[-1])
+            self.assertEqual(bitColumn[1:4], column[1:4])
+            self.assertEqual(list(reversed(bitColumn)), list(reversed(column)))
+            self.assertEqual(bitColumn.count(True), column.count(True))
+            self.assertEqual(True in bitColumn, True in column)
+            self.assertEqual(bitColumn.copy(), column.copy())
+        with self.assertRaises(IndexError):
+            bitGrid[0][6] = True
+        with self.assertRaises(AttributeError):
+            bitGrid[0].append(True)
+
+    def testLayoutFood(self) -> None:
+        lay = layout.getLayout('mediumSearch')
+        self.assertIsInstance(lay.food, BitGrid)
+        food = lay.food.copy()
+        x, y = food.asList()[0]
+        food[x][y] = False
+        self.assertEqual(food.count(), lay.food.count() - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""Tests for the all-pairs maze distance table behind mazeDistance.
+
+Run with:
+    python -m unittest test_distanceTable
+
+Original Licensing Information:
+You are free to use or extend these projects for educational purposes provided that
+(1) you do not distribute or publish solutions
+(2) you retain this notice
+(3) you provide clear attribution to UC Berkeley, including a link to http://ai.berkeley.edu
+
+Original Attribution:
+The Pacman AI projects were developed at UC Berkeley.
+Core projects and autograders created by John DeNero (denero@cs.berkeley.edu)
+and Dan Klein (klein@cs.berkeley.edu).
+Student side autograding added by Brad Miller, Nick Hay, and Pieter Abbeel (pabbeel@cs.berkeley.edu).
+"""
+
+import os
+import tempfile
+import unittest
+from collections import deque
+
+import game
+import layout
+from game import Actions, DistanceTable, Grid
+from pacman import GameState
+from searchAgents import mazeDistance, mazeDistances
+
+# Two rooms with no way between them
+SPLIT_LAYOUT = [
+    '%%%%%%%',
+    '%P.%..%',
+    '%..%..%',
+    '%%%%%%%',
+]
+
+
+def bfsDistances(walls: Grid, start: tuple[int, int]) -> dict[tuple[int, int], int]:
+    """Get the maze distance from start to every cell it can reach."""
+    distances = {start: 0}
+    frontier = deque([start])
+    while frontier:
+        position = frontier.popleft()
+        for neighbor in Actions.getLegalNeighbors(position, walls):
+            if neighbor not in distances:
+                distances[neighbor] = distances[position] + 1
+                frontier.append(neighbor)
+    return distances
+
+
+def gameStateFor(lay: layout.Layout) -> GameState:
+    state = GameState()
+    state.initialize(lay, 0)
+    return state
+
+
+class DistanceTableTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cacheDir = tempfile.TemporaryDirectory()
+        self.savedCacheDir = game.DISTANCE_CACHE_DIR
+        game.DISTANCE_CACHE_DIR = self.cacheDir.name
+
+    def tearDown(self) -> None:
+        game.DISTANCE_CACHE_DIR = self.savedCacheDir
+        self.cacheDir.cleanup()
+
+    def testMatchesBreadthFirstSearch(self) -> None:
+        for layoutName in ['tinyMaze', 'mediumMaze', 'trickySearch']:
+            with self.subTest(layout=layoutName):
+                lay = layout.getLayout(layoutName)
+                table = DistanceTable(lay.walls, lay.getMoveTable())
+                for cell in table.cellIds:
+                    expected = bfsDistances(lay.walls, cell)
+                    for other in table.cellIds:
+                        self.assertEqual(table.getDistance(cell, other), expected.get(other, -1))
+
+    def testUnreachablePointsAreZeroApart(self) -> None:
+        state = gameStateFor(layout.Layout(SPLIT_LAYOUT))
+        self.assertEqual(mazeDistance((1, 2), (2, 1), state), 2)
+        self.assertEqual(mazeDistance((1, 2), (4, 1), state), 0)
+        self.assertEqual(mazeDistances((1, 2), [(2, 1), (5, 2)], state), [2, 0])
+
+    def testCacheRoundTrip(self) -> None:
+        lay = layout.getLayout('mediumMaze')
+        written = DistanceTable.forWalls(lay.walls, lay.getMoveTable())
+        self.assertEqual(len(os.listdir(self.cacheDir.name)), 1)
+        read = DistanceTable.forWalls(lay.walls, lay.getMoveTable())
+        self.assertEqual(read.distances, written.distances)
+
+    def testMismatchedCacheIsRecomputed(self) -> None:
+        lay = layout.getLayout('tinyMaze')
+        expected = DistanceTable(lay.walls, lay.getMoveTable()).distances
+        fileName = os.path.join(self.cacheDir.name, DistanceTable.wallsHash(lay.walls) + '.dist')
+        DistanceTable.forWalls(lay.walls, lay.getMoveTable())
+        with open(fileName, 'rb') as f:
+            header = f.readline()
+            data = bytearray(f.read())
+        data[0] ^= 1
+        with open(fileName, 'wb') as f:
+            f.write(header + data)
+        self.assertEqual(DistanceTable.forWalls(lay.walls, lay.getMoveTable()).distances, expected)
+
+        # A file holding another maze's distances under this maze's name
+        other = layout.getLayout('smallMaze')
+        otherName = os.path.join(self.cacheDir.name, DistanceTable.wallsHash(other.walls) + '.dist')
+        DistanceTable.forWalls(other.walls, other.getMoveTable())
+        os.replace(otherName, fileName)
+        self.assertEqual(DistanceTable.forWalls(lay.walls, lay.getMoveTable()).distances, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Tests for the incremental closest dot distance field.
+
+Run with:
+    python -m unittest test_dotDistanceField
+
+Original Licensing Information:
+You are free to use or extend these projects for educational purposes provided that
+(1) you do not distribute or publish solutions
+(2) you retain this notice
+(3) you provide clear attribution to UC Berkeley, including a link to http://ai.berkeley.edu
+
+Original Attribution:
+The Pacman AI projects were developed at UC Berkeley.
+Core projects and autograders created by John DeNero (denero@cs.berkeley.edu)
+and Dan Klein (klein@cs.berkeley.edu).
+Student side autograding added by Brad Miller, Nick Hay, and Pieter Abbeel (pabbeel@cs.berkeley.edu).
+"""
+
+import contextlib
+import io
+import random
+import unittest
+from collections import deque
+
+import layout
+from game import Actions, Directions, DotDistanceField, Grid
+from pacman import GameState
+from searchAgents import ClosestDotSearchAgent
+
+
+def nearestDotDistances(walls: Grid, food: Grid) -> dict[tuple[int, int], int]:
+    """Get the distance to the nearest dot from every cell that can reach one."""
+    distances = {position: 0 for position in food.asList()}
+    frontier = deque(distances)
+    while frontier:
+        position = frontier.popleft()
+        for neighbor in Actions.getLegalNeighbors(position, walls):
+            if neighbor not in distances:
+                distances[neighbor] = distances[position] + 1
+                frontier.append(neighbor)
+    return distances
+
+
+def legalMoves(position: tuple[int, int], walls: Grid) -> list[tuple[str, tuple[int, int]]]:
+    """Get the (action, next position) moves out of a cell in search order."""
+    x, y = position
+    moves = []
+    for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+        dx, dy = Actions.directionToVector(action)
+        if not walls[x + int(dx)][y + int(dy)]:
+            moves.append((action, (x + int(dx), y + int(dy))))
+    return moves
+
+
+def dottedLayout(layoutName: str) -> layout.Layout:
+    """Get a layout with food in every open cell."""
+    return layout.Layout([row.replace(' ', '.') for row in layout.getLayout(layoutName).layoutText])
+
+
+class BreadthFirstClosestDotAgent(ClosestDotSearchAgent):
+    """ClosestDotSearchAgent with a breadth first search for every dot."""
+
+    def findPathToClosestDot(self, gameState: GameState) -> list[str]:
+        food, walls = gameState.getFood(), gameState.getWalls()
+        start = gameState.getPacmanPosition()
+        parents = {start: None}
+        frontier = deque([start])
+        while frontier:
+            position = frontier.popleft()
+            if food[position[0]][position[1]]:
+                path = []
+                while position != start:
+                    position, action = parents[position]
+                    path.append(action)
+                return path[::-1]
+            for action, successor in legalMoves(position, walls):
+                if successor not in parents:
+                    parents[successor] = (position, action)
+                    frontier.append(successor)
+        return []
+
+
+class DotDistanceFieldTest(unittest.TestCase):
+
+    def assertMatchesBreadthFirstSearch(self, field: DotDistanceField, walls: Grid, food: Grid) -> None:
+        expected = nearestDotDistances(walls, food)
+        for x in range(walls.width):
+            for y in range(walls.height):
+                if not walls[x][y]:
+                    self.assertEqual(field.getDistance((x, y)), expected.get((x, y), DotDistanceField.UNREACHABLE))
+
+    def testRepairMatchesBreadthFirstSearch(self) -> None:
+        rng = random.Random(0)
+        for layoutName in ['mediumMaze', 'bigSearch', 'openSearch']:
+            with self.subTest(layout=layoutName):
+                lay = dottedLayout(layoutName) if layoutName.endswith('Maze') else layout.getLayout(layoutName)
+                food = lay.food.copy()
+                field = DotDistanceField(lay.getMoveTable(), food)
+                self.assertMatchesBreadthFirstSearch(field, lay.walls, food)
+                openCells = lay.walls.asList(False)
+                for _ in range(60):
+                    dots = food.asList()
+                    if dots and rng.random() < 0.8:
+                        for x, y in rng.sample(dots, min(len(dots), rng.randint(1, 3))):
+                            food[x][y] = False
+                    else:
+                        x, y = rng.choice(openCells)
+                        food[x][y] = True
+                    field.update(food)
+                    self.assertMatchesBreadthFirstSearch(field, lay.walls, food)
+
+    def testPathReachesClosestDot(self) -> None:
+        lay = layout.getLayout('bigSearch')
+        field = DotDistanceField(lay.getMoveTable(), lay.food)
+        for position in lay.walls.asList(False):
+            path = field.getPathToClosestDot(position)
+            self.assertEqual(len(path), field.getDistance(position))
+            for action in path:
+                position = dict(legalMoves(position, lay.walls))[action]
+            self.assertTrue(lay.food[position[0]][position[1]])
+
+    def testUnreachableDots(self) -> None:
+        lay = layout.Layout(['%%%%%%%', '%P %..%', '%%%%%%%'])
+        field = DotDistanceField(lay.getMoveTable(), lay.food)
+        self.assertEqual(field.getDistance((1, 1)), DotDistanceField.UNREACHABLE)
+        self.assertEqual(field.getPathToClosestDot((1, 1)), [])
+
+    def testIncrementalAgentPlansLikeSearchAgent(self) -> None:
+        for layoutName in ['tinySearch', 'mediumSearch', 'bigSearch']:
+            with self.subTest(layout=layoutName):
+                state = GameState()
+                state.initialize(layout.getLayout(layoutName), 0)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    incremental = ClosestDotSearchAgent(incremental='True')
+                    incremental.registerInitialState(state)
+                    searching = BreadthFirstClosestDotAgent()
+                    searching.registerInitialState(state)
+                self.assertEqual(len(incremental.actions), len(searching.actions))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Tests for the bounded heuristic cache behind util.memoizeHeuristic.
+
+Run with:
+    python -m unittest test_heuristicCache
+
+Original Licensing Information:
+You are free to use or extend these projects for educational purposes provided that
+(1) you do not distribute or publish solutions
+(2) you retain this notice
+(3) you provide clear attribution to UC Berkeley, including a link to http://ai.berkeley.edu
+
+Original Attribution:
+The Pacman AI projects were developed at UC Berkeley.
+Core projects and autograders created by John DeNero (denero@cs.berkeley.edu)
+and Dan Klein (klein@cs.berkeley.edu).
+Student side autograding added by Brad Miller, Nick Hay, and Pieter Abbeel (pabbeel@cs.berkeley.edu).
+"""
+
+import gc
+import unittest
+
+import layout
+import util
+from pacman import GameState
+from searchAgents import FoodSearchProblem, foodGridKey
+
+
+class Problem:
+    """Stand-in search problem that can be weakly referenced."""
+
+
+class CountingHeuristic:
+    """Heuristic giving the sum of a state's items and counting its calls."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, state, problem) -> float:
+        self.calls += 1
+        return sum(state)
+
+
+class HeuristicCacheTest(unittest.TestCase):
+
+    def testHitsAndEviction(self) -> None:
+        heuristic = CountingHeuristic()
+        cache = util.HeuristicCache(heuristic, maxSize=2)
+        problem = Problem()
+        self.assertEqual(cache((1, 2), problem), 3)
+        self.assertEqual(cache((3, 4), problem), 7)
+        self.assertEqual(cache((1, 2), problem), 3)
+        # (3, 4) is now the least recently used value
+        self.assertEqual(cache((5, 6), problem), 11)
+        self.assertEqual(list(cache.values), [(1, 2), (5, 6)])
+        self.assertEqual(cache((3, 4), problem), 7)
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (1, 4, 2))
+        self.assertEqual(heuristic.calls, 4)
+
+    def testUnhashableStatesAreNotCached(self) -> None:
+        heuristic = CountingHeuristic()
+        cache = util.HeuristicCache(heuristic)
+        problem = Problem()
+        self.assertEqual(cache([1, 2], problem), 3)
+        self.assertEqual(cache([1, 2], problem), 3)
+        self.assertEqual(heuristic.calls, 2)
+        self.assertEqual(len(cache.values), 0)
+        self.assertEqual(cache.misses, 2)
+
+    def testNewProblemClearsValues(self) -> None:
+        heuristic = CountingHeuristic()
+        cache = util.HeuristicCache(heuristic)
+        first, second = Problem(), Problem()
+        cache((1,), first)
+        cache((1,), first)
+        cache((1,), second)
+        self.assertIs(cache.problem, second)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual(heuristic.calls, 2)
+        cache((1,), None)
+        self.assertIsNone(cache.problem)
+        self.assertEqual(cache.misses, 1)
+
+    def testProblemIsNotKeptAlive(self) -> None:
+        cache = util.HeuristicCache(CountingHeuristic())
+        problem = Problem()
+        cache((1,), problem)
+        del problem
+        gc.collect()
+        self.assertIsNone(cache.problem)
+
+    def testFoodGridKeySharesValuesAcrossPositions(self) -> None:
+        state = GameState()
+        state.initialize(layout.getLayout('trickySearch'), 0)
+        problem = FoodSearchProblem(state)
+        position, food = problem.getStartState()
+        cache = util.HeuristicCache(lambda state, problem: state[1].count(),
+                                    key=lambda state, problem: foodGridKey(state[1]))
+        for otherPosition in problem.walls.asList(False)[:10]:
+            self.assertEqual(cache((otherPosition, food), problem), food.count())
+        self.assertEqual((cache.hits, cache.misses), (9, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
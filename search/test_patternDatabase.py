@@ -0,0 +1,100 @@
+"""Tests for the additive pattern database heuristic of the eight puzzle.
+
+Run with:
+    python -m unittest test_patternDatabase
+
+Original Licensing Information:
+You are free to use or extend these projects for educational purposes provided that
+(1) you do not distribute or publish solutions
+(2) you retain this notice
+(3) you provide clear attribution to UC Berkeley, including a link to http://ai.berkeley.edu
+
+Original Attribution:
+The Pacman AI projects were developed at UC Berkeley.
+Core projects and autograders created by John DeNero (denero@cs.berkeley.edu)
+and Dan Klein (klein@cs.berkeley.edu).
+Student side autograding added by Brad Miller, Nick Hay, and Pieter Abbeel (pabbeel@cs.berkeley.edu).
+"""
+
+import math
+import os
+import tempfile
+import unittest
+
+import eightpuzzle
+from eightpuzzle import EightPuzzleState, PatternDatabase
+
+
+def movesToSolve(size: int) -> dict[EightPuzzleState, int]:
+    """Get the fewest moves that solve every puzzle of a size, by breadth first search back from the goal."""
+    goal = EightPuzzleState(list(range(size * size)))
+    distances = {goal: 0}
+    frontier = [goal]
+    while frontier:
+        nextFrontier = []
+        for puzzle in frontier:
+            for move in puzzle.legalMoves():
+                neighbor = puzzle.result(move)
+                if neighbor not in distances:
+                    distances[neighbor] = distances[puzzle] + 1
+                    nextFrontier.append(neighbor)
+        frontier = nextFrontier
+    return distances
+
+
+class PatternDatabaseTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cacheDir = tempfile.TemporaryDirectory()
+        self.savedCacheDir = eightpuzzle.PATTERN_CACHE_DIR
+        eightpuzzle.PATTERN_CACHE_DIR = self.cacheDir.name
+
+    def tearDown(self) -> None:
+        eightpuzzle.PATTERN_CACHE_DIR = self.savedCacheDir
+        self.cacheDir.cleanup()
+
+    def testAdmissibleAndConsistent(self) -> None:
+        for size in [2, 3]:
+            with self.subTest(size=size):
+                database = PatternDatabase(size)
+                distances = movesToSolve(size)
+                # Every solvable puzzle of the size is reached
+                self.assertEqual(len(distances), math.factorial(size * size) // 2)
+                for puzzle, moves in distances.items():
+                    estimate = database.getEstimate(puzzle)
+                    self.assertLessEqual(estimate, moves)
+                    for move in puzzle.legalMoves():
+                        self.assertLessEqual(abs(estimate - database.getEstimate(puzzle.result(move))), 1)
+                self.assertEqual(database.getEstimate(EightPuzzleState(list(range(size * size)))), 0)
+
+    def testCloserThanManhattanDistance(self) -> None:
+        database = PatternDatabase(3)
+        total = manhattanTotal = 0
+        for puzzle in movesToSolve(3):
+            cells = puzzle.cells
+            manhattan = sum(abs(row - tile // 3) + abs(col - tile % 3)
+                            for row in range(3) for col, tile in enumerate(cells[row]) if tile)
+            estimate = database.getEstimate(puzzle)
+            self.assertGreaterEqual(estimate, manhattan)
+            total += estimate
+            manhattanTotal += manhattan
+        self.assertGreater(total, manhattanTotal)
+
+    def testCachedTablesMatchBuiltTables(self) -> None:
+        built = PatternDatabase(3)
+        self.assertEqual(len(os.listdir(self.cacheDir.name)), len(built.groups))
+        loaded = PatternDatabase(3)
+        self.assertEqual([bytes(table) for table in loaded.tables], [bytes(table) for table in built.tables])
+        eightpuzzle.PATTERN_CACHE_DIR = None
+        inMemory = PatternDatabase(3)
+        self.assertEqual([bytes(table) for table in inMemory.tables], [bytes(table) for table in built.tables])
+
+    def testGroupsMustSplitTheTiles(self) -> None:
+        with self.assertRaises(ValueError):
+            PatternDatabase(3, ((1, 2, 3, 4), (4, 5, 6, 7, 8)))
+        with self.assertRaises(ValueError):
+            PatternDatabase(3, ((1, 2, 3), (5, 6, 7, 8)))
+
+
+if __name__ == '__main__':
+    unittest.main()
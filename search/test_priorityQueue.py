@@ -0,0 +1,171 @@
+"""Tests for the search project's PriorityQueue.
+
+Run with:
+    python -m unittest test_priorityQueue
+
+Original Licensing Information:
+You are free to use or extend these projects for educational purposes provided that
+(1) you do not distribute or publish solutions
+(2) you retain this notice
+(3) you provide clear attribution to UC Berkeley, including a link to http://ai.berkeley.edu
+
+Original Attribution:
+The Pacman AI projects were developed at UC Berkeley.
+Core projects and autograders created by John DeNero (denero@cs.berkeley.edu)
+and Dan Klein (klein@cs.berkeley.edu).
+Student side autograding added by Brad Miller, Nick Hay, and Pieter Abbeel (pabbeel@cs.berkeley.edu).
+"""
+
+import heapq
+import random
+import unittest
+from typing import Any, Callable
+
+import util
+
+
+class ScanningPriorityQueue:
+    """The PriorityQueue as it was before update was indexed: one heap, scanned by update."""
+
+    def __init__(self) -> None:
+        self.heap: list[tuple[float, int, Any]] = []
+        self.count = 0
+
+    def push(self, item: Any, priority: float) -> None:
+        heapq.heappush(self.heap, (priority, self.count, item))
+        self.count += 1
+
+    def pop(self) -> Any:
+        return heapq.heappop(self.heap)[2]
+
+    def isEmpty(self) -> bool:
+        return not self.heap
+
+    def update(self, item: Any, priority: float) -> None:
+        for index, (p, c, i) in enumerate(self.heap):
+            if i == item:
+                if p <= priority:
+                    break
+                del self.heap[index]
+                self.heap.append((priority, c, item))
+                heapq.heapify(self.heap)
+                break
+        else:
+            self.push(item, priority)
+
+
+def randomOperations(seed: int, numOperations: int,
+                     priority: Callable[[random.Random], float]) -> list[tuple[str, int, float]]:
+    """Get a random mix of update and pop operations on a few dozen items.
+
+    Items are only added by update, so none is ever in the queue twice.
+    """
+    rng = random.Random(seed)
+    operations = []
+    for _ in range(numOperations):
+        name = rng.choice(['update', 'update', 'pop'])
+        operations.append((name, rng.randrange(40), priority(rng)))
+    return operations
+
+
+def replay(queue: Any, operations: list[tuple[str, int, float]]) -> list[Any]:
+    """Apply operations to a queue, then empty it, and get every item popped in order."""
+    popped = []
+    for name, item, priority in operations:
+        if name == 'pop':
+            if not queue.isEmpty():
+                popped.append(queue.pop())
+        else:
+            queue.update(item, priority)
+    while not queue.isEmpty():
+        popped.append(queue.pop())
+    return popped
+
+
+class PriorityQueueTest(unittest.TestCase):
+
+    def testUpdateMatchesScanningQueue(self) -> None:
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                operations = randomOperations(seed, 300, lambda rng: rng.random() * 50)
+                self.assertEqual(replay(util.PriorityQueue(), operations),
+                                 replay(ScanningPriorityQueue(), operations))
+
+    def testUpdateLowersPriorityOnly(self) -> None:
+        queue = util.PriorityQueue()
+        queue.push('a', 5.5)
+        queue.push('b', 3.5)
+        queue.update('a', 1.5)
+        queue.update('b', 9.5)
+        queue.update('c', 2.5)
+        self.assertEqual([queue.pop() for _ in range(3)], ['a', 'c', 'b'])
+        self.assertTrue(queue.isEmpty())
+
+    def testLoweredItemKeepsItsPlaceAmongEqualPriorities(self) -> None:
+        queue = util.PriorityQueue()
+        queue.push('a', 4.5)
+        queue.push('b', 2.5)
+        queue.push('c', 2.5)
+        queue.update('a', 2.5)
+        self.assertEqual([queue.pop() for _ in range(3)], ['a', 'b', 'c'])
+
+    def testRemovedEntriesAreSkipped(self) -> None:
+        queue = util.PriorityQueue()
+        for item in range(10):
+            queue.push(item, 10.5 + item)
+        for item in range(10):
+            queue.update(item, 9.5 - item)
+        self.assertEqual(queue.removed, 10)
+        self.assertEqual(len(queue.heap), 10)
+        self.assertEqual([queue.pop() for _ in range(10)], list(range(9, -1, -1)))
+        self.assertTrue(queue.isEmpty())
+        with self.assertRaises(IndexError):
+            queue.pop()
+
+    def testUnhashableItems(self) -> None:
+        queue = util.PriorityQueue()
+        queue.push([1], 3.5)
+        queue.push([2], 2.5)
+        queue.update([1], 1.5)
+        self.assertEqual([queue.pop() for _ in range(2)], [[1], [2]])
+        self.assertTrue(queue.isEmpty())
+
+    def testHeapSnapshot(self) -> None:
+        queue = util.PriorityQueue()
+        for item, priority in [('a', 3.5), ('b', 1.5), ('c', 2.5)]:
+            queue.push(item, priority)
+        queue.update('a', 0.5)
+        heap = queue.heap
+        self.assertEqual([entry[2] for entry in heap], ['a', 'b', 'c'])
+        self.assertTrue(all(heap[(i - 1) // 2] <= heap[i] for i in range(1, len(heap))))
+
+    def testBucketsMatchScanningQueue(self) -> None:
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                operations = randomOperations(seed, 300, lambda rng: rng.randrange(30))
+                queue = util.PriorityQueue()
+                self.assertEqual(replay(queue, operations), replay(ScanningPriorityQueue(), operations))
+                self.assertIsNotNone(queue.buckets)
+
+    def testFirstFractionalPriorityMovesBucketsToHeap(self) -> None:
+        queue = util.PriorityQueue()
+        for item, priority in [('a', 3), ('b', 1.0), ('c', 3), ('d', 2)]:
+            queue.push(item, priority)
+        queue.update('c', 2)
+        self.assertEqual(queue.bucketed, 5)
+        self.assertEqual([entry[2] for entry in queue.heap], ['b', 'c', 'd', 'a'])
+        queue.push('e', 2.5)
+        self.assertIsNone(queue.buckets)
+        self.assertEqual([queue.pop() for _ in range(5)], ['b', 'c', 'd', 'e', 'a'])
+        self.assertTrue(queue.isEmpty())
+
+    def testMixedPrioritiesMatchScanningQueue(self) -> None:
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                operations = randomOperations(seed, 300, lambda rng: rng.randrange(30) + (rng.random() < 0.02) / 2)
+                self.assertEqual(replay(util.PriorityQueue(), operations),
+                                 replay(ScanningPriorityQueue(), operations))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+"""Tests that the search functions in search.py find optimal paths.
+
+Run with:
+    python -m unittest test_search
+
+Original Licensing Information:
+You are free to use or extend these projects for educational purposes provided that
+(1) you do not distribute or publish solutions
+(2) you retain this notice
+(3) you provide clear attribution to UC Berkeley, including a link to http://ai.berkeley.edu
+
+Original Attribution:
+The Pacman AI projects were developed at UC Berkeley.
+Core projects and autograders created by John DeNero (denero@cs.berkeley.edu)
+and Dan Klein (klein@cs.berkeley.edu).
+Student side autograding added by Brad Miller, Nick Hay, and Pieter Abbeel (pabbeel@cs.berkeley.edu).
+"""
+
+import heapq
+import itertools
+import random
+import unittest
+from typing import Any, Callable, Optional
+
+import layout
+import search
+import util
+from pacman import GameState
+from searchAgents import PositionSearchProblem, manhattanHeuristic
+
+# The mazes that ship in the layouts directory
+STOCK_MAZES = ['tinyMaze', 'smallMaze', 'mediumMaze', 'bigMaze', 'openMaze', 'contoursMaze']
+
+# Two rooms with no way between them
+SPLIT_LAYOUT = [
+    '%%%%%%%',
+    '%P %. %',
+    '%  %  %',
+    '%%%%%%%',
+]
+
+
+def mazeProblem(lay: layout.Layout, costFn: Callable[[tuple[int, int]], float] = lambda position: 1
+                ) -> PositionSearchProblem:
+    """Build the PositionSearchProblem from Pacman to the food of a maze, without any display."""
+    state = GameState()
+    state.initialize(lay, 0)
+    return PositionSearchProblem(state, costFn, goal=state.getFood().asList()[0], warn=False, visualize=False)
+
+
+def randomProblems(layoutName: str, numProblems: int, seed: int = 0) -> list[PositionSearchProblem]:
+    """Build PositionSearchProblems between random open cells of a layout."""
+    rng = random.Random(seed)
+    state = GameState()
+    state.initialize(layout.getLayout(layoutName), 0)
+    openCells = state.getWalls().asList(False)
+    return [PositionSearchProblem(state, start=start, goal=goal, warn=False, visualize=False)
+            for start, goal in (rng.sample(openCells, 2) for _ in range(numProblems))]
+
+
+def optimalCost(problem: Any) -> Optional[float]:
+    """Get the cost of a cheapest path to a goal by uniform cost search, or None if there is none."""
+    counter = itertools.count()
+    frontier = [(0, next(counter), problem.getStartState())]
+    costs = {problem.getStartState(): 0}
+    while frontier:
+        cost, _, state = heapq.heappop(frontier)
+        if cost > costs[state]:
+            continue
+        if problem.isGoalState(state):
+            return cost
+        for successor, _, stepCost in problem.getSuccessors(state):
+            if cost + stepCost < costs.get(successor, float('inf')):
+                costs[successor] = cost + stepCost
+                heapq.heappush(frontier, (cost + stepCost, next(counter), successor))
+    return None
+
+
+def reverseManhattanHeuristic(position: tuple[int, int], problem: PositionSearchProblem) -> int:
+    """The Manhattan distance from the start, for searching backward from the goal."""
+    return util.manhattanDistance(position, problem.getStartState())
+
+
+class OptimalityTest(unittest.TestCase):
+
+    def assertOptimal(self, searchFunction: Callable[[Any], list[str]], problem: Any) -> list[str]:
+        """Check that a search reaches a goal at the optimal cost, and return its path."""
+        expected = optimalCost(problem)
+        actions = searchFunction(problem)
+        state, cost = problem.getStartState(), 0
+        for action in actions:
+            successors = {a: (s, c) for s, a, c in problem.getSuccessors(state)}
+            self.assertIn(action, successors)
+            state, stepCost = successors[action]
+            cost += stepCost
+        self.assertTrue(problem.isGoalState(state))
+        self.assertAlmostEqual(cost, expected)
+        return actions
+
+    def testBidirectionalSearch(self) -> None:
+        for layoutName in STOCK_MAZES:
+            with self.subTest(layout=layoutName):
+                lay = layout.getLayout(layoutName)
+                self.assertOptimal(search.bidirectionalSearch, mazeProblem(lay))
+                self.assertOptimal(lambda problem: search.bidirectionalSearch(
+                    problem, manhattanHeuristic, reverseManhattanHeuristic), mazeProblem(lay))
+                for costFn in [lambda position: 0.5 ** position[0], lambda position: 2 ** position[0]]:
+                    self.assertOptimal(search.bidirectionalSearch, mazeProblem(lay, costFn))
+
+    def testBidirectionalSearchWithoutPath(self) -> None:
+        problem = mazeProblem(layout.Layout(SPLIT_LAYOUT))
+        self.assertEqual(search.bidirectionalSearch(problem), [])
+
+    def testJumpPointSearch(self) -> None:
+        for layoutName in STOCK_MAZES:
+            with self.subTest(layout=layoutName):
+                self.assertOptimal(search.jumpPointSearch, mazeProblem(layout.getLayout(layoutName)))
+        for layoutName in ['openMaze', 'openSearch', 'bigSearch', 'openClassic']:
+            for problem in randomProblems(layoutName, 20):
+                with self.subTest(layout=layoutName, start=problem.startState, goal=problem.goal):
+                    self.assertOptimal(search.jumpPointSearch, problem)
+
+    def testJumpPointSearchWithoutPath(self) -> None:
+        problem = mazeProblem(layout.Layout(SPLIT_LAYOUT))
+        self.assertEqual(search.jumpPointSearch(problem), [])
+
+    def testIdaStarSearch(self) -> None:
+        for layoutName in STOCK_MAZES:
+            with self.subTest(layout=layoutName):
+                lay = layout.getLayout(layoutName)
+                self.assertOptimal(lambda problem: search.idaStarSearch(problem, manhattanHeuristic), mazeProblem(lay))
+        self.assertEqual(search.idaStarSearch(mazeProblem(layout.Layout(SPLIT_LAYOUT))), [])
+
+    def testMemoryBoundedAStarSearch(self) -> None:
+        for layoutName in STOCK_MAZES:
+            for maxNodes in [1, 100, 100000]:
+                with self.subTest(layout=layoutName, maxNodes=maxNodes):
+                    lay = layout.getLayout(layoutName)
+                    self.assertOptimal(lambda problem: search.memoryBoundedAStarSearch(
+                        problem, manhattanHeuristic, maxNodes), mazeProblem(lay))
+        self.assertEqual(search.memoryBoundedAStarSearch(mazeProblem(layout.Layout(SPLIT_LAYOUT))), [])
+        with self.assertRaises(ValueError):
+            search.memoryBoundedAStarSearch(mazeProblem(layout.getLayout('tinyMaze')), maxNodes=0)
+
+    def testAnytimeRepairingAStarSearch(self) -> None:
+        for layoutName in STOCK_MAZES:
+            with self.subTest(layout=layoutName):
+                problem = mazeProblem(layout.getLayout(layoutName))
+                self.assertOptimal(lambda problem: search.anytimeRepairingAStarSearch(
+                    problem, manhattanHeuristic, timeLimit=60), problem)
+                self.assertEqual(problem._suboptimality, 1)
+        self.assertEqual(search.anytimeRepairingAStarSearch(mazeProblem(layout.Layout(SPLIT_LAYOUT))), [])
+        with self.assertRaises(ValueError):
+            search.anytimeRepairingAStarSearch(mazeProblem(layout.getLayout('tinyMaze')), initialWeight=0.5)
+
+    def testAnytimeRepairingAStarSearchOutOfTime(self) -> None:
+        # With no time to improve it, the first path is returned, within the proved bound
+        for layoutName in ['bigMaze', 'openMaze', 'bigSearch']:
+            for problem in randomProblems(layoutName, 10):
+                with self.subTest(layout=layoutName, start=problem.startState, goal=problem.goal):
+                    actions = search.anytimeRepairingAStarSearch(problem, manhattanHeuristic, timeLimit=0)
+                    cost, expected = problem.getCostOfActions(actions), optimalCost(problem)
+                    self.assertLessEqual(problem._suboptimality, 3)
+                    self.assertLessEqual(cost, problem._suboptimality * expected)
+
+    def testHashDistributedAStarSearch(self) -> None:
+        for layoutName in STOCK_MAZES:
+            for workers in [1, 3]:
+                with self.subTest(layout=layoutName, workers=workers):
+                    problem = mazeProblem(layout.getLayout(layoutName))
+                    self.assertOptimal(lambda problem: search.hashDistributedAStarSearch(
+                        problem, manhattanHeuristic, workers), problem)
+        for problem in randomProblems('bigSearch', 5):
+            with self.subTest(start=problem.startState, goal=problem.goal):
+                self.assertOptimal(lambda problem: search.hashDistributedAStarSearch(problem, workers=2), problem)
+        self.assertEqual(search.hashDistributedAStarSearch(mazeProblem(layout.Layout(SPLIT_LAYOUT)), workers=2), [])
+        with self.assertRaises(ValueError):
+            search.hashDistributedAStarSearch(mazeProblem(layout.getLayout('tinyMaze')), workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -29,9 +29,15 @@
 import sys
 import inspect
 import heapq, random
+import bisect
+import functools
+import signal
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
 
-from typing import Optional, Tuple, Any, List, Callable, Union, Dict
-import random
+from typing import Optional, Tuple, Any, List, Callable, Union, Dict, Deque, Iterator, TypeVar, ParamSpec
 
 class FixedRandom:
     """
@@ -179,8 +185,6 @@ class Stack:
         """
         return len(self.list) == 0
 
-from typing import Any, List, Optional
-
 class Queue:
     """A container with a first-in-first-out (FIFO) queuing policy."""
     
@@ -219,19 +223,59 @@ class Queue:
         return len(self.list) == 0
 
 
+# Item of the heap entries that update has superseded
+_REMOVED = object()
+
+
+def _entryCount(entry: List[Any]) -> int:
+    """Return the tie-breaking count of a [priority, count, item] entry."""
+    return entry[1]
+
+
 class PriorityQueue:
     """
     A queue that retrieves items based on their priority.
     
     Implements a priority queue data structure where each item has an associated priority.
-    Provides O(log n) push and O(log n) pop operations, with O(1) access to the lowest-priority item.
-    Lower numerical priority values are retrieved first.
+    Provides O(log n) push, pop and update operations, with O(1) access to the lowest-priority item.
+    Lower numerical priority values are retrieved first, and items of equal priority in the
+    order they were pushed.
+
+    While every priority is integral, as the path costs of most search problems are, entries
+    are kept in first-in-first-out buckets of equal priority, with a small heap of the distinct
+    priorities in use. Pushing and popping then rarely touch a heap at all. The first priority
+    that is not integral moves every entry to a single binary heap; the order items come out
+    in is the same either way.
+
+    The first call to update indexes the entries by item, and push and pop keep that index
+    from then on, so update finds an item without scanning the queue. Lowering the priority
+    of an item marks its old entry as removed and pushes a new one with the same tie-breaking
+    count; pop discards removed entries as they reach the front.
+
+    The heap attribute is a read-only snapshot of the queue, wherever its entries are kept.
     """
 
     def __init__(self) -> None:
         """Initialize an empty priority queue."""
-        self.heap: List[Tuple[float, int, Any]] = []  # (priority, count, item)
+        self._heap: List[List[Any]] = []  # [priority, count, item] entries once buckets are not used
         self.count: int = 0  # Used for tie-breaking
+        self.removed: int = 0  # Entries in the queue that update has superseded
+        self.entries: Optional[Dict[Any, List[List[Any]]]] = None  # item -> its entries, built by update
+        self.buckets: Optional[Dict[float, Deque[List[Any]]]] = {}  # priority -> entries by count; None once heap is used
+        self.priorities: List[float] = []  # Heap of the bucket priorities
+        self.bucketed: int = 0  # Entries in the buckets
+
+    @property
+    def heap(self) -> List[Tuple[float, int, Any]]:
+        """
+        Every item in the queue, as a heap of (priority, count, item) tuples.
+
+        The tuples are in the order the items will be popped, which also makes
+        the list a valid heap. Building the list takes O(n log n), so it is
+        meant for inspecting the queue rather than for searching.
+        """
+        return sorted((entry[0], entry[1], entry[2]) for entry in self._allEntries()
+                      if entry[2] is not _REMOVED)
 
     def push(self, item: Any, priority: float) -> None:
         """
@@ -241,9 +285,22 @@ class PriorityQueue:
             item: The item to add
             priority: Priority value (lower values = higher priority)
         """
-        entry = (priority, self.count, item)
-        heapq.heappush(self.heap, entry)
+        entry = [priority, self.count, item]
         self.count += 1
+        buckets = self.buckets
+        if buckets is None:
+            heapq.heappush(self._heap, entry)
+        elif priority.__class__ is int or (priority.__class__ is float and priority.is_integer()):
+            bucket = buckets.get(priority)
+            if bucket is None:
+                bucket = buckets[priority] = deque()
+                heapq.heappush(self.priorities, priority)
+            bucket.append(entry)
+            self.bucketed += 1
+        else:
+            self._insert(entry)
+        if self.entries is not None:
+            self._index(entry)
 
     def pop(self) -> Any:
         """
@@ -255,8 +312,27 @@ class PriorityQueue:
         Raises:
             IndexError: If queue is empty
         """
-        (_, _, item) = heapq.heappop(self.heap)
-        return item
+        if self.buckets is None:
+            entry = heapq.heappop(self._heap)
+            while entry[2] is _REMOVED:
+                self.removed -= 1
+                entry = heapq.heappop(self._heap)
+        else:
+            priorities = self.priorities
+            while True:
+                priority = priorities[0]
+                bucket = self.buckets[priority]
+                entry = bucket.popleft()
+                self.bucketed -= 1
+                if not bucket:
+                    del self.buckets[priority]
+                    heapq.heappop(priorities)
+                if entry[2] is not _REMOVED:
+                    break
+                self.removed -= 1
+        if self.entries is not None:
+            self._unindex(entry)
+        return entry[2]
 
     def isEmpty(self) -> bool:
         """
@@ -265,7 +341,7 @@ class PriorityQueue:
         Returns:
             True if queue is empty, False otherwise
         """
-        return len(self.heap) == 0
+        return len(self._heap) + self.bucketed == self.removed
 
     def update(self, item: Any, priority: float) -> None:
         """
@@ -274,24 +350,88 @@ class PriorityQueue:
         If item already in queue with higher priority, updates its priority.
         If item already in queue with equal or lower priority, does nothing.
         If item not in queue, adds it with the given priority.
+        An item pushed more than once is judged by its lowest priority.
         
         Args:
             item: The item to update
             priority: New priority value
         """
-        # If item already in priority queue with higher priority, update its priority
-        # If item already in priority queue with equal or lower priority, do nothing
-        # If item not in priority queue, do the same thing as self.push
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
-                break
-        else:
+        if self.entries is None:
+            self.entries = {}
+            for entry in self._allEntries():
+                if entry[2] is not _REMOVED:
+                    self._index(entry)
+        try:
+            entries = self.entries.get(item)
+        except TypeError:
+            # Unhashable items are not indexed
+            entries = [entry for entry in self._allEntries() if entry[2] == item]
+        if not entries:
             self.push(item, priority)
+            return
+        entry = min(entries)
+        if entry[0] <= priority:
+            return
+        self._unindex(entry)
+        entry[2] = _REMOVED
+        self.removed += 1
+        newEntry = [priority, entry[1], item]
+        self._insert(newEntry)
+        self._index(newEntry)
+
+    def _insert(self, entry: List[Any]) -> None:
+        """Add an entry to its bucket, or to the heap once priorities are not all integral."""
+        if self.buckets is not None:
+            priority = entry[0]
+            if priority.__class__ is int or (priority.__class__ is float and priority.is_integer()):
+                bucket = self.buckets.get(priority)
+                if bucket is None:
+                    bucket = self.buckets[priority] = deque()
+                    heapq.heappush(self.priorities, priority)
+                if bucket and bucket[-1][1] > entry[1]:
+                    # An entry lowered by update keeps its older count
+                    bucket.insert(bisect.bisect(bucket, entry[1], key=_entryCount), entry)
+                else:
+                    bucket.append(entry)
+                self.bucketed += 1
+                return
+            self._useHeap()
+        heapq.heappush(self._heap, entry)
+
+    def _useHeap(self) -> None:
+        """Move every entry from the buckets to the heap."""
+        for bucket in self.buckets.values():
+            self._heap.extend(bucket)
+        heapq.heapify(self._heap)
+        self.buckets = None
+        self.priorities = []
+        self.bucketed = 0
+
+    def _allEntries(self) -> Iterator[List[Any]]:
+        """Iterate over every entry in the queue, removed ones included."""
+        yield from self._heap
+        if self.buckets is not None:
+            for bucket in self.buckets.values():
+                yield from bucket
+
+    def _index(self, entry: List[Any]) -> None:
+        """Add an entry to the index of entries by item."""
+        try:
+            self.entries.setdefault(entry[2], []).append(entry)
+        except TypeError:
+            pass
+
+    def _unindex(self, entry: List[Any]) -> None:
+        """Remove an entry from the index of entries by item."""
+        try:
+            entries = self.entries.get(entry[2])
+        except TypeError:
+            return
+        if entries is not None:
+            entries.remove(entry)
+            if not entries:
+                del self.entries[entry[2]]
+
 
 class PriorityQueueWithFunction(PriorityQueue):
     """
@@ -321,6 +461,116 @@ class PriorityQueueWithFunction(PriorityQueue):
         priority = self.priorityFunction(item)
         super().push(item, priority)
 
+class HeuristicCache:
+    """
+    A heuristic(state, problem) that remembers the values it returned most recently.
+
+    Values are kept for at most maxSize states and the least recently used
+    one is dropped first, so memory stays bounded however large the search.
+    A value is keyed on key(state, problem) if a key function is given, else
+    on the state itself. Keys that cannot be hashed, such as states built from
+    lists, are not cached: the heuristic is simply called. The cache is
+    emptied whenever the heuristic is called with another problem, and holds
+    only a weak reference to the problem, so a finished search's problem can
+    still be freed. Use memoizeHeuristic to apply it as a decorator.
+
+    Attributes:
+        heuristic: The heuristic whose values are kept
+        maxSize: Number of values to keep at most
+        hits: Lookups answered from the cache since the problem last changed
+        misses: Lookups that called the heuristic since the problem last changed
+        evictions: Values dropped to stay within maxSize since the problem last changed
+    """
+
+    def __init__(self, heuristic: Callable[[Any, Any], float], maxSize: int = 100000,
+                 key: Optional[Callable[[Any, Any], Any]] = None) -> None:
+        """
+        Wrap a heuristic.
+
+        Args:
+            heuristic: Heuristic taking (state, problem)
+            maxSize: Number of values to keep at most
+            key: Function of (state, problem) giving the hashable key of a value,
+                e.g. to share one value between all states with the same food
+
+        Raises:
+            ValueError: If maxSize is not positive
+        """
+        if maxSize < 1:
+            raise ValueError(f'maxSize must be positive, not {maxSize}')
+        functools.update_wrapper(self, heuristic)
+        self.heuristic = heuristic
+        self.maxSize = maxSize
+        self.key = key
+        self.values: OrderedDict = OrderedDict()
+        self.problemRef: Callable[[], Any] = lambda: None
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def problem(self) -> Any:
+        """The problem the kept values belong to, or None if it has been freed."""
+        return self.problemRef()
+
+    def __call__(self, state: Any, problem: Any = None) -> float:
+        if self.problemRef() is not problem:
+            self.clear()
+            try:
+                self.problemRef = weakref.ref(problem)
+            except TypeError:
+                # None and other objects that cannot be weakly referenced
+                self.problemRef = lambda: problem
+        key = state if self.key is None else self.key(state, problem)
+        values = self.values
+        try:
+            value = values[key]
+        except KeyError:
+            self.misses += 1
+            value = values[key] = self.heuristic(state, problem)
+            if len(values) > self.maxSize:
+                values.popitem(last=False)
+                self.evictions += 1
+            return value
+        except TypeError:
+            # The key cannot be hashed, so there is nothing to keep it under
+            self.misses += 1
+            return self.heuristic(state, problem)
+        values.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def clear(self) -> None:
+        """
+        Forget every value and reset the counts.
+        """
+        self.values.clear()
+        self.problemRef = lambda: None
+        self.hits = self.misses = self.evictions = 0
+
+    def __str__(self) -> str:
+        lookups = self.hits + self.misses
+        hitRate = 100 * self.hits / lookups if lookups else 0
+        return (f'{self.hits} hits, {self.misses} misses ({hitRate:.1f}% hit rate), '
+                f'{self.evictions} evictions, {len(self.values)} values kept')
+
+def memoizeHeuristic(maxSize: int = 100000, key: Optional[Callable[[Any, Any], Any]] = None
+                     ) -> Callable[[Callable[[Any, Any], float]], HeuristicCache]:
+    """
+    Decorator that keeps a heuristic's recent values in a HeuristicCache.
+
+    Example:
+        @util.memoizeHeuristic(maxSize=50000)
+        def foodHeuristic(state, problem):
+            ...
+
+    Args:
+        maxSize: Number of values to keep at most
+        key: Function of (state, problem) giving the hashable key of a value
+
+    Returns:
+        Decorator wrapping a heuristic in a HeuristicCache
+    """
+    return lambda heuristic: HeuristicCache(heuristic, maxSize, key)
+
 def manhattanDistance(xy1: Tuple[int, int], xy2: Tuple[int, int]) -> int:
     """
     Calculate the Manhattan distance between two points.
@@ -563,10 +813,6 @@ def pause() -> None:
     """
     input("<Press enter/return to continue>")
 
-import signal
-import time
-from typing import Any, Callable, Optional, TypeVar, ParamSpec
-
 P = ParamSpec('P')  # For parameters
 R = TypeVar('R')    # For return type
 
@@ -575,37 +821,114 @@ class TimeoutFunctionException(Exception):
     pass
 
 
+class MoveTimer:
+    """
+    Enforces time limits with sub-second precision on many calls, such as the
+    moves of a game.
+
+    start() installs the SIGALRM handler once and each timed call only arms an
+    interval timer (setitimer). Outside the main thread (Windows, or worker
+    threads) a call is instead checked against a monotonic deadline when it
+    returns. A timer that was already running when start() was called, such as
+    an autograder's per-question limit, is suspended and resumed by stop().
+    Can be used as a context manager.
+    """
+
+    def __init__(self) -> None:
+        self.useAlarm = False
+        self._oldHandler: Any = None
+        self._outerDeadline: Optional[float] = None
+
+    def handle_timeout(self, signum: Optional[int] = None, frame: Optional[Any] = None) -> None:
+        """
+        Signal handler for timeout.
+
+        Args:
+            signum: Signal number (used by signal.signal)
+            frame: Current stack frame (used by signal.signal)
+
+        Raises:
+            TimeoutFunctionException: Always raised to indicate timeout
+        """
+        raise TimeoutFunctionException()
+
+    def start(self) -> None:
+        """
+        Install the SIGALRM handler if this thread can receive it.
+        """
+        self.useAlarm = hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+        if self.useAlarm:
+            remaining, _ = signal.setitimer(signal.ITIMER_REAL, 0)
+            self._outerDeadline = time.monotonic() + remaining if remaining > 0 else None
+            self._oldHandler = signal.signal(signal.SIGALRM, self.handle_timeout)
+
+    def stop(self) -> None:
+        """
+        Restore the previous SIGALRM handler and any suspended timer.
+        """
+        if self.useAlarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._oldHandler)
+            if self._outerDeadline is not None:
+                # A suspended timer that ran out in the meantime fires at once
+                signal.setitimer(signal.ITIMER_REAL, max(self._outerDeadline - time.monotonic(), 1e-6))
+            self.useAlarm = False
+
+    def __enter__(self) -> 'MoveTimer':
+        self.start()
+        return self
+
+    def __exit__(self, *excInfo: Any) -> None:
+        self.stop()
+
+    def timed(self, function: Callable[P, R], timeout: float) -> Callable[P, R]:
+        """
+        Wrap a function so that calls to it are limited in time.
+
+        Args:
+            function: The function to wrap
+            timeout: Number of seconds (possibly fractional) a call may take;
+                zero or less has already expired
+
+        Returns:
+            Wrapped function that raises TimeoutFunctionException on timeout
+        """
+        def call(*args: P.args, **kwargs: P.kwargs) -> R:
+            if timeout <= 0:
+                raise TimeoutFunctionException()
+            if self.useAlarm:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            start_time = time.monotonic()
+            result = function(*args, **kwargs)
+            if time.monotonic() - start_time >= timeout:
+                self.handle_timeout()
+            return result
+        return call
+
+
 class TimeoutFunction:
     """
     Wrapper class to timeout functions after a specified duration.
     
-    Handles both SIGALRM-based timeouts (Unix) and time-based fallback (Windows).
+    Every call sets up its own MoveTimer; use a MoveTimer directly to time
+    many calls.
     """
     
-    def __init__(self, function: Callable[P, R], timeout: int) -> None:
+    def __init__(self, function: Callable[P, R], timeout: float) -> None:
         """
         Initialize timeout wrapper.
         
         Args:
             function: The function to wrap
-            timeout: Number of seconds before timeout
+            timeout: Number of seconds (possibly fractional) before timeout
         """
         self.timeout = timeout
         self.function = function
 
-    def handle_timeout(self, signum: Optional[int] = None, frame: Optional[Any] = None) -> None:
-        """
-        Signal handler for timeout.
-        
-        Args:
-            signum: Signal number (used by signal.signal)
-            frame: Current stack frame (used by signal.signal)
-            
-        Raises:
-            TimeoutFunctionException: Always raised to indicate timeout
-        """
-        raise TimeoutFunctionException()
-
     def __call__(self, *args: P.args, **kwargs: P.kwargs) -> R:
         """
         Call wrapped function with timeout.
@@ -620,22 +943,8 @@ class TimeoutFunction:
         Raises:
             TimeoutFunctionException: If function execution exceeds timeout
         """
-        if hasattr(signal, 'SIGALRM'):
-            # Use SIGALRM if available (Unix)
-            old_handler = signal.signal(signal.SIGALRM, self.handle_timeout)
-            signal.alarm(self.timeout)
-            try:
-                result = self.function(*args, **kwargs)
-            finally:
-                signal.signal(signal.SIGALRM, old_handler)
-                signal.alarm(0)
-        else:
-            # Fallback for Windows
-            start_time = time.time()
-            result = self.function(*args, **kwargs)
-            if time.time() - start_time > self.timeout:
-                self.handle_timeout()
-        return result
+        with MoveTimer() as timer:
+            return timer.timed(self.function, self.timeout)(*args, **kwargs)
 
 
 # Global variables for output muting
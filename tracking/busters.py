@@ -390,8 +390,8 @@ class PacmanRules:
         """
         Returns a list of possible actions.
         """
-        return Actions.getPossibleActions(
-            state.getPacmanState().configuration, state.data.layout.walls
+        return state.data.layout.getMoveTable().getPossibleActions(
+            state.getPacmanState().configuration
         )
 
     @staticmethod
@@ -418,7 +418,7 @@ class GhostRules:
     @staticmethod
     def getLegalActions(state: GameState, ghostIndex: int) -> List[str]:
         conf = state.getGhostState(ghostIndex).configuration
-        return Actions.getPossibleActions(conf, state.data.layout.walls)
+        return state.data.layout.getMoveTable().getPossibleActions(conf)
 
     @staticmethod
     def applyAction(state: GameState, action: str, ghostIndex: int) -> None:
@@ -78,6 +78,10 @@ class KeyboardInference(inference.InferenceModule):
 class BustersAgent:
     "An agent that tracks and displays its beliefs about ghost positions."
 
+    # observationFunction and the inference modules (setGhostPosition) modify
+    # the states they are given, so they need their own copies
+    copyObservations = True
+
     def __init__(
         self,
         index=0,
@@ -31,10 +31,11 @@ Modified 19 Dec 2024 by George Rudolph:
 """
 
 from util import *
+import hashlib
 import time, os
 import traceback
 import sys
-from typing import List, Tuple, Dict, Optional, Any, Union, IO
+from typing import List, Tuple, Dict, Optional, Any, Union, IO, Iterator
 
 #######################
 # Parts worth reading #
@@ -49,6 +50,9 @@ class Agent:
     def registerInitialState(self, state): # inspects the starting state
     """
 
+    # Agents that modify the states they are given set this to receive deep copies
+    copyObservations = False
+
     def __init__(self, index: int = 0) -> None:
         self.index = index
 
@@ -223,15 +227,7 @@ class Grid:
         return self.data == other.data
 
     def __hash__(self) -> int:
-        # return hash(str(self))
-        base = 1
-        h = 0
-        for l in self.data:
-            for i in l:
-                if i:
-                    h += base
-                base *= 2
-        return hash(h)
+        return hash(self._cellBits())
 
     def copy(self) -> 'Grid':
         g = Grid(self.width, self.height)
@@ -258,24 +254,41 @@ class Grid:
         return list
 
     def packBits(self) -> Tuple[int, ...]:
+        """Pack grid data into an efficient integer representation.
+
+        Returns:
+            Tuple of (width, height, packed_bits...) where packed_bits
+            are integers encoding the boolean grid values
         """
-        Returns an efficient int list representation
+        return (self.width, self.height) + self._packCells(self._cellBits())
+
+    def _cellBits(self) -> int:
+        """Encode the grid as one integer whose bit x * height + y is cell (x,y).
+
+        Returns:
+            Integer bitset of the cells that are True
+        """
+        digits = ''.join(['1' if cell else '0' for column in reversed(self.data) for cell in reversed(column)])
+        return int(digits, 2) if digits else 0
+
+    def _packCells(self, cells: int) -> Tuple[int, ...]:
+        """Split a cell bitset into the CELLS_PER_INT sized chunks used by packBits.
+
+        Within a chunk the first cell is stored in the most significant bit.
+
+        Args:
+            cells: Integer bitset as returned by _cellBits
 
         Returns:
-            Tuple[int, ...]: (width, height, bitPackedInts...)
+            Tuple of packed integers
         """
-        bits = [self.width, self.height]
-        currentInt = 0
-        for i in range(self.height * self.width):
-            bit = self.CELLS_PER_INT - (i % self.CELLS_PER_INT) - 1
-            x, y = self._cellIndexToPosition(i)
-            if self[x][y]:
-                currentInt += 2 ** bit
-            if (i + 1) % self.CELLS_PER_INT == 0:
-                bits.append(currentInt)
-                currentInt = 0
-        bits.append(currentInt)
-        return tuple(bits)
+        size = self.CELLS_PER_INT
+        mask = (1 << size) - 1
+        chunks = []
+        for start in range(0, self.width * self.height + 1, size):
+            chunk = (cells >> start) & mask
+            chunks.append(int(format(chunk, f'0{size}b')[::-1], 2))
+        return tuple(chunks)
 
     def _cellIndexToPosition(self, index: int) -> Tuple[int, int]:
         x = index / self.height
@@ -283,33 +296,280 @@ class Grid:
         return x, y
 
     def _unpackBits(self, bits: Tuple[int, ...]) -> None:
+        """Fill grid data from bit-level representation.
+
+        Args:
+            bits: Tuple of integers encoding the grid data
         """
-        Fills in data from a bit-level representation
-        
+        cells = self._unpackCells(bits)
+        height = self.height
+        for x in range(self.width):
+            column = cells >> (x * height)
+            self.data[x] = [(column >> y) & 1 != 0 for y in range(height)]
+
+    def _unpackCells(self, bits: Tuple[int, ...]) -> int:
+        """Reassemble packBits chunks into a single cell bitset.
+
         Args:
-            bits: Tuple of integers representing the bit-packed grid
+            bits: Tuple of packed integers (without the width and height)
+
+        Returns:
+            Integer bitset whose bit x * height + y is cell (x,y)
+
+        Raises:
+            ValueError if a packed integer is negative
         """
-        cell = 0
-        for packed in bits:
-            for bit in self._unpackInt(packed, self.CELLS_PER_INT):
-                if cell == self.width * self.height:
-                    break
-                x, y = self._cellIndexToPosition(cell)
-                self[x][y] = bit
-                cell += 1
-
-    def _unpackInt(self, packed: int, size: int) -> List[bool]:
-        bools = []
-        if packed < 0:
-            raise ValueError("must be a positive integer")
-        for i in range(size):
-            n = 2 ** (self.CELLS_PER_INT - i - 1)
-            if packed >= n:
-                bools.append(True)
-                packed -= n
+        size = self.CELLS_PER_INT
+        cells = 0
+        for i, packed in enumerate(bits):
+            if packed < 0: raise ValueError("must be a positive integer")
+            cells |= int(format(packed, f'0{size}b')[::-1], 2) << (i * size)
+        return cells & ((1 << (self.width * self.height)) - 1)
+
+
+class _BitColumn:
+    """A writable view of one column of a BitGrid, so grid[x][y] keeps working.
+
+    Reads behave like a column list of Grid.data and writes go straight through to
+    the grid's bits. The column length is fixed, so list methods that resize it
+    (append, insert, pop, ...) are not provided.
+    """
+    __slots__ = ('grid', 'offset')
+
+    def __init__(self, grid: 'BitGrid', x: int) -> None:
+        self.grid = grid
+        self.offset = x * grid.height
+
+    def __len__(self) -> int:
+        return self.grid.height
+
+    def _index(self, y: int) -> int:
+        height = self.grid.height
+        if -height <= y < 0:
+            y += height
+        if not 0 <= y < height:
+            raise IndexError('grid column index out of range')
+        return y
+
+    def __getitem__(self, y: Union[int, slice]) -> Union[bool, List[bool]]:
+        if type(y) is int and 0 <= y < self.grid.height:
+            return (self.grid.bits >> (self.offset + y)) & 1 != 0
+        if isinstance(y, slice):
+            return list(self)[y]
+        return (self.grid.bits >> (self.offset + self._index(y))) & 1 != 0
+
+    def __iter__(self) -> Iterator[bool]:
+        column = self.grid.bits >> self.offset
+        return iter([(column >> y) & 1 != 0 for y in range(self.grid.height)])
+
+    def __reversed__(self) -> Iterator[bool]:
+        return reversed(list(self))
+
+    def __contains__(self, value: Any) -> bool:
+        return value in list(self)
+
+    def __setitem__(self, y: Union[int, slice], value: Any) -> None:
+        if isinstance(y, slice):
+            rows = range(*y.indices(self.grid.height))
+            values = list(value)
+            if len(values) != len(rows):
+                raise ValueError('cannot resize a grid column')
+            for row, cell in zip(rows, values):
+                self[row] = cell
+            return
+        y = self._index(y)
+        if value:
+            self.grid.bits |= 1 << (self.offset + y)
+        else:
+            self.grid.bits &= ~(1 << (self.offset + y))
+
+    def count(self, value: Any) -> int:
+        return list(self).count(value)
+
+    def index(self, value: Any, *bounds: int) -> int:
+        return list(self).index(value, *bounds)
+
+    def copy(self) -> List[bool]:
+        return list(self)
+
+    def __eq__(self, other: Any) -> bool:
+        return list(self) == other
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class _BitColumns:
+    """A write-through view of a BitGrid's columns that stands in for Grid.data."""
+    __slots__ = ('grid',)
+
+    def __init__(self, grid: 'BitGrid') -> None:
+        self.grid = grid
+
+    def __len__(self) -> int:
+        return self.grid.width
+
+    def __getitem__(self, x: Union[int, slice]) -> Union[_BitColumn, List[_BitColumn]]:
+        if isinstance(x, slice):
+            return [self.grid[i] for i in range(*x.indices(self.grid.width))]
+        return self.grid[x]
+
+    def __setitem__(self, x: int, column: List[bool]) -> None:
+        self.grid[x] = column
+
+    def __iter__(self) -> Iterator[_BitColumn]:
+        return iter([self.grid[x] for x in range(self.grid.width)])
+
+    def __eq__(self, other: Any) -> bool:
+        return [list(column) for column in self] == other
+
+    def __repr__(self) -> str:
+        return repr([list(column) for column in self])
+
+
+class BitGrid(Grid):
+    """
+    A boolean Grid backed by the bits of a single Python int.
+
+    Cell (x,y) is bit x * height + y, the same ordering Grid uses for hashing and
+    packBits, so a BitGrid hashes and compares equal to a list-backed Grid holding
+    the same cells. Because ints are immutable, copy() is O(1), and __hash__,
+    __eq__, count and asList work a machine word at a time instead of visiting
+    every cell from Python. Layouts store their food in a BitGrid, which makes the
+    food grids that search problems and game states copy and hash on every
+    successor cheap.
+
+    grid[x][y] and grid.data[x][y] reads and writes work as with Grid; grid[x]
+    and grid.data are views onto the bits rather than lists.
+
+    Args:
+        width: Width of the grid in cells
+        height: Height of the grid in cells
+        initialValue: Initial boolean value to fill grid with (default False)
+        bitRepresentation: Optional bit-packed representation to initialize from
+    """
+    def __init__(self, width: int, height: int, initialValue: bool = False,
+                 bitRepresentation: Optional[Tuple[int, ...]] = None) -> None:
+        if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        self.bits = (1 << (width * height)) - 1 if initialValue else 0
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+
+    @classmethod
+    def fromGrid(cls, grid: Grid) -> 'BitGrid':
+        """Build a BitGrid holding the same cells as a list-backed Grid.
+
+        Args:
+            grid: Boolean Grid to convert
+
+        Returns:
+            New BitGrid with the same width, height and cells
+        """
+        g = cls(grid.width, grid.height)
+        g.bits = grid._cellBits()
+        return g
+
+    @property
+    def data(self) -> _BitColumns:
+        """A write-through view of the columns, for code written against Grid.data.
+
+        grid.data[x][y] = value updates the grid just like grid[x][y] = value.
+        """
+        return _BitColumns(self)
+
+    def __getitem__(self, i: int) -> _BitColumn:
+        if not 0 <= i < self.width:
+            if -self.width <= i < 0:
+                i += self.width
             else:
-                bools.append(False)
-        return bools
+                raise IndexError('grid index out of range')
+        return _BitColumn(self, i)
+
+    def __setitem__(self, key: int, item: List[bool]) -> None:
+        column = self[key]
+        if len(item) != self.height:
+            raise ValueError('grid columns must have %d cells' % self.height)
+        for y, value in enumerate(item):
+            column[y] = value
+
+    def __str__(self) -> str:
+        out = [''.join(['T' if (self.bits >> (x * self.height + y)) & 1 else 'F'
+                        for x in range(self.width)]) for y in range(self.height)]
+        out.reverse()
+        return '\n'.join(out)
+
+    def __eq__(self, other: Any) -> bool:
+        if other == None: return False
+        if isinstance(other, BitGrid):
+            return self.bits == other.bits and self.width == other.width and self.height == other.height
+        return Grid.__eq__(self, other)
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def copy(self) -> 'BitGrid':
+        """Create an independent copy of this grid in O(1).
+
+        Returns:
+            New BitGrid with the same cells
+        """
+        g = BitGrid.__new__(BitGrid)
+        g.CELLS_PER_INT = self.CELLS_PER_INT
+        g.width = self.width
+        g.height = self.height
+        g.bits = self.bits
+        return g
+
+    def shallowCopy(self) -> 'BitGrid':
+        """Same as copy(); the backing int is immutable so nothing is shared.
+
+        Returns:
+            New BitGrid with the same cells
+        """
+        return self.copy()
+
+    def count(self, item: bool = True) -> int:
+        """Count cells matching the given value.
+
+        Args:
+            item: Value to count (default True)
+
+        Returns:
+            Number of cells matching the value
+        """
+        if item not in [False, True]: return 0
+        trueCells = self.bits.bit_count()
+        return trueCells if item else self.width * self.height - trueCells
+
+    def asList(self, key: bool = True) -> List[Tuple[int, int]]:
+        """Return coordinates of cells matching the given value.
+
+        Args:
+            key: Value to match (default True)
+
+        Returns:
+            List of (x,y) coordinates where value matches key, ordered as in Grid.asList
+        """
+        if key not in [False, True]: return []
+        bits = self.bits if key else ~self.bits & ((1 << (self.width * self.height)) - 1)
+        height = self.height
+        cells = []
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            cells.append((index // height, index % height))
+            bits ^= low
+        return cells
+
+    def _cellBits(self) -> int:
+        return self.bits
+
+    def _unpackBits(self, bits: Tuple[int, ...]) -> None:
+        self.bits = self._unpackCells(bits)
 
 
 def reconstituteGrid(bitRep: Union[Tuple[int, ...], Any]) -> Union[Grid, Any]:
@@ -421,6 +681,72 @@ class Actions:
     getSuccessor = staticmethod(getSuccessor)
 
 
+class MoveTable:
+    """
+    The legal moves from every cell of a wall grid, computed once.
+
+    Cell (x,y) has id x * height + y, as in BitGrid. The tables hold, per
+    cell id, what Actions.getPossibleActions and Actions.getLegalNeighbors
+    would derive from the walls; Layout.getMoveTable builds one per layout.
+    """
+
+    SEARCH_ORDER = (
+        Directions.NORTH,
+        Directions.SOUTH,
+        Directions.EAST,
+        Directions.WEST,
+    )
+
+    def __init__(self, walls: Grid) -> None:
+        width, height = walls.width, walls.height
+        self.height = height
+        self.actions: List[Tuple[str, ...]] = []
+        self.neighbors: List[Tuple[Tuple[int, int], ...]] = []
+        # (action, position) pairs of the moves out of each cell, Stop excluded
+        self.successors: List[Tuple[Tuple[str, Tuple[int, int]], ...]] = []
+
+        def isOpen(x: int, y: int) -> bool:
+            return 0 <= x < width and 0 <= y < height and not walls[x][y]
+
+        for x in range(width):
+            for y in range(height):
+                moves = {
+                    direction: (x + dx, y + dy)
+                    for direction, (dx, dy) in Actions._directionsAsList
+                    if isOpen(x + dx, y + dy)
+                }
+                self.actions.append(tuple(moves))
+                self.neighbors.append(tuple(moves.values()))
+                self.successors.append(
+                    tuple(
+                        (direction, moves[direction])
+                        for direction in self.SEARCH_ORDER
+                        if direction in moves
+                    )
+                )
+
+    def getPossibleActions(self, config: Configuration) -> List[str]:
+        x, y = config.pos
+        x_int, y_int = int(x + 0.5), int(y + 0.5)
+
+        # In between grid points, all agents must continue straight
+        if abs(x - x_int) + abs(y - y_int) > Actions.TOLERANCE:
+            return [config.getDirection()]
+        return list(self.actions[x_int * self.height + y_int])
+
+    def getLegalNeighbors(
+        self, position: Tuple[float, float]
+    ) -> Tuple[Tuple[int, int], ...]:
+        x, y = position
+        return self.neighbors[int(x + 0.5) * self.height + int(y + 0.5)]
+
+    def getSuccessors(
+        self, position: Tuple[int, int]
+    ) -> Tuple[Tuple[str, Tuple[int, int]], ...]:
+        x, y = position
+        return self.successors[x * self.height + y]
+
+
 class GameStateData:
     """ """
 
@@ -587,9 +913,147 @@ except:
     _BOINC_ENABLED = False
 
 
+# Game records are versioned, line-delimited text files written one move at a
+# time (see GameRecorder). Each move is a fixed-width line holding the agent
+# index in base 36 and a one-letter action code.
+RECORD_HEADER = "pacman-record"
+RECORD_VERSION = 1
+_AGENT_CODES = "0123456789abcdefghijklmnopqrstuvwxyz"
+_ACTION_CODES = {
+    Directions.NORTH: "N",
+    Directions.SOUTH: "S",
+    Directions.EAST: "E",
+    Directions.WEST: "W",
+    Directions.STOP: "X",
+}
+_CODE_ACTIONS = {code: action for action, code in _ACTION_CODES.items()}
+
+
+def layoutHash(layoutText: List[str]) -> str:
+    """Returns the content hash that identifies a layout in game records.
+
+    Args:
+        layoutText: Rows of the layout
+
+    Returns:
+        Hex SHA-1 digest of the layout text
+    """
+    return hashlib.sha1("\n".join(layoutText).encode()).hexdigest()
+
+
+class GameRecorder:
+    """Writes the record of a game to a file while the game is played.
+
+    A record consists of the lines
+
+        pacman-record <version>
+        layout <layoutHash of the layout> <number of rows>
+        <the rows of the layout>
+        seed <random seed the game was played with, or ->
+        moves
+        <one line per move>
+
+    Every move is flushed as soon as it is made, so the record of a game that
+    crashes or is interrupted is complete up to its last move. Read records
+    with readGameRecord. Can be used as a context manager.
+    """
+
+    def __init__(
+        self, fileName: str, layoutText: List[str], seed: Optional[int] = None
+    ) -> None:
+        """Creates the record file and writes its header.
+
+        Args:
+            fileName: Name of the record file
+            layoutText: Rows of the layout the game is played on
+            seed: Random seed the game was played with, if known
+        """
+        self.file = open(fileName, "w", encoding="ascii", newline="\n")
+        self.file.write(f"{RECORD_HEADER} {RECORD_VERSION}\n")
+        self.file.write(f"layout {layoutHash(layoutText)} {len(layoutText)}\n")
+        self.file.writelines(row + "\n" for row in layoutText)
+        self.file.write(f"seed {'-' if seed is None else seed}\nmoves\n")
+        self.file.flush()
+
+    def recordMove(self, agentIndex: int, action: str) -> None:
+        """Appends a move to the record.
+
+        Args:
+            agentIndex: Index of the agent that moved, below 36
+            action: Direction the agent moved in
+        """
+        self.file.write(f"{_AGENT_CODES[agentIndex]}{_ACTION_CODES[action]}\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        """Closes the record file."""
+        self.file.close()
+
+    def __enter__(self) -> "GameRecorder":
+        return self
+
+    def __exit__(self, *excInfo: Any) -> None:
+        self.close()
+
+
+def readGameRecord(
+    fileName: str,
+) -> Tuple[List[str], Optional[int], Iterator[Tuple[int, str]]]:
+    """Reads a game record written by GameRecorder.
+
+    The header is read at once and the moves only as the returned iterator is
+    consumed, so a replay can start before the whole file is read. A last move
+    cut short by a crash is skipped.
+
+    Args:
+        fileName: Name of the record file
+
+    Returns:
+        Tuple of (layout rows, seed or None, iterator over (agentIndex, action) moves)
+
+    Raises:
+        Exception: If the file is not a game record of a supported version,
+            or its layout does not match the layout hash
+    """
+    f = open(fileName, encoding="ascii", newline="\n")
+    try:
+        header = f.readline().split()
+        if len(header) != 2 or header[0] != RECORD_HEADER:
+            raise Exception(f"{fileName} is not a recorded game")
+        if header[1] != str(RECORD_VERSION):
+            raise Exception(
+                f"{fileName} is a version {header[1]} game record; "
+                f"only version {RECORD_VERSION} is supported"
+            )
+        _, digest, numRows = f.readline().split()
+        layoutText = [f.readline().rstrip("\n") for _ in range(int(numRows))]
+        if layoutHash(layoutText) != digest:
+            raise Exception(f"The layout in {fileName} does not match its hash")
+        _, seed = f.readline().split()
+        if f.readline() != "moves\n":
+            raise Exception(f"{fileName} has no moves section")
+    except ValueError:
+        f.close()
+        raise Exception(f"{fileName} is not a valid game record")
+    except Exception:
+        f.close()
+        raise
+
+    def moves() -> Iterator[Tuple[int, str]]:
+        with f:
+            for line in f:
+                if len(line) == 3:
+                    yield int(line[0], 36), _CODE_ACTIONS[line[1]]
+
+    return layoutText, None if seed == "-" else int(seed), moves()
+
+
 class Game:
     """
     The Game manages the control flow, soliciting actions from agents.
+
+    A GameRecorder set as recorder before the game runs receives every move
+    as it is made.
     """
 
     def __init__(
@@ -613,6 +1077,8 @@ class Game:
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
         self.agentTimeout = False
+        self.moveTimer = MoveTimer()
+        self.recorder: Optional[GameRecorder] = None
         import io
         self.agentOutput = [io.StringIO() for agent in agents]
 
@@ -651,10 +1117,39 @@ class Game:
         sys.stdout = OLD_STDOUT
         sys.stderr = OLD_STDERR
 
+    def _observationFor(self, agent: Any) -> Any:
+        """
+        Get the state to hand to an agent.
+
+        The game never changes a state once it has moved on from it, so agents
+        share the game's current state unless they set copyObservations to
+        receive a deep copy that they are free to modify.
+
+        Args:
+            agent: Agent that will observe the state
+
+        Returns:
+            The current state, or a deep copy of it
+        """
+        if getattr(agent, 'copyObservations', False):
+            return self.state.deepCopy()
+        return self.state
+
     def run(self) -> None:
         """
         Main control loop for game play.
+
+        When exceptions are caught, agent calls are timed by a MoveTimer that
+        is set up once for the whole game, so move timeouts may be fractional.
         """
+        if self.catchExceptions:
+            with self.moveTimer:
+                self._runGame()
+        else:
+            self._runGame()
+
+    def _runGame(self) -> None:
+        """Play the game until it is over; see run."""
         self.display.initialize(self.state.data)
         self.numMoves = 0
 
@@ -674,13 +1169,13 @@ class Game:
                 self.mute(i)
                 if self.catchExceptions:
                     try:
-                        timed_func = TimeoutFunction(
+                        timed_func = self.moveTimer.timed(
                             agent.registerInitialState,
-                            int(self.rules.getMaxStartupTime(i)),
+                            self.rules.getMaxStartupTime(i),
                         )
                         try:
                             start_time = time.time()
-                            timed_func(self.state.deepCopy())
+                            timed_func(self._observationFor(agent))
                             time_taken = time.time() - start_time
                             self.totalAgentTimes[i] += time_taken
                         except TimeoutFunctionException:
@@ -697,7 +1192,7 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    agent.registerInitialState(self.state.deepCopy())
+                    agent.registerInitialState(self._observationFor(agent))
                 ## TODO: could this exceed the total time
                 self.unmute()
 
@@ -714,13 +1209,13 @@ class Game:
                 self.mute(agentIndex)
                 if self.catchExceptions:
                     try:
-                        timed_func = TimeoutFunction(
+                        timed_func = self.moveTimer.timed(
                             agent.observationFunction,
-                            int(self.rules.getMoveTimeout(agentIndex)),
+                            self.rules.getMoveTimeout(agentIndex),
                         )
                         try:
                             start_time = time.time()
-                            observation = timed_func(self.state.deepCopy())
+                            observation = timed_func(self._observationFor(agent))
                         except TimeoutFunctionException:
                             skip_action = True
                         move_time += time.time() - start_time
@@ -730,19 +1225,19 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    observation = agent.observationFunction(self.state.deepCopy())
+                    observation = agent.observationFunction(self._observationFor(agent))
                 self.unmute()
             else:
-                observation = self.state.deepCopy()
+                observation = self._observationFor(agent)
 
             # Solicit an action
             action = None
             self.mute(agentIndex)
             if self.catchExceptions:
                 try:
-                    timed_func = TimeoutFunction(
+                    timed_func = self.moveTimer.timed(
                         agent.getAction,
-                        int(self.rules.getMoveTimeout(agentIndex)) - int(move_time),
+                        self.rules.getMoveTimeout(agentIndex) - move_time,
                     )
                     try:
                         start_time = time.time()
@@ -803,6 +1298,8 @@ class Game:
 
             # Execute the action
             self.moveHistory.append((agentIndex, action))
+            if self.recorder is not None:
+                self.recorder.recordMove(agentIndex, action)
             if self.catchExceptions:
                 try:
                     self.state = self.state.getResult(agentIndex, action)
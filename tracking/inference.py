@@ -211,8 +211,8 @@ class InferenceModule:
         if pacmanPosition == ghostPosition:  # The ghost has been caught!
             dist[jail] = 1.0
             return dist
-        pacmanSuccessorStates = game.Actions.getLegalNeighbors(
-            pacmanPosition, gameState.getWalls()
+        pacmanSuccessorStates = gameState.data.layout.getMoveTable().getLegalNeighbors(
+            pacmanPosition
         )  # Positions Pacman can move to
         if ghostPosition in pacmanSuccessorStates:  # Ghost could get caught
             mult = 1.0 / float(len(pacmanSuccessorStates))
@@ -278,8 +278,9 @@ class InferenceModule:
         Note that calling setGhostPosition does not change the position of the
         ghost in the GameState object used for tracking the true progression of
         the game. The code in inference.py only ever receives a deep copy of
-        the GameState object which is responsible for maintaining game state,
-        not a reference to the original object.  Note also that the ghost
+        the GameState object which is responsible for maintaining game state
+        (BustersAgent sets copyObservations), not a reference to the original
+        object.  Note also that the ghost
         distance observations are stored at the time the GameState object is
         created, so changing the position of the ghost will not affect the
         functioning of observe.
@@ -37,13 +37,14 @@ Changes by George Rudolph 30 Nov 2024:
 
 
 from util import manhattanDistance
-from game import Grid
+from game import Grid, BitGrid, MoveTable
 import os
 import random
 from functools import reduce
 from typing import List, Tuple, Set, Dict, Optional, Union
 
 VISIBILITY_MATRIX_CACHE = {}
+LAYOUT_CACHE = {}
 
 
 class Layout:
@@ -54,12 +55,13 @@ class Layout:
         width (int): Width of the game board
         height (int): Height of the game board
         walls (Grid): Grid indicating wall positions
-        food (Grid): Grid indicating food positions
+        food (BitGrid): Bit-packed grid indicating food positions
         capsules (list): List of capsule positions
         agentPositions (list): List of agent positions
         numGhosts (int): Number of ghosts in the layout
         layoutText (list): Original text representation of layout
         totalFood (int): Total number of food pellets
+        moveTable (MoveTable): Legal moves per cell, built by getMoveTable
     """
 
     def __init__(self, layoutText: List[str]) -> None:
@@ -84,19 +86,26 @@ class Layout:
         self.width = len(layoutText[0])
         self.height = len(layoutText)
         self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        self.food = BitGrid(self.width, self.height, False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
         self.processLayoutText(layoutText)
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
+        self.moveTable: Optional[MoveTable] = None
         # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self) -> int:
         """Returns the number of ghosts in the layout."""
         return self.numGhosts
 
+    def getMoveTable(self) -> MoveTable:
+        """Returns the table of legal moves from every cell, building it on first use."""
+        if self.moveTable is None:
+            self.moveTable = MoveTable(self.walls)
+        return self.moveTable
+
     def initializeVisibilityMatrix(self) -> None:
         """
         Initializes a visibility matrix that determines what each agent can see from their position.
@@ -223,8 +232,12 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self) -> 'Layout':
-        """Returns a new copy of the layout."""
-        return Layout(self.layoutText[:])
+        """Return this layout.
+
+        Layouts are never modified after they are built, so game states and
+        their copies share one instance instead of re-parsing the layout text.
+        """
+        return self
 
     def processLayoutText(self, layoutText: List[str]) -> None:
         """
@@ -317,6 +330,25 @@ def tryToLoad(fullname: str) -> Optional[Layout]:
         return None
     f = open(fullname)
     try:
-        return Layout([line.strip() for line in f])
+        return internLayout([line.strip() for line in f])
     finally:
         f.close()
+
+
+def internLayout(layoutText: List[str]) -> Layout:
+    """
+    Return the shared Layout for the given text, parsing it only the first time.
+
+    Layouts are immutable, so every game played on the same maze can use a
+    single instance.
+
+    Args:
+        layoutText: List of strings representing the maze layout
+
+    Returns:
+        The interned Layout for this text
+    """
+    key = tuple(layoutText)
+    if key not in LAYOUT_CACHE:
+        LAYOUT_CACHE[key] = Layout(list(layoutText))
+    return LAYOUT_CACHE[key]
@@ -49,6 +49,7 @@ Changes by George Rudolph 30 Nov 2024:
 """
 from game import GameStateData
 from game import Game
+from game import GameRecorder, readGameRecord
 from game import Directions
 from game import Actions
 from util import nearestPoint
@@ -343,7 +344,7 @@ class ClassicGameRules:
     and how the game starts and ends.
     """
 
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: float = 30):
         self.timeout = timeout
 
     def newGame(
@@ -414,19 +415,19 @@ class ClassicGameRules:
         else:
             print("A ghost crashed")
 
-    def getMaxTotalTime(self, agentIndex: int) -> int:
+    def getMaxTotalTime(self, agentIndex: int) -> float:
         """Returns maximum time allowed"""
         return self.timeout
 
-    def getMaxStartupTime(self, agentIndex: int) -> int:
+    def getMaxStartupTime(self, agentIndex: int) -> float:
         """Returns maximum startup time allowed"""
         return self.timeout
 
-    def getMoveWarningTime(self, agentIndex: int) -> int:
+    def getMoveWarningTime(self, agentIndex: int) -> float:
         """Returns time to warn about slow moves"""
         return self.timeout
 
-    def getMoveTimeout(self, agentIndex: int) -> int:
+    def getMoveTimeout(self, agentIndex: int) -> float:
         """Returns timeout for moves"""
         return self.timeout
 
@@ -454,8 +455,8 @@ class PacmanRules:
         Returns:
             List of legal actions Pacman can take
         """
-        return Actions.getPossibleActions(
-            state.getPacmanState().configuration, state.data.layout.walls
+        return state.data.layout.getMoveTable().getPossibleActions(
+            state.getPacmanState().configuration
         )
 
     @staticmethod
@@ -538,7 +539,7 @@ class GhostRules:
             List of legal actions for the ghost
         """
         conf = state.getGhostState(ghostIndex).configuration
-        possibleActions = Actions.getPossibleActions(conf, state.data.layout.walls)
+        possibleActions = state.data.layout.getMoveTable().getPossibleActions(conf)
         reverse = Actions.reverseDirection(conf.direction)
         if Directions.STOP in possibleActions:
             possibleActions.remove(Directions.STOP)
@@ -774,7 +775,7 @@ def readCommand(argv: list) -> dict:
     parser.add_option(
         "--replay",
         dest="gameToReplay",
-        help="A recorded game file (pickle) to replay",
+        help="A recorded game file to replay",
         default=None,
     )
     parser.add_option(
@@ -815,10 +816,24 @@ def readCommand(argv: list) -> dict:
         ),
         default=30,
     )
+    parser.add_option(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type="int",
+        help=default(
+            "Number of worker processes playing games in parallel (requires -q)"
+        ),
+        default=1,
+    )
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
         raise Exception(f"Command line input not understood: {otherjunk}")
+    if options.jobs > 1 and not options.quietGraphics:
+        raise Exception(
+            "Parallel games (--jobs) can only be played with quiet graphics (-q)"
+        )
     args = dict()
 
     # Fix the random seed
@@ -872,19 +887,13 @@ def readCommand(argv: list) -> dict:
     args["record"] = options.record
     args["catchExceptions"] = options.catchExceptions
     args["timeout"] = options.timeout
+    args["jobs"] = options.jobs
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
         print(f"Replaying recorded game {options.gameToReplay}.")
-        import pickle
-
-        f = open(options.gameToReplay)
-        try:
-            recorded = pickle.load(f)
-        finally:
-            f.close()
-        recorded["display"] = args["display"]
-        replayGame(**recorded)
+        layoutText, seed, moves = readGameRecord(options.gameToReplay)
+        replayGame(layout.internLayout(layoutText), moves, args["display"])
         sys.exit(0)
 
     return args
@@ -935,7 +944,8 @@ def replayGame(layout, actions, display):
     
     Args:
         layout: The game layout to use
-        actions: List of actions taken in the recorded game
+        actions: (agentIndex, action) pairs taken in the recorded game, which
+            may be read lazily from a game record
         display: The display class to use for visualization
         
     Side effects:
@@ -962,6 +972,116 @@ def replayGame(layout, actions, display):
     display.finish()
 
 
+def runGame(game, layout, record, gameIndex, seed):
+    """Play a game, writing its record while it is played if asked to.
+
+    The record is named by the game index and the time the game started.
+    Recording never touches the random sequence, so it does not change the
+    game.
+
+    Args:
+        game: The game to play
+        layout: The game layout
+        record: Whether to record the game
+        gameIndex: Index of the game in the run, starting from 0
+        seed: Random seed a worker process started the game with, stored in its
+            record, or None for a game played on from the current random sequence
+    """
+    if not record:
+        game.run()
+        return
+    fname = ("recorded-game-%d" % (gameIndex + 1)) + "-".join(
+        [str(t) for t in time.localtime()[1:6]]
+    )
+    with GameRecorder(fname, layout.layoutText, seed) as recorder:
+        game.recorder = recorder
+        game.run()
+
+
+# Game set-up for the worker processes of runGamesInParallel
+_workerSetup = None
+
+
+def _initGameWorker(layout, pacman, ghosts, rules, catchExceptions, record):
+    """Store the game set-up in a worker process of runGamesInParallel."""
+    global _workerSetup
+    _workerSetup = (layout, pacman, ghosts, rules, catchExceptions, record)
+
+
+def _playGameInWorker(job):
+    """Play one quiet game in a worker process.
+
+    Args:
+        job: Tuple of (game index, random seed for the game)
+
+    Returns:
+        Tuple of (game index, final state, move history, agent timed out, agent crashed)
+    """
+    import textDisplay
+
+    gameIndex, seed = job
+    layout, pacman, ghosts, rules, catchExceptions, record = _workerSetup
+    random.seed(seed)
+    game = rules.newGame(
+        layout, pacman, ghosts, textDisplay.NullGraphics(), True, catchExceptions
+    )
+    try:
+        runGame(game, layout, record, gameIndex, seed)
+    except SystemExit as e:
+        # A worker that exits is replaced without its task ever finishing, which
+        # would leave the pool waiting forever (util.raiseNotDefined exits)
+        raise Exception(f"Game {gameIndex + 1} exited with status {e.code}")
+    sys.stdout.flush()
+    return gameIndex, game.state, game.moveHistory, game.agentTimeout, game.agentCrashed
+
+
+def runGamesInParallel(
+    layout, pacman, ghosts, rules, jobList, catchExceptions, record, jobs
+):
+    """Play quiet games in a pool of worker processes.
+
+    Each worker plays on its own copy of the agents.
+
+    Args:
+        layout: The game layout to use
+        pacman: The Pacman agent to use
+        ghosts: List of ghost agents to use
+        rules: Rules used to build the games and report their outcome
+        jobList: Tuples of (game index, random seed for the game) to play
+        catchExceptions: Whether to catch exceptions during gameplay
+        record: Whether the workers record the games they play
+        jobs: Number of worker processes
+
+    Yields:
+        Tuples of (game index, finished game) in the order the games finish
+    """
+    import multiprocessing, textDisplay
+    # Forked workers inherit the agents, so they need not be picklable
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    sys.stdout.flush()
+    with context.Pool(
+        jobs,
+        _initGameWorker,
+        (layout, pacman, ghosts, rules, catchExceptions, record),
+    ) as pool:
+        for i, state, moveHistory, agentTimeout, agentCrashed in pool.imap_unordered(
+            _playGameInWorker, jobList
+        ):
+            game = rules.newGame(
+                layout, pacman, ghosts, textDisplay.NullGraphics(), False, catchExceptions
+            )
+            game.state = state
+            game.moveHistory = moveHistory
+            game.agentTimeout = agentTimeout
+            game.agentCrashed = agentCrashed
+            game.gameOver = True
+            rules.process(state, game)
+            yield i, game
+
+
 def runGames(
     layout,
     pacman,
@@ -972,6 +1092,7 @@ def runGames(
     numTraining=0,
     catchExceptions=False,
     timeout=30,
+    jobs=1,
 ):
     """Run multiple games with the given configuration.
     
@@ -985,6 +1106,8 @@ def runGames(
         numTraining: Number of training games (no output)
         catchExceptions: Whether to catch exceptions during gameplay
         timeout: Time limit for each move in seconds
+        jobs: Number of worker processes for the games after training;
+            training games are always played one after another here
         
     Returns:
         List of completed game instances
@@ -1000,7 +1123,9 @@ def runGames(
     rules = ClassicGameRules(timeout)
     games = []
 
-    for i in range(numGames):
+    # Training games change the agents, so only the games after them are spread over jobs
+    numSerial = numGames if jobs <= 1 else min(numTraining, numGames)
+    for i in range(numSerial):
         beQuiet = i < numTraining
         if beQuiet:
             # Suppress output and graphics
@@ -1014,20 +1139,29 @@ def runGames(
         game = rules.newGame(
             layout, pacman, ghosts, gameDisplay, beQuiet, catchExceptions
         )
-        game.run()
+        runGame(game, layout, record, i, None)
         if not beQuiet:
             games.append(game)
 
-        if record:
-            import time, pickle
-
-            fname = ("recorded-game-%d" % (i + 1)) + "-".join(
-                [str(t) for t in time.localtime()[1:6]]
-            )
-            f = open(fname, "w")
-            components = {"layout": layout, "actions": game.moveHistory}
-            pickle.dump(components, f)
-            f.close()
+    if numSerial < numGames:
+        # Serial games play on from the random sequence as it stands. Each game
+        # handed to a worker is played from its own seed instead, drawn here
+        # before any of them starts, so a fixed seed (-f) plays the same
+        # parallel games whatever the number of jobs
+        jobList = [(i, random.randrange(2 ** 32)) for i in range(numSerial, numGames)]
+        finished = {}
+        for i, game in runGamesInParallel(
+            layout,
+            pacman,
+            ghosts,
+            rules,
+            jobList,
+            catchExceptions,
+            record,
+            jobs,
+        ):
+            finished[i] = game
+        games.extend(finished[i] for i in sorted(finished))
 
     if (numGames - numTraining) > 0:
         scores = [game.state.getScore() for game in games]
@@ -750,17 +750,29 @@ class Queue:
         return len(self.list) == 0
 
 
+# Item of the heap entries that update has superseded
+_REMOVED = object()
+
+
 class PriorityQueue:
     """A queue where items have associated priorities.
     
     Implements a priority queue data structure where each inserted item
     has a priority associated with it. Provides O(1) access to the 
-    lowest-priority item in the queue using a heap-based implementation.
+    lowest-priority item in the queue, and O(log n) push, pop and update
+    using a heap-based implementation.
+
+    The first call to update indexes the heap entries by item, and push
+    and pop maintain the index from then on. Lowering an item's priority
+    marks its entry as removed and pushes a new one with the same count;
+    pop discards removed entries when they reach the top.
     """
 
     def __init__(self) -> None:
-        self.heap: list = []
+        self.heap: list = []  # [priority, count, item] entries
         self.count: int = 0
+        self.removed: int = 0  # entries superseded by update
+        self.entries: Optional[dict] = None  # item -> live entries, built by update
 
     def push(self, item: any, priority: float) -> None:
         """Add an item with given priority to the queue.
@@ -769,9 +781,11 @@ class PriorityQueue:
             item: The item to add
             priority: Priority value for the item (lower values = higher priority)
         """
-        entry = (priority, self.count, item)
+        entry = [priority, self.count, item]
         heapq.heappush(self.heap, entry)
         self.count += 1
+        if self.entries is not None:
+            self._index(entry)
 
     def pop(self) -> any:
         """Remove and return the item with lowest priority value.
@@ -779,8 +793,13 @@ class PriorityQueue:
         Returns:
             The item with lowest priority value
         """
-        (_, _, item) = heapq.heappop(self.heap)
-        return item
+        entry = heapq.heappop(self.heap)
+        while entry[2] is _REMOVED:
+            self.removed -= 1
+            entry = heapq.heappop(self.heap)
+        if self.entries is not None:
+            self._unindex(entry)
+        return entry[2]
 
     def isEmpty(self) -> bool:
         """Check if the priority queue is empty.
@@ -788,29 +807,60 @@ class PriorityQueue:
         Returns:
             True if queue is empty, False otherwise
         """
-        return len(self.heap) == 0
+        return len(self.heap) == self.removed
 
     def update(self, item: any, priority: float) -> None:
         """Update the priority of an existing item or add it if not present.
         
-        If item exists with higher priority: update priority and rebuild heap
+        If item exists with higher priority: update its priority
         If item exists with equal/lower priority: do nothing
         If item doesn't exist: add it with given priority
+        If item was pushed more than once, its lowest priority counts
         
         Args:
             item: The item to update/add
             priority: New priority value
         """
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
-                break
-        else:
+        if self.entries is None:
+            self.entries = {}
+            for entry in self.heap:
+                if entry[2] is not _REMOVED:
+                    self._index(entry)
+        try:
+            entries = self.entries.get(item)
+        except TypeError:
+            # Unhashable items are not indexed
+            entries = [entry for entry in self.heap if entry[2] == item]
+        if not entries:
             self.push(item, priority)
+            return
+        entry = min(entries)
+        if entry[0] <= priority:
+            return
+        self._unindex(entry)
+        entry[2] = _REMOVED
+        self.removed += 1
+        newEntry = [priority, entry[1], item]
+        heapq.heappush(self.heap, newEntry)
+        self._index(newEntry)
+
+    def _index(self, entry: list) -> None:
+        """Add an entry to the index of entries by item."""
+        try:
+            self.entries.setdefault(entry[2], []).append(entry)
+        except TypeError:
+            pass
+
+    def _unindex(self, entry: list) -> None:
+        """Remove an entry from the index of entries by item."""
+        try:
+            entries = self.entries.get(entry[2])
+        except TypeError:
+            return
+        if entries is not None:
+            entries.remove(entry)
+            if not entries:
+                del self.entries[entry[2]]
 
 
 class PriorityQueueWithFunction(PriorityQueue):
@@ -1351,13 +1401,12 @@ def pause() -> None:
 
 # code to handle timeouts
 #
-# FIXME
-# NOTE: TimeoutFuncton is NOT reentrant.  Later timeouts will silently
-# disable earlier timeouts.  Could be solved by maintaining a global list
-# of active time outs.  Currently, questions which have test cases calling
-# this have all student code so wrapped.
+# A MoveTimer arms a single interval timer per timed call and suspends any
+# timer that was running when it started, resuming it when it stops, so
+# timeouts nest (e.g. an autograder question limit around a game's moves).
 #
 import signal
+import threading
 import time
 
 
@@ -1367,36 +1416,113 @@ class TimeoutFunctionException(Exception):
     pass
 
 
+class MoveTimer:
+    """Enforces sub-second time limits on many calls, such as the moves of a game.
+
+    start() installs the SIGALRM handler once, after which each timed call only
+    arms an interval timer (setitimer). Outside the main thread, or where
+    SIGALRM does not exist, a call is instead checked against a monotonic clock
+    when it returns. A timer that was already running when start() was called
+    is suspended and resumed by stop(). Can be used as a context manager.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a stopped timer."""
+        self.useAlarm = False
+        self._oldHandler = None
+        self._outerDeadline: Optional[float] = None
+
+    def handle_timeout(self, signum: int, frame: any) -> None:
+        """Signal handler that raises TimeoutFunctionException.
+
+        Args:
+            signum: Signal number (unused)
+            frame: Current stack frame (unused)
+
+        Raises:
+            TimeoutFunctionException
+        """
+        raise TimeoutFunctionException()
+
+    def start(self) -> None:
+        """Install the SIGALRM handler if this thread can receive it."""
+        self.useAlarm = (
+            hasattr(signal, "setitimer")
+            and threading.current_thread() is threading.main_thread()
+        )
+        if self.useAlarm:
+            remaining, _ = signal.setitimer(signal.ITIMER_REAL, 0)
+            self._outerDeadline = time.monotonic() + remaining if remaining > 0 else None
+            self._oldHandler = signal.signal(signal.SIGALRM, self.handle_timeout)
+
+    def stop(self) -> None:
+        """Restore the previous SIGALRM handler and any suspended timer."""
+        if self.useAlarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._oldHandler)
+            if self._outerDeadline is not None:
+                # A suspended timer that ran out in the meantime fires at once
+                signal.setitimer(
+                    signal.ITIMER_REAL,
+                    max(self._outerDeadline - time.monotonic(), 1e-6),
+                )
+            self.useAlarm = False
+
+    def __enter__(self) -> "MoveTimer":
+        self.start()
+        return self
+
+    def __exit__(self, *excInfo: any) -> None:
+        self.stop()
+
+    def timed(self, function: callable, timeout: float) -> callable:
+        """Wrap a function so that calls to it are limited in time.
+
+        Args:
+            function: The function to wrap
+            timeout: Seconds (possibly fractional) a call may take; zero or
+                less has already expired
+
+        Returns:
+            Wrapped function that raises TimeoutFunctionException on timeout
+        """
+
+        def call(*args: any, **keyArgs: any) -> any:
+            if timeout <= 0:
+                raise TimeoutFunctionException()
+            if self.useAlarm:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+                try:
+                    return function(*args, **keyArgs)
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            start_time = time.monotonic()
+            result = function(*args, **keyArgs)
+            if time.monotonic() - start_time >= timeout:
+                raise TimeoutFunctionException()
+            return result
+
+        return call
+
+
 class TimeoutFunction:
     """A wrapper class that enforces a timeout on function execution.
     
     This class wraps a function and raises a TimeoutFunctionException if the function
-    takes longer than the specified timeout to execute. It uses SIGALRM if available,
-    otherwise falls back to checking elapsed time after execution.
+    takes longer than the specified timeout to execute. Every call sets up its own
+    MoveTimer; use a MoveTimer directly to time many calls.
     """
 
-    def __init__(self, function: callable, timeout: int) -> None:
+    def __init__(self, function: callable, timeout: float) -> None:
         """Initialize the timeout wrapper.
         
         Args:
             function: The function to wrap with timeout functionality
-            timeout: Maximum allowed execution time in seconds
+            timeout: Maximum allowed execution time in seconds, possibly fractional
         """
         self.timeout = timeout
         self.function = function
 
-    def handle_timeout(self, signum: int, frame: any) -> None:
-        """Signal handler that raises TimeoutFunctionException.
-        
-        Args:
-            signum: Signal number (unused)
-            frame: Current stack frame (unused)
-            
-        Raises:
-            TimeoutFunctionException
-        """
-        raise TimeoutFunctionException()
-
     def __call__(self, *args: any, **keyArgs: any) -> any:
         """Execute the wrapped function with timeout checking.
         
@@ -1410,21 +1536,8 @@ class TimeoutFunction:
         Raises:
             TimeoutFunctionException if execution exceeds timeout
         """
-        if hasattr(signal, "SIGALRM"):
-            old = signal.signal(signal.SIGALRM, self.handle_timeout)
-            signal.alarm(self.timeout)
-            try:
-                result = self.function(*args, **keyArgs)
-            finally:
-                signal.signal(signal.SIGALRM, old)
-            signal.alarm(0)
-        else:
-            start_time = time.time()
-            result = self.function(*args, **keyArgs)
-            time_elapsed = time.time() - start_time
-            if time_elapsed >= self.timeout:
-                self.handle_timeout(None, None)
-        return result
+        with MoveTimer() as timer:
+            return timer.timed(self.function, self.timeout)(*args, **keyArgs)
 
 
 _ORIGINAL_STDOUT = None